@@ -1,11 +1,75 @@
 # ruff: noqa: F401
 
-from base_pars_lib import utils
-from base_pars_lib.async_base_curl_cffi_parser import AsyncBaseCurlCffiParser
-from base_pars_lib.async_base_parser import AiohttpResponse, AsyncBaseParser
-from base_pars_lib.async_camoufox_base_parser import AsyncCamoufoxBaseParser
-from base_pars_lib.async_nodriver_base_parser import AsyncNodriverBaseParser
-from base_pars_lib.async_playwright_base_parser import AsyncPlaywrightBaseParser
-from base_pars_lib.base_parser import BaseParser
-from base_pars_lib.core.async_browsers_parser_base import JsResponse
-from base_pars_lib.webdriver_base_parser import WebDriverBaseParser
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from base_pars_lib import utils
+    from base_pars_lib.async_base_curl_cffi_parser import AsyncBaseCurlCffiParser
+    from base_pars_lib.async_base_parser import AiohttpResponse, AsyncBaseParser
+    from base_pars_lib.async_camoufox_base_parser import AsyncCamoufoxBaseParser
+    from base_pars_lib.async_nodriver_base_parser import AsyncNodriverBaseParser
+    from base_pars_lib.async_playwright_base_parser import AsyncPlaywrightBaseParser
+    from base_pars_lib.base_parser import BaseParser
+    from base_pars_lib.core.async_browsers_parser_base import JsResponse
+    from base_pars_lib.core.bad_urls import BadUrlInfo, BadUrls
+    from base_pars_lib.core.crawl_checkpoint import CrawlCheckpoint
+    from base_pars_lib.core.downloads import DownloadResult
+    from base_pars_lib.core.host_rate_limiter import HostRateLimiter
+    from base_pars_lib.core.metrics import HostMetrics, RequestHooks, RequestMetrics
+    from base_pars_lib.core.proxy_auth import AsyncProxyAuth
+    from base_pars_lib.core.proxy_pool import ProxyPool, ProxyStats
+    from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+    from base_pars_lib.core.session_affinity import SessionAffinity
+    from base_pars_lib.core.sharded_runner import ShardedRunner
+    from base_pars_lib.core.user_agents import UserAgentPool
+    from base_pars_lib.webdriver_base_parser import WebDriverBaseParser
+
+# Парсеры тянут тяжёлые зависимости (playwright, zendriver, selenium, curl_cffi, camoufox,
+# aiohttp), поэтому модули импортируются при первом обращении к имени, а не при import
+# base_pars_lib: скрипт, которому нужен только BaseParser, не загружает браузерные библиотеки
+_LAZY_IMPORTS = {
+    "utils": "base_pars_lib.utils",
+    "AsyncBaseCurlCffiParser": "base_pars_lib.async_base_curl_cffi_parser",
+    "AiohttpResponse": "base_pars_lib.async_base_parser",
+    "AsyncBaseParser": "base_pars_lib.async_base_parser",
+    "AsyncCamoufoxBaseParser": "base_pars_lib.async_camoufox_base_parser",
+    "AsyncNodriverBaseParser": "base_pars_lib.async_nodriver_base_parser",
+    "AsyncPlaywrightBaseParser": "base_pars_lib.async_playwright_base_parser",
+    "BaseParser": "base_pars_lib.base_parser",
+    "JsResponse": "base_pars_lib.core.async_browsers_parser_base",
+    "BadUrlInfo": "base_pars_lib.core.bad_urls",
+    "BadUrls": "base_pars_lib.core.bad_urls",
+    "CrawlCheckpoint": "base_pars_lib.core.crawl_checkpoint",
+    "DownloadResult": "base_pars_lib.core.downloads",
+    "HostRateLimiter": "base_pars_lib.core.host_rate_limiter",
+    "HostMetrics": "base_pars_lib.core.metrics",
+    "RequestHooks": "base_pars_lib.core.metrics",
+    "RequestMetrics": "base_pars_lib.core.metrics",
+    "AsyncProxyAuth": "base_pars_lib.core.proxy_auth",
+    "ProxyPool": "base_pars_lib.core.proxy_pool",
+    "ProxyStats": "base_pars_lib.core.proxy_pool",
+    "CachedResponse": "base_pars_lib.core.response_cache",
+    "ResponseCache": "base_pars_lib.core.response_cache",
+    "SessionAffinity": "base_pars_lib.core.session_affinity",
+    "ShardedRunner": "base_pars_lib.core.sharded_runner",
+    "UserAgentPool": "base_pars_lib.core.user_agents",
+    "WebDriverBaseParser": "base_pars_lib.webdriver_base_parser",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module = importlib.import_module(module_name)
+    value = module if module_name == f"{__name__}.{name}" else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,20 +1,51 @@
 import asyncio
 import random
-from typing import Callable
+import time
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from types import TracebackType
+from typing import Any, Callable, Self
 
 import curl_cffi
 import urllib3
-from curl_cffi.requests import AsyncSession
+from curl_cffi.const import CurlOpt
+from curl_cffi.requests import AsyncSession, Headers
 from curl_cffi.requests.models import Response
-from fake_useragent import UserAgent
 
 from base_pars_lib.config import logger
 from base_pars_lib.core.async_requests_parser_base import AsyncRequestsParserBase
+from base_pars_lib.core.downloads import (
+    DownloadProgress,
+    DownloadResult,
+    DownloadSink,
+    DownloadTarget,
+)
+from base_pars_lib.core.host_rate_limiter import HostRateLimiter
+from base_pars_lib.core.json_backends import get_json_loads
+from base_pars_lib.core.metrics import RequestHooks
+from base_pars_lib.core.proxy_auth import AsyncProxyAuth
+from base_pars_lib.core.proxy_pool import ProxyPool
+from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+from base_pars_lib.core.session_affinity import SessionAffinity
+from base_pars_lib.core.user_agents import get_user_agent_pool
 
 
 class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
     def __init__(
-        self, debug: bool = False, print_logs: bool = False, check_exceptions: bool = False
+        self,
+        debug: bool = False,
+        print_logs: bool = False,
+        check_exceptions: bool = False,
+        session_max_clients: int = 100,
+        pool_sessions_by_proxy: bool = False,
+        json_backend: str = "auto",
+        rate_limiter: HostRateLimiter | None = None,
+        session_affinity: SessionAffinity | None = None,
+        response_cache: ResponseCache | None = None,
+        single_flight: bool = False,
+        hooks: RequestHooks | None = None,
+        proxy_auth: AsyncProxyAuth | None = None,
     ) -> None:
         """
         :param debug: bool = False
@@ -26,10 +57,38 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             Позволяет посмотреть внутренние ошибки библиотеки, отключает все try/except конструкции,
             кроме тех, на которых завязана логика
             (например _calculate_random_cookies_headers_index)
+        :param session_max_clients: int = 100
+            Максимальное количество одновременных запросов через одну сессию из пула сессий
+        :param pool_sessions_by_proxy: bool = False
+            Если True, в пуле создаётся отдельная сессия для каждой пары (impersonate, прокси),
+            иначе - одна сессия на каждый impersonate
+        :param json_backend: str = "auto"
+            Библиотека для разбора json ответов в _response_json: "orjson", "msgspec" или "json".
+            Если "auto" - orjson или msgspec, если установлены, иначе стандартный json
+        :param rate_limiter: HostRateLimiter | None = None
+            Ограничение скорости и количества одновременных запросов для каждого хоста
+            (token bucket и AIMD по ответам 429, 5xx и ошибкам запросов), см. HostRateLimiter
+        :param session_affinity: SessionAffinity | None = None
+            Закрепление прокси, заголовков, кук и impersonate за хостом после успешного запроса,
+            см. SessionAffinity
+        :param response_cache: ResponseCache | None = None
+            Кэш ответов с TTL и условными запросами (ETag / Last-Modified), см. ResponseCache
+        :param single_flight: bool = False
+            Если True, одинаковые запросы (метод, ссылка, query-параметры и тело), которые
+            выполняются одновременно, отправляются один раз и получают один и тот же ответ
+        :param hooks: RequestHooks | None = None
+            Хуки событий запросов (начало и конец запроса, повтор, backoff, выбор прокси),
+            например RequestMetrics для счётчиков и гистограмм времени ответа по хостам
+        :param proxy_auth: AsyncProxyAuth | None = None
+            Авторизация в прокси (Basic или Digest), см. AsyncProxyAuth.
+            Ответ 407 обрабатывает libcurl
+
+        Пул сессий используется, только если он открыт через async with parser:
+        или _open_sessions_pool()
         """
 
         super().__init__()
-        self.user_agent = UserAgent()
+        self.user_agent = get_user_agent_pool()
 
         self.ignore_exceptions = (
             urllib3.exceptions.ProxyError,
@@ -43,10 +102,108 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         self.debug = debug
         self.print_logs = print_logs
 
+        self.json_loads = get_json_loads(json_backend)
+        self.rate_limiter = rate_limiter
+        self.session_affinity = session_affinity
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+        self.hooks = hooks or RequestHooks()
+        self.proxy_auth = proxy_auth
+
+        self.session_max_clients = session_max_clients
+        self.pool_sessions_by_proxy = pool_sessions_by_proxy
+        self.curl_cffi_sessions: dict[tuple, AsyncSession] | None = None
+
+    async def __aenter__(self) -> Self:
+        await self._open_sessions_pool()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self._close_sessions_pool()
+
+    async def _open_sessions_pool(self) -> None:
+        """
+        Открывает пул постоянных сессий curl-cffi
+        Пока пул открыт, все вызовы _make_backoff_request и _iter_backoff_requests
+        отправляют запросы через сессии из пула: одна сессия на каждый impersonate
+        (или на пару impersonate и прокси, если pool_sessions_by_proxy=True).
+        Сессии создаются при первом запросе с таким ключом и живут между вызовами,
+        поэтому соединения и curl-хэндлы переиспользуются, а разнообразие отпечатков сохраняется
+        """
+
+        if self.curl_cffi_sessions is None:
+            self.curl_cffi_sessions = {}
+
+    async def _close_sessions_pool(self) -> None:
+        """
+        Закрывает все сессии из пула
+        """
+
+        if self.curl_cffi_sessions is None:
+            return
+        sessions = list(self.curl_cffi_sessions.values())
+        self.curl_cffi_sessions = None
+        for session in sessions:
+            await session.close()
+
+    def __get_pooled_session(self, impersonate: str | None, proxies: dict | None) -> AsyncSession:
+        """
+        Возвращает сессию из пула для impersonate (и прокси), создаёт её при необходимости
+        """
+
+        proxy_key = None
+        if self.pool_sessions_by_proxy and proxies:
+            proxy_key = tuple(sorted(proxies.items()))
+        key = (impersonate, proxy_key)
+
+        session = self.curl_cffi_sessions.get(key)  # type: ignore[union-attr]
+        if session is None:
+            session = AsyncSession(
+                max_clients=self.session_max_clients,
+                impersonate=impersonate,  # type: ignore[arg-type]
+                curl_options=self.__get_curl_options(),
+            )
+            self.curl_cffi_sessions[key] = session  # type: ignore[index]
+        return session
+
+    @asynccontextmanager
+    async def __get_session(
+        self, max_clients: int, timeout: int, debug_curl_cffi: bool
+    ) -> AsyncIterator[AsyncSession | None]:
+        """
+        Если пул сессий открыт, отдаёт None - сессия будет выбрана из пула для каждого запроса.
+        Иначе открывает временную сессию на время вызова
+        """
+
+        if self.curl_cffi_sessions is not None:
+            yield None
+            return
+        async with AsyncSession(
+            max_clients=max_clients,
+            timeout=timeout,
+            debug=debug_curl_cffi,
+            curl_options=self.__get_curl_options(),
+        ) as session:
+            yield session
+
+    def __get_curl_options(self) -> dict | None:
+        """
+        Опции libcurl сессии: схемы авторизации в прокси, если задан proxy_auth
+        """
+
+        if self.proxy_auth is None:
+            return None
+        return {CurlOpt.PROXYAUTH: self.proxy_auth.curl_auth_mask}
+
     async def __fetch(
         self,
         url: str,
-        session: AsyncSession,
+        session: AsyncSession | None,
         params: dict,
         check_page: Callable,
         check_page_args: dict | None,
@@ -69,7 +226,7 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         :param url: str
             Ссылка на страницу
         :param session:
-            Сессия curl-cffi
+            Сессия curl-cffi. Если None, сессия берётся из пула сессий
         :param params:
             Параметры запроса из _make_backoff_request
         :param ignore_exceptions:
@@ -93,7 +250,7 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         :param long_wait_for_50x:
             Если True, применяет increase_by_minutes_for_50x_errors
         :param save_bad_urls: bool = False
-            Собирает ссылки, по которым ошибка или код не 200 в список self.bad_urls
+            Собирает ссылки, по которым ошибка или код не 200 в реестр self.bad_urls (BadUrls)
         :param random_sleep_time_every_request: list = False
             Список из 2-х чисел, рандомное между которыми - случайная задержка для каждого запроса
         :param impersonate: str | None = "random"
@@ -121,57 +278,195 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             если произошла ошибка из ignore_exceptions
         """
 
-        if random_sleep_time_every_request:
-            await asyncio.sleep(
-                random.uniform(
-                    random_sleep_time_every_request[0],  # type: ignore[index]
-                    random_sleep_time_every_request[1],  # type: ignore[index]
-                )
-            )
-        if impersonate == "random":
-            impersonate = await self.__get_random_impersonate()
-            if debug_impersonate:
-                logger.info_log(f"impersonate: {impersonate}", print_logs=self.print_logs)
+        await self._sleep_random_time(random_sleep_time_every_request)
+        impersonate = await self.__resolve_impersonate(impersonate, debug_impersonate)
 
-        if isinstance(params.get("proxies"), list):
+        if isinstance(params.get("proxies"), list | ProxyPool):
             proxies = params.get("proxies")
         else:
             proxies = None
 
-        iteration_for_50x = 1
         for i in range(1, iter_count + 1):
-            try:
-                if proxies is not None:
-                    params["proxies"] = random.choice(proxies)
-
-                response = await session.request(url=url, impersonate=impersonate, **params)  # type: ignore[arg-type]
-                is_cycle_end, response_ = await self._check_response(
-                    response=response,
-                    iteration=i,
+            is_cycle_end, response_ = await self.__fetch_attempt(
+                url=url,
+                session=session,
+                params=params,
+                proxies=proxies,
+                impersonate=impersonate,
+                iteration=i,
+                check_page=check_page,
+                check_page_args=check_page_args,
+                ignore_exceptions=ignore_exceptions,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+            )
+            if is_cycle_end:
+                return response_
+
+        return None
+
+    async def __fetch_attempt(
+        self,
+        url: str,
+        session: AsyncSession | None,
+        params: dict,
+        proxies: list | ProxyPool | None,
+        impersonate: str | None,
+        iteration: int,
+        check_page: Callable,
+        check_page_args: dict | None,
+        ignore_exceptions: tuple | str,
+        iter_count: int,
+        iter_count_for_50x_errors: int,
+        increase_by_seconds: int,
+        increase_by_minutes_for_50x_errors: int,
+        ignore_404: bool,
+        ignore_410: bool,
+        long_wait_for_50x: bool,
+        save_bad_urls: bool,
+    ) -> tuple[bool, Response | None]:
+        """
+        Одна попытка запроса из __fetch. Параметры из __fetch, proxies - список прокси,
+        из которого прокси выбирается на каждой попытке, iteration - номер попытки
+
+        :return:
+            Кортеж (завершать ли попытки, ответ)
+        """
+
+        pinned_params = self.session_affinity.get(url) if self.session_affinity else None
+        request_start = time.monotonic()
+        try:
+            if pinned_params is not None:
+                impersonate = pinned_params.pop("impersonate", impersonate)
+                params.update(pinned_params)
+            elif isinstance(proxies, ProxyPool):
+                params["proxies"] = proxies.choose()
+            elif proxies is not None:
+                params["proxies"] = random.choice(proxies)
+            if params.get("proxies") is not None:
+                self.hooks.on_proxy_chosen(url, params["proxies"])
+
+            cache_key = self._get_response_cache_key(url, params)
+            cached_response = await self._get_cached_response(cache_key)
+            if cached_response is not None and cached_response.is_fresh:
+                fresh_response = self.__forming_cached_response(cached_response)
+                if await self._check_page(fresh_response, check_page, check_page_args):
+                    return True, fresh_response
+                # check_page не принял страницу из кэша - удаляем её и отправляем запрос
+                await self._delete_cached_response(cache_key)
+                cached_response = None
+            request_params = params
+            if cached_response is not None:
+                request_params = {
+                    **params,
+                    "headers": {
+                        **(params.get("headers") or {}),
+                        **cached_response.conditional_headers(),
+                    },
+                }
+
+            request_session = session or self.__get_pooled_session(
+                impersonate, params.get("proxies")
+            )
+            async with self._host_slot(url) as host_slot:
+                if iteration > 1:
+                    self.hooks.on_retry(url, iteration)
+                self.hooks.on_request_start(url, iteration)
+                request_start = time.monotonic()
+                response = await request_session.request(
                     url=url,
-                    increase_by_seconds=i,
-                    iter_count=iter_count,
-                    save_bad_urls=save_bad_urls,
-                    ignore_404=ignore_404,
-                    ignore_410=ignore_410,
-                    long_wait_for_50x=long_wait_for_50x,
-                    iteration_for_50x=iteration_for_50x,
-                    iter_count_for_50x_errors=iter_count_for_50x_errors,
-                    increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
-                    check_page=check_page,
-                    check_page_args=check_page_args,
+                    impersonate=impersonate,  # type: ignore[arg-type]
+                    **request_params,
                 )
-                if is_cycle_end:
-                    return response_  # type: ignore[return-value]
-            except ignore_exceptions if not self.check_exceptions else () as Ex:
-                if self.debug:
-                    logger.backoff_exception(Ex, i, self.print_logs, url)
-                if save_bad_urls:
-                    await self._append_to_bad_urls(url)
-                await asyncio.sleep(i * increase_by_seconds)
-                continue
+                host_slot.status_code = response.status_code
+                self.hooks.on_request_end(
+                    url,
+                    response.status_code,
+                    time.monotonic() - request_start,
+                    len(response.content),
+                )
+                if isinstance(proxies, ProxyPool):
+                    proxies.report_response(
+                        params["proxies"], response.status_code, time.monotonic() - request_start
+                    )
 
-        return None
+            is_from_cache = (
+                cached_response is not None and response.status_code == HTTPStatus.NOT_MODIFIED
+            )
+            if is_from_cache:
+                # Страница не изменилась - берём её из кэша
+                response = self.__forming_cached_response(
+                    cached_response  # type: ignore[arg-type]
+                )
+            is_cycle_end, response_ = await self._check_response(
+                response=response,
+                iteration=iteration,
+                url=url,
+                increase_by_seconds=iteration,
+                iter_count=iter_count,
+                save_bad_urls=save_bad_urls,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                iteration_for_50x=1,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                check_page=check_page,
+                check_page_args=check_page_args,
+            )
+            await self._update_response_cache(
+                cache_key,
+                response,
+                dict(response.headers) if cache_key else {},
+                self._is_response_accepted(
+                    response, is_cycle_end, iteration, iter_count, check_page
+                ),
+                is_from_cache,
+            )
+            self._update_session_affinity(
+                url,
+                is_cycle_end and response.status_code == HTTPStatus.OK,
+                proxies=params.get("proxies"),
+                headers=params.get("headers"),
+                cookies=params.get("cookies"),
+                impersonate=impersonate,
+            )
+            return is_cycle_end, response_  # type: ignore[return-value]
+        except ignore_exceptions if not self.check_exceptions else () as Ex:
+            self.hooks.on_request_end(url, None, time.monotonic() - request_start, exception=Ex)
+            self._update_session_affinity(url, False)
+            if isinstance(proxies, ProxyPool):
+                proxies.report_failure(params["proxies"])
+            if self.debug:
+                logger.backoff_exception(Ex, iteration, self.print_logs, url)
+            if save_bad_urls:
+                await self._append_to_bad_urls(url, exception=Ex)
+            await self._backoff_sleep(iteration * increase_by_seconds, url)
+            return False, None
+
+    @staticmethod
+    def __forming_cached_response(cached_response: CachedResponse) -> Response:
+        response = Response()
+        response.url = cached_response.url
+        response.status_code = cached_response.status_code
+        response.content = cached_response.content
+        response.headers = Headers(cached_response.headers)
+        return response
+
+    async def __resolve_impersonate(
+        self, impersonate: str | None, debug_impersonate: bool
+    ) -> str | None:
+        if impersonate == "random":
+            impersonate = await self.__get_random_impersonate()
+            if debug_impersonate:
+                logger.info_log(f"impersonate: {impersonate}", print_logs=self.print_logs)
+        return impersonate
 
     async def _make_backoff_request(
         self,
@@ -183,7 +478,7 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         increase_by_minutes_for_50x_errors: int = 20,
         verify: bool = True,
         with_random_useragent: bool = True,
-        proxies: list[dict] | dict | None = None,
+        proxies: list[dict] | dict | ProxyPool | None = None,
         headers: dict | list | None = None,
         cookies: dict | list | None = None,
         data: list[dict | None] | dict | None = None,
@@ -203,6 +498,8 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         check_page: Callable = None,  # type: ignore[assignment]
         check_page_args: dict | None = None,
         debug_impersonate: bool = False,
+        max_concurrency: int | None = None,
+        defer_retries: bool = False,
     ) -> tuple[Response | None]:
         """
         Если код ответа не 200 или произошла ошибка из ignore_exceptions, отправляет запрос повторно
@@ -226,8 +523,9 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             Проверка безопасности сайта
         :param with_random_useragent: bool = True
             Случайный юзер-агент
-        :param proxies: list[dict] | dict | None = None
-            Прокси
+        :param proxies: list[dict] | dict | ProxyPool | None = None
+            Прокси. Если передан ProxyPool, прокси на каждой попытке выбирается по его
+            статистике, а результат попытки записывается в пул
         :param headers: dict | list = None
             Заголовки запроса, возможно передать в виде списка,
             тогда выберутся рандомно
@@ -251,7 +549,7 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         :param long_wait_for_50x: bool = False
             Если True, применяет increase_by_minutes_for_50x_errors
         :param save_bad_urls: bool = False
-            Собирает ссылки, по которым ошибка или код не 200 в список self.bad_urls
+            Собирает ссылки, по которым ошибка или код не 200 в реестр self.bad_urls (BadUrls)
         :param timeout : int = 30
             Время максимального ожидания ответа
         :param random_sleep_time_every_request: list = False
@@ -285,6 +583,17 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             Дополнительные параметры для check_page, если требуются
         :param debug_impersonate: bool = False
             Выводить impersonate в консоль
+        :param max_concurrency: int | None = None
+            Максимальное количество одновременно выполняемых запросов.
+            Если передано, запросы выполняет фиксированное количество воркеров, а параметры
+            запросов формируются только перед отправкой, поэтому потребление памяти
+            не зависит от длины списка ссылок. Порядок ответов совпадает с порядком ссылок.
+            Если None, все запросы отправляются одновременно. Если меньше 1 - ValueError
+        :param defer_retries: bool = False
+            Если True, запрос, который нужно повторить, не ждёт задержку backoff на своём месте,
+            а откладывается в очередь до времени следующей попытки. Освободившееся место
+            (из max_concurrency) сразу занимает следующий запрос, поэтому медленные
+            повторы не снижают скорость обхода остальных ссылок
 
         :return:
             Возвращает список ответов от сайта.
@@ -294,73 +603,449 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         if ignore_exceptions == "default":
             ignore_exceptions = self.ignore_exceptions
 
-        async with AsyncSession(
-            max_clients=len(urls), timeout=timeout, debug=debug_curl_cffi
+        async with self.__get_session(
+            max_clients=max_concurrency or len(urls),
+            timeout=timeout,
+            debug_curl_cffi=debug_curl_cffi,
         ) as session:
-            tasks = []
+            tasks_count, make_task, make_attempt = await self.__make_fetch_task_factory(
+                session=session,
+                urls=urls,
+                timeout=timeout,
+                method=method,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=headers,
+                cookies=cookies,
+                data=data,
+                json=json,
+                ignore_exceptions=ignore_exceptions,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+                random_sleep_time_every_request=random_sleep_time_every_request,
+                params=params,
+                impersonate=impersonate,
+                match_headers_to_urls=match_headers_to_urls,
+                match_cookies_to_urls=match_cookies_to_urls,
+                check_page=check_page,
+                check_page_args=check_page_args,
+                debug_impersonate=debug_impersonate,
+            )
+            if defer_retries:
+                return await self._gather_with_retry_queue(  # type: ignore[return-value]
+                    tasks_count, make_attempt, max_concurrency
+                )
+            return await self._gather_in_pool(  # type: ignore[return-value]
+                tasks_count, make_task, max_concurrency
+            )
+
+    async def _iter_backoff_requests(
+        self,
+        urls: list,
+        method: str = "GET",
+        iter_count: int = 10,
+        iter_count_for_50x_errors: int = 3,
+        increase_by_seconds: int = 10,
+        increase_by_minutes_for_50x_errors: int = 20,
+        verify: bool = True,
+        with_random_useragent: bool = True,
+        proxies: list[dict] | dict | ProxyPool | None = None,
+        headers: dict | list | None = None,
+        cookies: dict | list | None = None,
+        data: list[dict | None] | dict | None = None,
+        json: list[dict | None] | dict | None = None,
+        ignore_exceptions: tuple | str = "default",
+        ignore_404: bool = False,
+        ignore_410: bool = False,
+        long_wait_for_50x: bool = False,
+        save_bad_urls: bool = False,
+        timeout: int = 30,
+        random_sleep_time_every_request: list | bool = False,
+        params: dict | None = None,
+        impersonate: str | None = "random",
+        debug_curl_cffi: bool = False,
+        match_headers_to_urls: bool = False,
+        match_cookies_to_urls: bool = False,
+        check_page: Callable = None,  # type: ignore[assignment]
+        check_page_args: dict | None = None,
+        debug_impersonate: bool = False,
+        max_concurrency: int | None = None,
+        defer_retries: bool = False,
+    ) -> AsyncIterator[tuple[int, str, Response | None]]:
+        """
+        То же самое, что и _make_backoff_request, но не ждёт завершения всех запросов,
+        а отдаёт ответы по мере их получения. Это позволяет обрабатывать ответы параллельно
+        с отправкой запросов и не хранить в памяти ответы по всем ссылкам сразу
+
+        Параметры совпадают с параметрами _make_backoff_request
+
+        :return:
+            Асинхронный итератор кортежей (index, url, response), где index - номер запроса
+            (порядок, в котором запросы были бы возвращены из _make_backoff_request),
+            url - ссылка, response - ответ от сайта или None
+        """
+
+        if ignore_exceptions == "default":
+            ignore_exceptions = self.ignore_exceptions
 
-            url_count, max_requests, data_list, json_list = await self._prepare_request_data(
-                urls=urls, data=data, json=json
+        async with self.__get_session(
+            max_clients=max_concurrency or len(urls),
+            timeout=timeout,
+            debug_curl_cffi=debug_curl_cffi,
+        ) as session:
+            tasks_count, make_task, make_attempt = await self.__make_fetch_task_factory(
+                session=session,
+                urls=urls,
+                timeout=timeout,
+                method=method,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=headers,
+                cookies=cookies,
+                data=data,
+                json=json,
+                ignore_exceptions=ignore_exceptions,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+                random_sleep_time_every_request=random_sleep_time_every_request,
+                params=params,
+                impersonate=impersonate,
+                match_headers_to_urls=match_headers_to_urls,
+                match_cookies_to_urls=match_cookies_to_urls,
+                check_page=check_page,
+                check_page_args=check_page_args,
+                debug_impersonate=debug_impersonate,
             )
+            if defer_retries:
+                responses = self._iter_with_retry_queue(tasks_count, make_attempt, max_concurrency)
+            else:
+                responses = self._iter_in_pool(tasks_count, make_task, max_concurrency)
+            async for index, response in responses:
+                yield index, urls[index % len(urls)], response
 
-            for i in range(max_requests):
-                url = urls[i % url_count]
-                current_headers = self._select_value(
-                    headers, match_headers_to_urls, i, max_requests
-                )
-                current_cookies = self._select_value(
-                    cookies, match_cookies_to_urls, i, max_requests
-                )
-                request_data = data_list[i] if i < len(data_list) else None
-                request_json = json_list[i] if i < len(json_list) else None
-
-                request_params = await self.__get_request_params(
-                    method=method,
-                    verify=verify,
-                    with_random_useragent=with_random_useragent,
-                    proxies=proxies,
-                    headers=current_headers,
-                    cookies=current_cookies,
-                    data=request_data,
-                    json=request_json,
-                    params=params,
-                )
+    async def _download(
+        self,
+        url: str,
+        path: str | None = None,
+        sink: DownloadSink | None = None,
+        resume: bool = True,
+        progress: DownloadProgress | None = None,
+        method: str = "GET",
+        iter_count: int = 10,
+        increase_by_seconds: int = 10,
+        verify: bool = True,
+        with_random_useragent: bool = True,
+        proxies: list[dict] | dict | ProxyPool | None = None,
+        headers: dict | list | None = None,
+        cookies: dict | list | None = None,
+        params: dict | None = None,
+        ignore_exceptions: tuple | str = "default",
+        save_bad_urls: bool = False,
+        timeout: int = 30,
+        impersonate: str | None = "random",
+        debug_curl_cffi: bool = False,
+        debug_impersonate: bool = False,
+    ) -> DownloadResult | None:
+        """
+        Скачивает тело ответа по частям в файл path или в функцию sink, не загружая его
+        в память целиком. После обрыва соединения или ошибки из ignore_exceptions загрузка
+        продолжается с места обрыва (заголовок Range), задержка между попытками увеличивается
+
+        :param url: str
+            Ссылка
+        :param path: str | None = None
+            Путь к файлу для записи тела
+        :param sink: DownloadSink | None = None
+            Функция (обычная или асинхронная), которая получает тело по частям,
+            если path не передан
+        :param resume: bool = True
+            Если файл path уже существует - докачать его с конца (Range), иначе перезаписать
+        :param progress: DownloadProgress | None = None
+            Функция progress(скачано байт, размер тела или None), вызывается после каждой части
+        :param timeout: int = 30
+            Время максимального ожидания соединения и каждой части тела
+            (а не всей загрузки, как в _make_backoff_request)
+
+        Остальные параметры такие же, как в _make_backoff_request
+
+        :return: DownloadResult | None
+            Результат загрузки или None, если все попытки завершились ошибкой
+        """
 
-                tasks.append(
-                    self.__fetch(
-                        session=session,
-                        url=url,
-                        params=request_params,
-                        ignore_exceptions=ignore_exceptions,
-                        iter_count=iter_count,
-                        iter_count_for_50x_errors=iter_count_for_50x_errors,
-                        increase_by_seconds=increase_by_seconds,
-                        increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
-                        ignore_404=ignore_404,
-                        ignore_410=ignore_410,
-                        long_wait_for_50x=long_wait_for_50x,
-                        save_bad_urls=save_bad_urls,
-                        random_sleep_time_every_request=random_sleep_time_every_request,
-                        impersonate=impersonate,
-                        check_page=check_page,
-                        check_page_args=check_page_args,
-                        debug_impersonate=debug_impersonate,
+        if ignore_exceptions == "default":
+            # Обрыв соединения во время чтения тела - повод докачать, а не ошибка
+            ignore_exceptions = (
+                *self.ignore_exceptions,
+                curl_cffi.requests.exceptions.ChunkedEncodingError,
+                curl_cffi.requests.exceptions.IncompleteRead,
+            )
+
+        target = DownloadTarget(path=path, sink=sink, resume=resume, progress=progress)
+        try:
+            async with self.__get_session(
+                max_clients=1, timeout=timeout, debug_curl_cffi=debug_curl_cffi
+            ) as session:
+                for iteration in range(1, iter_count + 1):
+                    request_params = await self.__get_request_params(
+                        method=method,
+                        verify=verify,
+                        with_random_useragent=with_random_useragent,
+                        proxies=proxies,
+                        headers=headers,
+                        cookies=cookies,
+                        data=None,
+                        json=None,
+                        params=params,
                     )
-                )
+                    # Время ожидания соединения и чтения, а не всего запроса
+                    request_params["timeout"] = (timeout, timeout)
+                    if isinstance(proxies, ProxyPool):
+                        request_params["proxies"] = proxies.choose()
+                    elif isinstance(proxies, list):
+                        request_params["proxies"] = random.choice(proxies)
+                    if request_params.get("proxies") is not None:
+                        self.hooks.on_proxy_chosen(url, request_params["proxies"])
+                    request_params["headers"] = {
+                        **request_params["headers"],
+                        **target.get_range_headers(),
+                    }
+                    request_impersonate = await self.__resolve_impersonate(
+                        impersonate, debug_impersonate
+                    )
+                    request_session = session or self.__get_pooled_session(
+                        request_impersonate, request_params.get("proxies")
+                    )
+
+                    offset = target.offset
+                    try:
+                        async with self._host_slot(url) as host_slot:
+                            if iteration > 1:
+                                self.hooks.on_retry(url, iteration)
+                            self.hooks.on_request_start(url, iteration)
+                            request_start = time.monotonic()
+                            response = await request_session.request(
+                                url=url,
+                                impersonate=request_impersonate,  # type: ignore[arg-type]
+                                stream=True,
+                                **request_params,
+                            )
+                            try:
+                                host_slot.status_code = response.status_code
+                                if isinstance(proxies, ProxyPool):
+                                    proxies.report_response(
+                                        request_params["proxies"], response.status_code
+                                    )
+                                if (
+                                    response.status_code
+                                    == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+                                    and target.offset
+                                ):
+                                    self.hooks.on_request_end(
+                                        url, response.status_code, time.monotonic() - request_start
+                                    )
+                                    return target.get_result(url, response.status_code)
+                                if response.status_code in (
+                                    HTTPStatus.OK,
+                                    HTTPStatus.PARTIAL_CONTENT,
+                                ):
+                                    target.start(response.status_code, response.headers)
+                                    async for chunk in response.aiter_content():
+                                        await target.write(chunk)
+                                    self.hooks.on_request_end(
+                                        url,
+                                        response.status_code,
+                                        time.monotonic() - request_start,
+                                        target.offset - offset,
+                                    )
+                                    if save_bad_urls:
+                                        await self._delete_from_bad_urls(url)
+                                    return target.get_result(url, response.status_code)
+                                self.hooks.on_request_end(
+                                    url, response.status_code, time.monotonic() - request_start
+                                )
+                            finally:
+                                await response.aclose()
+
+                        if self.debug:
+                            logger.backoff_status_code(
+                                response.status_code, iteration, url, self.print_logs
+                            )
+                        if save_bad_urls:
+                            await self._append_to_bad_urls(url, status_code=response.status_code)
+                    except ignore_exceptions if not self.check_exceptions else () as Ex:
+                        self.hooks.on_request_end(
+                            url,
+                            None,
+                            time.monotonic() - request_start,
+                            target.offset - offset,
+                            exception=Ex,
+                        )
+                        if isinstance(proxies, ProxyPool):
+                            proxies.report_failure(request_params["proxies"])
+                        if self.debug:
+                            logger.backoff_exception(Ex, iteration, self.print_logs, url)
+                        if save_bad_urls:
+                            await self._append_to_bad_urls(url, exception=Ex)
+                    if iteration < iter_count:
+                        await self._backoff_sleep(iteration * increase_by_seconds, url)
+        finally:
+            target.close()
+        return None
+
+    async def __make_fetch_task_factory(
+        self,
+        session: AsyncSession | None,
+        urls: list,
+        timeout: int,
+        method: str,
+        iter_count: int,
+        iter_count_for_50x_errors: int,
+        increase_by_seconds: int,
+        increase_by_minutes_for_50x_errors: int,
+        verify: bool,
+        with_random_useragent: bool,
+        proxies: list[dict] | dict | ProxyPool | None,
+        headers: dict | list | None,
+        cookies: dict | list | None,
+        data: list[dict | None] | dict | None,
+        json: list[dict | None] | dict | None,
+        ignore_exceptions: tuple | str,
+        ignore_404: bool,
+        ignore_410: bool,
+        long_wait_for_50x: bool,
+        save_bad_urls: bool,
+        random_sleep_time_every_request: list | bool,
+        params: dict | None,
+        impersonate: str | None,
+        match_headers_to_urls: bool,
+        match_cookies_to_urls: bool,
+        check_page: Callable,
+        check_page_args: dict | None,
+        debug_impersonate: bool,
+    ) -> tuple[
+        int,
+        Callable[[int], Awaitable[Response | None]],
+        Callable[[int, int], Awaitable[tuple[bool, Response | None, float]]],
+    ]:
+        """
+        Возвращает количество запросов и функции, которые по индексу запроса формируют
+        его параметры и создают корутину __fetch (все попытки запроса) или одной попытки
+        для планировщика повторов. Параметры из _make_backoff_request
+
+        :return:
+            Кортеж (количество запросов, функция создания корутины запроса по индексу,
+            функция создания корутины попытки по индексу и номеру попытки)
+        """
+
+        url_count, max_requests, data_list, json_list = await self._prepare_request_data(
+            urls=urls, data=data, json=json
+        )
+
+        async def make_request_params(i: int) -> tuple[str, dict]:
+            current_headers = self._select_value(headers, match_headers_to_urls, i, max_requests)
+            current_cookies = self._select_value(cookies, match_cookies_to_urls, i, max_requests)
+            request_data = data_list[i] if i < len(data_list) else None
+            request_json = json_list[i] if i < len(json_list) else None
+
+            request_params = await self.__get_request_params(
+                method=method,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=current_headers,
+                cookies=current_cookies,
+                data=request_data,
+                json=request_json,
+                params=params,
+                timeout=timeout,
+            )
+            return urls[i % url_count], request_params
+
+        fetch_params: dict[str, Any] = {
+            "ignore_exceptions": ignore_exceptions,
+            "iter_count": iter_count,
+            "iter_count_for_50x_errors": iter_count_for_50x_errors,
+            "increase_by_seconds": increase_by_seconds,
+            "increase_by_minutes_for_50x_errors": increase_by_minutes_for_50x_errors,
+            "ignore_404": ignore_404,
+            "ignore_410": ignore_410,
+            "long_wait_for_50x": long_wait_for_50x,
+            "save_bad_urls": save_bad_urls,
+            "check_page": check_page,
+            "check_page_args": check_page_args,
+        }
 
-            return await asyncio.gather(*tasks)  # type: ignore[return-value]
+        async def make_task(i: int) -> Response | None:
+            url, request_params = await make_request_params(i)
+            return await self._single_flight(
+                self._get_request_key(url, request_params),
+                lambda: self.__fetch(
+                    session=session,
+                    url=url,
+                    params=request_params,
+                    random_sleep_time_every_request=random_sleep_time_every_request,
+                    impersonate=impersonate,
+                    debug_impersonate=debug_impersonate,
+                    **fetch_params,
+                ),
+            )
+
+        async def prepare_attempts(
+            i: int,
+        ) -> tuple[str, tuple[str, dict, list | ProxyPool | None, str | None]]:
+            url, request_params = await make_request_params(i)
+            await self._sleep_random_time(random_sleep_time_every_request)
+            request_proxies = request_params.get("proxies")
+            return self._get_request_key(url, request_params), (
+                url,
+                request_params,
+                request_proxies if isinstance(request_proxies, list | ProxyPool) else None,
+                await self.__resolve_impersonate(impersonate, debug_impersonate),
+            )
+
+        def run_attempt(
+            attempt_params: tuple[str, dict, list | ProxyPool | None, str | None], attempt: int
+        ) -> Awaitable[tuple[bool, Response | None]]:
+            url, request_params, request_proxies, request_impersonate = attempt_params
+            return self.__fetch_attempt(
+                session=session,
+                url=url,
+                params=request_params,
+                proxies=request_proxies,
+                impersonate=request_impersonate,
+                iteration=attempt,
+                **fetch_params,
+            )
+
+        make_attempt = self._single_flight_attempts(prepare_attempts, run_attempt, iter_count)
+        return max_requests, make_task, make_attempt
 
     async def __get_request_params(
         self,
         method: str,
         verify: bool,
         with_random_useragent: bool,
-        proxies: list[dict] | dict | None,
+        proxies: list[dict] | dict | ProxyPool | None,
         headers: dict | list | None,
         cookies: dict | list | None,
         data: dict | None,
         json: dict | None,
         params: dict | None = None,
+        timeout: int | None = None,
     ) -> dict:
         """
         Возвращает словарь параметров для запроса через requests
@@ -371,7 +1056,7 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             Проверка безопасности сайта
         :param with_random_useragent: bool
             Использование рандомного юзерагента
-        :param proxies: list[str] | dict | None
+        :param proxies: list[str] | dict | ProxyPool | None
             Прокси
         :param headers: dict | list
             Заголовки запроса, возможно передать в виде списка,
@@ -385,6 +1070,8 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
             Данные запроса
         :param params: dict | None = None
             Словарь параметров запроса
+        :param timeout: int | None = None
+            Время максимального ожидания ответа
         :return:
         """
 
@@ -394,7 +1081,8 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
         random_index = await self._calculate_random_cookies_headers_index(
             cookies=cookies, headers=headers
         )
-        headers = await self._get_by_random_index(headers, random_index, "Headers")
+        # Копия, чтобы User-Agent не записывался в словарь вызывающего кода
+        headers = dict(await self._get_by_random_index(headers, random_index, "Headers"))
         cookies = await self._get_by_random_index(cookies, random_index, "Cookies")
 
         if with_random_useragent:
@@ -411,8 +1099,12 @@ class AsyncBaseCurlCffiParser(AsyncRequestsParserBase):
 
         if proxies is not None:
             request_params["proxies"] = proxies
+            if self.proxy_auth is not None:
+                request_params["proxy_auth"] = (self.proxy_auth.login, self.proxy_auth.password)
         if params:
             request_params["params"] = params
+        if timeout is not None:
+            request_params["timeout"] = timeout
 
         return request_params
 
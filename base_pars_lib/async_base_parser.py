@@ -1,18 +1,50 @@
 import asyncio
 import random
-from typing import Any, Callable
+import time
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from types import TracebackType
+from typing import Any, Callable, Self
 
 import aiohttp
 import urllib3
-from fake_useragent import UserAgent
 
 from base_pars_lib.config import logger
 from base_pars_lib.core.async_requests_parser_base import AiohttpResponse, AsyncRequestsParserBase
+from base_pars_lib.core.downloads import (
+    DownloadProgress,
+    DownloadResult,
+    DownloadSink,
+    DownloadTarget,
+)
+from base_pars_lib.core.host_rate_limiter import HostRateLimiter
+from base_pars_lib.core.json_backends import get_json_loads
+from base_pars_lib.core.metrics import RequestHooks
+from base_pars_lib.core.proxy_auth import AsyncProxyAuth
+from base_pars_lib.core.proxy_pool import ProxyPool
+from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+from base_pars_lib.core.session_affinity import SessionAffinity
+from base_pars_lib.core.user_agents import get_user_agent_pool
 
 
 class AsyncBaseParser(AsyncRequestsParserBase):
     def __init__(
-        self, debug: bool = False, print_logs: bool = False, check_exceptions: bool = False
+        self,
+        debug: bool = False,
+        print_logs: bool = False,
+        check_exceptions: bool = False,
+        connector_limit: int = 100,
+        connector_limit_per_host: int = 0,
+        ttl_dns_cache: int | None = 10,
+        keepalive_timeout: float = 15,
+        json_backend: str = "auto",
+        rate_limiter: HostRateLimiter | None = None,
+        session_affinity: SessionAffinity | None = None,
+        response_cache: ResponseCache | None = None,
+        single_flight: bool = False,
+        hooks: RequestHooks | None = None,
+        proxy_auth: AsyncProxyAuth | None = None,
     ) -> None:
         """
         :param debug: bool = False
@@ -24,11 +56,42 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             Позволяет посмотреть внутренние ошибки библиотеки, отключает все try/except конструкции,
             кроме тех, на которых завязана логика
             (например _calculate_random_cookies_headers_index)
+        :param connector_limit: int = 100
+            Максимальное количество открытых соединений постоянной сессии (0 - без ограничений)
+        :param connector_limit_per_host: int = 0
+            Максимальное количество открытых соединений к одному хосту (0 - без ограничений)
+        :param ttl_dns_cache: int | None = 10
+            Время жизни DNS-кэша в секундах, None - кэшировать без ограничения по времени
+        :param keepalive_timeout: float = 15
+            Сколько секунд держать неиспользуемое keep-alive соединение открытым
+        :param json_backend: str = "auto"
+            Библиотека для разбора json ответов: "orjson", "msgspec" или "json".
+            Если "auto" - orjson или msgspec, если установлены, иначе стандартный json
+        :param rate_limiter: HostRateLimiter | None = None
+            Ограничение скорости и количества одновременных запросов для каждого хоста
+            (token bucket и AIMD по ответам 429, 5xx и ошибкам запросов), см. HostRateLimiter
+        :param session_affinity: SessionAffinity | None = None
+            Закрепление прокси, заголовков, кук за хостом после успешного запроса,
+            см. SessionAffinity
+        :param response_cache: ResponseCache | None = None
+            Кэш ответов с TTL и условными запросами (ETag / Last-Modified), см. ResponseCache.
+            Не используется с get_raw_aiohttp_response_content
+        :param single_flight: bool = False
+            Если True, одинаковые запросы (метод, ссылка, query-параметры и тело), которые
+            выполняются одновременно, отправляются один раз и получают один и тот же ответ
+        :param hooks: RequestHooks | None = None
+            Хуки событий запросов (начало и конец запроса, повтор, backoff, выбор прокси),
+            например RequestMetrics для счётчиков и гистограмм времени ответа по хостам
+        :param proxy_auth: AsyncProxyAuth | None = None
+            Авторизация в прокси (Basic или Digest по ответу 407), см. AsyncProxyAuth
+
+        Параметры connector_* используются только постоянной сессией, которая открывается
+        через async with parser: или _open_session()
         """
 
         super().__init__()
 
-        self.user_agent = UserAgent()
+        self.user_agent = get_user_agent_pool()
 
         self.ignore_exceptions = (
             urllib3.exceptions.ProxyError,
@@ -44,9 +107,137 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         self.debug = debug
         self.print_logs = print_logs
 
-        self.bad_urls: list = []
+        self.json_loads = get_json_loads(json_backend)
+        self.rate_limiter = rate_limiter
+        self.session_affinity = session_affinity
+        self.response_cache = response_cache
+        self.single_flight = single_flight
+        self.hooks = hooks or RequestHooks()
+        self.proxy_auth = proxy_auth
+
+        self.connector_params: dict = {
+            "limit": connector_limit,
+            "limit_per_host": connector_limit_per_host,
+            "ttl_dns_cache": ttl_dns_cache,
+            "keepalive_timeout": keepalive_timeout,
+        }
+        self.aiohttp_session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> Self:
+        await self._open_session()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self._close_session()
+
+    async def _open_session(self) -> aiohttp.ClientSession:
+        """
+        Открывает постоянную сессию aiohttp с TCPConnector, настроенным параметрами connector_*
+        Пока сессия открыта, все вызовы _make_backoff_request и _iter_backoff_requests
+        используют её, поэтому соединения, DNS-кэш и keep-alive сокеты переиспользуются
+        между вызовами
+
+        :return:
+            Открытая сессия aiohttp
+        """
+
+        if self.aiohttp_session is None or self.aiohttp_session.closed:
+            self.aiohttp_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(**self.connector_params)
+            )
+        return self.aiohttp_session
+
+    async def _close_session(self) -> None:
+        """
+        Закрывает постоянную сессию aiohttp, если она открыта
+        """
+
+        if self.aiohttp_session is not None and not self.aiohttp_session.closed:
+            await self.aiohttp_session.close()
+        self.aiohttp_session = None
+
+    @asynccontextmanager
+    async def __get_session(self, timeout: int) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        Отдаёт постоянную сессию, если она открыта, иначе - временную сессию на время вызова
+        """
+
+        if self.aiohttp_session is not None and not self.aiohttp_session.closed:
+            yield self.aiohttp_session
+            return
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            yield session
+
+    @asynccontextmanager
+    async def __request(
+        self, session: aiohttp.ClientSession, url: str, params: dict
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """
+        session.request с авторизацией в прокси self.proxy_auth. Если прокси ответил 407,
+        вызов запоминается в proxy_auth и запрос сразу повторяется с Proxy-Authorization
+        """
 
-    async def __fetch(  # type: ignore[return]
+        proxy = params.get("proxy")
+        if self.proxy_auth is None or not isinstance(proxy, str):
+            async with session.request(url=url, **params) as response:
+                yield response
+            return
+
+        async with self.proxy_auth.challenge_lock(proxy):
+            response = await self.__send_with_proxy_auth(session, url, params, proxy)
+        async with response:
+            yield response
+
+    async def __send_with_proxy_auth(
+        self, session: aiohttp.ClientSession, url: str, params: dict, proxy: str
+    ) -> aiohttp.ClientResponse:
+        proxy_auth: AsyncProxyAuth = self.proxy_auth  # type: ignore[assignment]
+        is_retry = False
+        while True:
+            request_params = dict(params)
+            auth_headers = proxy_auth.get_headers(proxy, params.get("method", "GET"), url)
+            if proxy_auth.is_tunnel(url):
+                # Для https заголовок отправляется в CONNECT
+                request_params["proxy_headers"] = {
+                    **(params.get("proxy_headers") or {}),
+                    **auth_headers,
+                }
+            else:
+                request_params["headers"] = {**(params.get("headers") or {}), **auth_headers}
+
+            try:
+                response = await session.request(url=url, **request_params)
+            except aiohttp.ClientHttpProxyError as Ex:
+                authenticate = Ex.headers.getall("Proxy-Authenticate", []) if Ex.headers else []
+                if (
+                    is_retry
+                    or Ex.status != HTTPStatus.PROXY_AUTHENTICATION_REQUIRED
+                    or not proxy_auth.handle_challenge(proxy, authenticate)
+                ):
+                    raise
+                is_retry = True
+                continue
+
+            if (
+                not is_retry
+                and response.status == HTTPStatus.PROXY_AUTHENTICATION_REQUIRED
+                and proxy_auth.handle_challenge(
+                    proxy, response.headers.getall("Proxy-Authenticate", [])
+                )
+            ):
+                response.release()
+                is_retry = True
+                continue
+            if response.status != HTTPStatus.PROXY_AUTHENTICATION_REQUIRED:
+                proxy_auth.handle_no_challenge(proxy)
+            return response
+
+    async def __fetch(
         self,
         url: str,
         session: aiohttp.ClientSession,
@@ -95,7 +286,7 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         :param long_wait_for_50x:
             Если True, применяет increase_by_minutes_for_50x_errors
         :param save_bad_urls: bool = False
-            Собирает ссылки, по которым ошибка или код не 200 в список self.bad_urls
+            Собирает ссылки, по которым ошибка или код не 200 в реестр self.bad_urls (BadUrls)
         :param random_sleep_time_every_request: list = False
             Список из 2-х чисел, рандомное между которыми - случайная задержка для каждого запроса
         :param get_raw_aiohttp_response_content: bool = False
@@ -118,58 +309,193 @@ class AsyncBaseParser(AsyncRequestsParserBase):
                 json: dict | None
                 url: str
                 status: int
+                content: bytes
+            text и json декодируются из content при первом обращении и кэшируются
         """
 
-        if random_sleep_time_every_request:
-            await asyncio.sleep(
-                random.uniform(
-                    random_sleep_time_every_request[0],  # type: ignore[index]
-                    random_sleep_time_every_request[1],  # type: ignore[index]
-                )
-            )
+        await self._sleep_random_time(random_sleep_time_every_request)
 
-        if isinstance(params.get("proxy", None), list):
+        if isinstance(params.get("proxy", None), list | ProxyPool):
             proxies = params.get("proxy")
         else:
             proxies = None
 
-        iteration_for_50x = 1
         for i in range(1, iter_count + 1):
-            try:
-                if proxies is not None:
-                    params["proxy"] = random.choice(proxies)
+            is_cycle_end, response_ = await self.__fetch_attempt(
+                url=url,
+                session=session,
+                params=params,
+                proxies=proxies,
+                iteration=i,
+                check_page=check_page,
+                check_page_args=check_page_args,
+                ignore_exceptions=ignore_exceptions,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+                get_raw_aiohttp_response_content=get_raw_aiohttp_response_content,
+            )
+            if is_cycle_end:
+                return response_
+
+        return None
 
-                async with session.request(url=url, **params) as response:
+    async def __fetch_attempt(
+        self,
+        url: str,
+        session: aiohttp.ClientSession,
+        params: dict,
+        proxies: list | ProxyPool | None,
+        iteration: int,
+        check_page: Callable,
+        check_page_args: dict | None,
+        ignore_exceptions: tuple | str,
+        iter_count: int,
+        iter_count_for_50x_errors: int,
+        increase_by_seconds: int,
+        increase_by_minutes_for_50x_errors: int,
+        ignore_404: bool,
+        ignore_410: bool,
+        long_wait_for_50x: bool,
+        save_bad_urls: bool,
+        get_raw_aiohttp_response_content: bool,
+    ) -> tuple[bool, AiohttpResponse | bytes | None]:
+        """
+        Одна попытка запроса из __fetch. Параметры из __fetch, proxies - список прокси,
+        из которого прокси выбирается на каждой попытке, iteration - номер попытки
+
+        :return:
+            Кортеж (завершать ли попытки, ответ)
+        """
+
+        pinned_params = self.session_affinity.get(url) if self.session_affinity else None
+        request_start = time.monotonic()
+        try:
+            if pinned_params is not None:
+                params.update(pinned_params)
+            elif isinstance(proxies, ProxyPool):
+                params["proxy"] = proxies.choose()
+            elif proxies is not None:
+                params["proxy"] = random.choice(proxies)
+            if params.get("proxy") is not None:
+                self.hooks.on_proxy_chosen(url, params["proxy"])
+
+            cache_key = (
+                None
+                if get_raw_aiohttp_response_content
+                else self._get_response_cache_key(url, params)
+            )
+            cached_response = await self._get_cached_response(cache_key)
+            if cached_response is not None and cached_response.is_fresh:
+                fresh_response = self.__forming_cached_response(cached_response)
+                if await self._check_page(fresh_response, check_page, check_page_args):
+                    return True, fresh_response
+                # check_page не принял страницу из кэша - удаляем её и отправляем запрос
+                await self._delete_cached_response(cache_key)
+                cached_response = None
+            request_params = params
+            if cached_response is not None:
+                request_params = {
+                    **params,
+                    "headers": {
+                        **(params.get("headers") or {}),
+                        **cached_response.conditional_headers(),
+                    },
+                }
+
+            async with self._host_slot(url) as host_slot:
+                if iteration > 1:
+                    self.hooks.on_retry(url, iteration)
+                self.hooks.on_request_start(url, iteration)
+                request_start = time.monotonic()
+                async with self.__request(session, url, request_params) as response:
+                    host_slot.status_code = response.status
+                    if isinstance(proxies, ProxyPool):
+                        proxies.report_response(
+                            params["proxy"], response.status, time.monotonic() - request_start
+                        )
                     if get_raw_aiohttp_response_content:
-                        return await response.read()
+                        self._update_session_affinity(
+                            url,
+                            response.status == HTTPStatus.OK,
+                            proxy=params.get("proxy"),
+                            headers=params.get("headers"),
+                            cookies=params.get("cookies"),
+                        )
+                        content = await response.read()
+                        self.hooks.on_request_end(
+                            url, response.status, time.monotonic() - request_start, len(content)
+                        )
+                        return True, content
                     aiohttp_response = await self.__forming_aiohttp_response(response)
-                    is_cycle_end, response_ = await self._check_response(
-                        response=aiohttp_response,
-                        iteration=i,
-                        url=url,
-                        increase_by_seconds=i,
-                        iter_count=iter_count,
-                        save_bad_urls=save_bad_urls,
-                        ignore_404=ignore_404,
-                        ignore_410=ignore_410,
-                        long_wait_for_50x=long_wait_for_50x,
-                        iteration_for_50x=iteration_for_50x,
-                        iter_count_for_50x_errors=iter_count_for_50x_errors,
-                        increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
-                        check_page=check_page,
-                        check_page_args=check_page_args,
+                    response_headers = dict(response.headers) if cache_key else {}
+                    self.hooks.on_request_end(
+                        url,
+                        response.status,
+                        time.monotonic() - request_start,
+                        len(aiohttp_response.content) if aiohttp_response is not None else 0,
                     )
-                    if is_cycle_end:
-                        return response_  # type: ignore[return-value]
-            except ignore_exceptions if not self.check_exceptions else () as Ex:
-                if self.debug:
-                    logger.backoff_exception(Ex, i, self.print_logs, url)
-                if save_bad_urls:
-                    await self._append_to_bad_urls(url)
-                await asyncio.sleep(i * increase_by_seconds)
-                continue
 
-        return None
+            is_from_cache = (
+                cached_response is not None and response.status == HTTPStatus.NOT_MODIFIED
+            )
+            if is_from_cache:
+                # Страница не изменилась - берём её из кэша
+                aiohttp_response = self.__forming_cached_response(
+                    cached_response  # type: ignore[arg-type]
+                )
+
+            is_cycle_end, response_ = await self._check_response(
+                response=aiohttp_response,
+                iteration=iteration,
+                url=url,
+                increase_by_seconds=iteration,
+                iter_count=iter_count,
+                save_bad_urls=save_bad_urls,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                iteration_for_50x=1,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                check_page=check_page,
+                check_page_args=check_page_args,
+            )
+            await self._update_response_cache(
+                cache_key,
+                aiohttp_response,
+                response_headers,
+                self._is_response_accepted(
+                    aiohttp_response, is_cycle_end, iteration, iter_count, check_page
+                ),
+                is_from_cache,
+            )
+            self._update_session_affinity(
+                url,
+                is_cycle_end
+                and aiohttp_response is not None
+                and aiohttp_response.status_code == HTTPStatus.OK,
+                proxy=params.get("proxy"),
+                headers=params.get("headers"),
+                cookies=params.get("cookies"),
+            )
+            return is_cycle_end, response_  # type: ignore[return-value]
+        except ignore_exceptions if not self.check_exceptions else () as Ex:
+            self.hooks.on_request_end(url, None, time.monotonic() - request_start, exception=Ex)
+            self._update_session_affinity(url, False)
+            if isinstance(proxies, ProxyPool):
+                proxies.report_failure(params["proxy"])
+            if self.debug:
+                logger.backoff_exception(Ex, iteration, self.print_logs, url)
+            if save_bad_urls:
+                await self._append_to_bad_urls(url, exception=Ex)
+            await self._backoff_sleep(iteration * increase_by_seconds, url)
+            return False, None
 
     async def _make_backoff_request(
         self,
@@ -181,7 +507,7 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         increase_by_minutes_for_50x_errors: int = 20,
         verify: bool = True,
         with_random_useragent: bool = True,
-        proxies: list[str] | str | None = None,
+        proxies: list[str] | str | ProxyPool | None = None,
         headers: dict | list | None = None,
         cookies: dict | list | None = None,
         data: list[dict | None] | dict | None = None,
@@ -199,6 +525,8 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         match_cookies_to_urls: bool = False,
         check_page: Callable = None,  # type: ignore[assignment]
         check_page_args: dict | None = None,
+        max_concurrency: int | None = None,
+        defer_retries: bool = False,
     ) -> tuple[AiohttpResponse | None]:
         """
         Если код ответа не 200 или произошла ошибка из ignore_exceptions, отправляет запрос повторно
@@ -222,8 +550,9 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             Проверка безопасности сайта
         :param with_random_useragent: bool = True
             Случайный юзер-агент
-        :param proxies: list[str] | str | None = None
-            Прокси
+        :param proxies: list[str] | str | ProxyPool | None = None
+            Прокси. Если передан ProxyPool, прокси на каждой попытке выбирается по его
+            статистике, а результат попытки записывается в пул
         :param headers: dict | list = None
             Заголовки запроса, возможно передать в виде списка,
             тогда выберутся рандомно
@@ -247,7 +576,7 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         :param long_wait_for_50x: bool = False
             Если True, применяет increase_by_minutes_for_50x_errors
         :param save_bad_urls: bool = False
-            Собирает ссылки, по которым ошибка или код не 200 в список self.bad_urls
+            Собирает ссылки, по которым ошибка или код не 200 в реестр self.bad_urls (BadUrls)
         :param timeout : int = 30
             Время максимального ожидания ответа
         :param random_sleep_time_every_request: list = False
@@ -269,6 +598,17 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             True или False, где True - вернуть страницу, False - попытаться открыть заново
         :param check_page_args: dict | None = None
             Дополнительные параметры для check_page, если требуются
+        :param max_concurrency: int | None = None
+            Максимальное количество одновременно выполняемых запросов.
+            Если передано, запросы выполняет фиксированное количество воркеров, а параметры
+            запросов формируются только перед отправкой, поэтому потребление памяти
+            не зависит от длины списка ссылок. Порядок ответов совпадает с порядком ссылок.
+            Если None, все запросы отправляются одновременно. Если меньше 1 - ValueError
+        :param defer_retries: bool = False
+            Если True, запрос, который нужно повторить, не ждёт задержку backoff на своём месте,
+            а откладывается в очередь до времени следующей попытки. Освободившееся место
+            (из max_concurrency) сразу занимает следующий запрос, поэтому медленные
+            повторы не снижают скорость обхода остальных ссылок
 
         :return:
             Возвращает список ответов от сайта.
@@ -279,75 +619,417 @@ class AsyncBaseParser(AsyncRequestsParserBase):
                 json: dict | None
                 url: str
                 status: int
+                content: bytes
+            text и json декодируются из content при первом обращении и кэшируются
         """
 
         if ignore_exceptions == "default":
             ignore_exceptions = self.ignore_exceptions
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
-            tasks = []
+        async with self.__get_session(timeout) as session:
+            tasks_count, make_task, make_attempt = await self.__make_fetch_task_factory(
+                session=session,
+                urls=urls,
+                timeout=timeout,
+                method=method,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=headers,
+                cookies=cookies,
+                data=data,
+                json=json,
+                ignore_exceptions=ignore_exceptions,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+                random_sleep_time_every_request=random_sleep_time_every_request,
+                params=params,
+                get_raw_aiohttp_response_content=get_raw_aiohttp_response_content,
+                match_headers_to_urls=match_headers_to_urls,
+                match_cookies_to_urls=match_cookies_to_urls,
+                check_page=check_page,
+                check_page_args=check_page_args,
+            )
+            if defer_retries:
+                return await self._gather_with_retry_queue(  # type: ignore[return-value]
+                    tasks_count, make_attempt, max_concurrency
+                )
+            return await self._gather_in_pool(  # type: ignore[return-value]
+                tasks_count, make_task, max_concurrency
+            )
 
-            url_count, max_requests, data_list, json_list = await self._prepare_request_data(
-                urls=urls, data=data, json=json
+    async def _iter_backoff_requests(
+        self,
+        urls: list,
+        method: str = "GET",
+        iter_count: int = 10,
+        iter_count_for_50x_errors: int = 3,
+        increase_by_seconds: int = 10,
+        increase_by_minutes_for_50x_errors: int = 20,
+        verify: bool = True,
+        with_random_useragent: bool = True,
+        proxies: list[str] | str | ProxyPool | None = None,
+        headers: dict | list | None = None,
+        cookies: dict | list | None = None,
+        data: list[dict | None] | dict | None = None,
+        json: list[dict | None] | dict | None = None,
+        ignore_exceptions: tuple | str = "default",
+        ignore_404: bool = False,
+        ignore_410: bool = False,
+        long_wait_for_50x: bool = False,
+        save_bad_urls: bool = False,
+        timeout: int = 30,
+        random_sleep_time_every_request: list | bool = False,
+        params: dict | None = None,
+        get_raw_aiohttp_response_content: bool = False,
+        match_headers_to_urls: bool = False,
+        match_cookies_to_urls: bool = False,
+        check_page: Callable = None,  # type: ignore[assignment]
+        check_page_args: dict | None = None,
+        max_concurrency: int | None = None,
+        defer_retries: bool = False,
+    ) -> AsyncIterator[tuple[int, str, AiohttpResponse | bytes | None]]:
+        """
+        То же самое, что и _make_backoff_request, но не ждёт завершения всех запросов,
+        а отдаёт ответы по мере их получения. Это позволяет обрабатывать ответы параллельно
+        с отправкой запросов и не хранить в памяти ответы по всем ссылкам сразу
+
+        Параметры совпадают с параметрами _make_backoff_request
+
+        :return:
+            Асинхронный итератор кортежей (index, url, response), где index - номер запроса
+            (порядок, в котором запросы были бы возвращены из _make_backoff_request),
+            url - ссылка, response - ответ от сайта или None
+        """
+
+        if ignore_exceptions == "default":
+            ignore_exceptions = self.ignore_exceptions
+
+        async with self.__get_session(timeout) as session:
+            tasks_count, make_task, make_attempt = await self.__make_fetch_task_factory(
+                session=session,
+                urls=urls,
+                timeout=timeout,
+                method=method,
+                iter_count=iter_count,
+                iter_count_for_50x_errors=iter_count_for_50x_errors,
+                increase_by_seconds=increase_by_seconds,
+                increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=headers,
+                cookies=cookies,
+                data=data,
+                json=json,
+                ignore_exceptions=ignore_exceptions,
+                ignore_404=ignore_404,
+                ignore_410=ignore_410,
+                long_wait_for_50x=long_wait_for_50x,
+                save_bad_urls=save_bad_urls,
+                random_sleep_time_every_request=random_sleep_time_every_request,
+                params=params,
+                get_raw_aiohttp_response_content=get_raw_aiohttp_response_content,
+                match_headers_to_urls=match_headers_to_urls,
+                match_cookies_to_urls=match_cookies_to_urls,
+                check_page=check_page,
+                check_page_args=check_page_args,
             )
+            if defer_retries:
+                responses = self._iter_with_retry_queue(tasks_count, make_attempt, max_concurrency)
+            else:
+                responses = self._iter_in_pool(tasks_count, make_task, max_concurrency)
+            async for index, response in responses:
+                yield index, urls[index % len(urls)], response
 
-            for i in range(max_requests):
-                url = urls[i % url_count]
-                current_headers = self._select_value(
-                    headers, match_headers_to_urls, i, max_requests
-                )
-                current_cookies = self._select_value(
-                    cookies, match_cookies_to_urls, i, max_requests
-                )
-                request_data = data_list[i] if i < len(data_list) else None
-                request_json = json_list[i] if i < len(json_list) else None
-
-                request_params = await self.__get_request_params(
-                    method=method,
-                    verify=verify,
-                    with_random_useragent=with_random_useragent,
-                    proxies=proxies,
-                    headers=current_headers,
-                    cookies=current_cookies,
-                    data=request_data,
-                    json=request_json,
-                    params=params,
-                )
+    async def _download(
+        self,
+        url: str,
+        path: str | None = None,
+        sink: DownloadSink | None = None,
+        resume: bool = True,
+        progress: DownloadProgress | None = None,
+        chunk_size: int = 64 * 1024,
+        method: str = "GET",
+        iter_count: int = 10,
+        increase_by_seconds: int = 10,
+        verify: bool = True,
+        with_random_useragent: bool = True,
+        proxies: list[str] | str | ProxyPool | None = None,
+        headers: dict | list | None = None,
+        cookies: dict | list | None = None,
+        params: dict | None = None,
+        ignore_exceptions: tuple | str = "default",
+        save_bad_urls: bool = False,
+        timeout: int = 30,
+    ) -> DownloadResult | None:
+        """
+        Скачивает тело ответа по частям в файл path или в функцию sink, не загружая его
+        в память целиком. После обрыва соединения или ошибки из ignore_exceptions загрузка
+        продолжается с места обрыва (заголовок Range), задержка между попытками увеличивается
+
+        :param url: str
+            Ссылка
+        :param path: str | None = None
+            Путь к файлу для записи тела
+        :param sink: DownloadSink | None = None
+            Функция (обычная или асинхронная), которая получает тело по частям,
+            если path не передан
+        :param resume: bool = True
+            Если файл path уже существует - докачать его с конца (Range), иначе перезаписать
+        :param progress: DownloadProgress | None = None
+            Функция progress(скачано байт, размер тела или None), вызывается после каждой части
+        :param chunk_size: int = 64 * 1024
+            Размер части тела в байтах
+        :param timeout: int = 30
+            Время максимального ожидания соединения и каждой части тела
+            (а не всей загрузки, как в _make_backoff_request)
+
+        Остальные параметры такие же, как в _make_backoff_request
+
+        :return: DownloadResult | None
+            Результат загрузки или None, если все попытки завершились ошибкой
+        """
+
+        if ignore_exceptions == "default":
+            # Обрыв соединения во время чтения тела - повод докачать, а не ошибка
+            ignore_exceptions = (*self.ignore_exceptions, aiohttp.ClientPayloadError)
 
-                tasks.append(
-                    self.__fetch(
-                        session=session,
-                        url=url,
-                        params=request_params,
-                        ignore_exceptions=ignore_exceptions,
-                        iter_count=iter_count,
-                        iter_count_for_50x_errors=iter_count_for_50x_errors,
-                        increase_by_seconds=increase_by_seconds,
-                        increase_by_minutes_for_50x_errors=increase_by_minutes_for_50x_errors,
-                        ignore_404=ignore_404,
-                        ignore_410=ignore_410,
-                        long_wait_for_50x=long_wait_for_50x,
-                        save_bad_urls=save_bad_urls,
-                        random_sleep_time_every_request=random_sleep_time_every_request,
-                        get_raw_aiohttp_response_content=get_raw_aiohttp_response_content,
-                        check_page=check_page,
-                        check_page_args=check_page_args,
+        target = DownloadTarget(path=path, sink=sink, resume=resume, progress=progress)
+        try:
+            async with self.__get_session(timeout) as session:
+                for iteration in range(1, iter_count + 1):
+                    request_params = await self.__get_request_params(
+                        method=method,
+                        verify=verify,
+                        with_random_useragent=with_random_useragent,
+                        proxies=proxies,
+                        headers=headers,
+                        cookies=cookies,
+                        data=None,
+                        json=None,
+                        params=params,
+                    )
+                    if isinstance(proxies, ProxyPool):
+                        request_params["proxy"] = proxies.choose()
+                    elif isinstance(proxies, list):
+                        request_params["proxy"] = random.choice(proxies)
+                    if request_params.get("proxy") is not None:
+                        self.hooks.on_proxy_chosen(url, request_params["proxy"])
+                    request_params["headers"] = {
+                        **request_params["headers"],
+                        **target.get_range_headers(),
+                    }
+                    request_params["timeout"] = aiohttp.ClientTimeout(
+                        total=None, sock_connect=timeout, sock_read=timeout
                     )
-                )
 
-            return await asyncio.gather(*tasks)  # type: ignore[return-value]
+                    offset = target.offset
+                    try:
+                        async with self._host_slot(url) as host_slot:
+                            if iteration > 1:
+                                self.hooks.on_retry(url, iteration)
+                            self.hooks.on_request_start(url, iteration)
+                            request_start = time.monotonic()
+                            async with self.__request(session, url, request_params) as response:
+                                host_slot.status_code = response.status
+                                if isinstance(proxies, ProxyPool):
+                                    proxies.report_response(
+                                        request_params["proxy"], response.status
+                                    )
+                                if (
+                                    response.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+                                    and target.offset
+                                ):
+                                    self.hooks.on_request_end(
+                                        url, response.status, time.monotonic() - request_start
+                                    )
+                                    return target.get_result(url, response.status)
+                                if response.status in (HTTPStatus.OK, HTTPStatus.PARTIAL_CONTENT):
+                                    target.start(response.status, response.headers)
+                                    async for chunk in response.content.iter_chunked(chunk_size):
+                                        await target.write(chunk)
+                                    self.hooks.on_request_end(
+                                        url,
+                                        response.status,
+                                        time.monotonic() - request_start,
+                                        target.offset - offset,
+                                    )
+                                    if save_bad_urls:
+                                        await self._delete_from_bad_urls(url)
+                                    return target.get_result(url, response.status)
+                                self.hooks.on_request_end(
+                                    url, response.status, time.monotonic() - request_start
+                                )
+
+                        if self.debug:
+                            logger.backoff_status_code(
+                                response.status, iteration, url, self.print_logs
+                            )
+                        if save_bad_urls:
+                            await self._append_to_bad_urls(url, status_code=response.status)
+                    except ignore_exceptions if not self.check_exceptions else () as Ex:
+                        self.hooks.on_request_end(
+                            url,
+                            None,
+                            time.monotonic() - request_start,
+                            target.offset - offset,
+                            exception=Ex,
+                        )
+                        if isinstance(proxies, ProxyPool):
+                            proxies.report_failure(request_params["proxy"])
+                        if self.debug:
+                            logger.backoff_exception(Ex, iteration, self.print_logs, url)
+                        if save_bad_urls:
+                            await self._append_to_bad_urls(url, exception=Ex)
+                    if iteration < iter_count:
+                        await self._backoff_sleep(iteration * increase_by_seconds, url)
+        finally:
+            target.close()
+        return None
+
+    async def __make_fetch_task_factory(
+        self,
+        session: aiohttp.ClientSession,
+        urls: list,
+        timeout: int,
+        method: str,
+        iter_count: int,
+        iter_count_for_50x_errors: int,
+        increase_by_seconds: int,
+        increase_by_minutes_for_50x_errors: int,
+        verify: bool,
+        with_random_useragent: bool,
+        proxies: list[str] | str | ProxyPool | None,
+        headers: dict | list | None,
+        cookies: dict | list | None,
+        data: list[dict | None] | dict | None,
+        json: list[dict | None] | dict | None,
+        ignore_exceptions: tuple | str,
+        ignore_404: bool,
+        ignore_410: bool,
+        long_wait_for_50x: bool,
+        save_bad_urls: bool,
+        random_sleep_time_every_request: list | bool,
+        params: dict | None,
+        get_raw_aiohttp_response_content: bool,
+        match_headers_to_urls: bool,
+        match_cookies_to_urls: bool,
+        check_page: Callable,
+        check_page_args: dict | None,
+    ) -> tuple[
+        int,
+        Callable[[int], Awaitable[AiohttpResponse | bytes | None]],
+        Callable[[int, int], Awaitable[tuple[bool, AiohttpResponse | bytes | None, float]]],
+    ]:
+        """
+        Возвращает количество запросов и функции, которые по индексу запроса формируют
+        его параметры и создают корутину __fetch (все попытки запроса) или одной попытки
+        для планировщика повторов. Параметры из _make_backoff_request
+
+        :return:
+            Кортеж (количество запросов, функция создания корутины запроса по индексу,
+            функция создания корутины попытки по индексу и номеру попытки)
+        """
+
+        url_count, max_requests, data_list, json_list = await self._prepare_request_data(
+            urls=urls, data=data, json=json
+        )
+
+        async def make_request_params(i: int) -> tuple[str, dict]:
+            current_headers = self._select_value(headers, match_headers_to_urls, i, max_requests)
+            current_cookies = self._select_value(cookies, match_cookies_to_urls, i, max_requests)
+            request_data = data_list[i] if i < len(data_list) else None
+            request_json = json_list[i] if i < len(json_list) else None
+
+            request_params = await self.__get_request_params(
+                method=method,
+                verify=verify,
+                with_random_useragent=with_random_useragent,
+                proxies=proxies,
+                headers=current_headers,
+                cookies=current_cookies,
+                data=request_data,
+                json=request_json,
+                params=params,
+                timeout=timeout,
+            )
+            return urls[i % url_count], request_params
+
+        fetch_params: dict[str, Any] = {
+            "ignore_exceptions": ignore_exceptions,
+            "iter_count": iter_count,
+            "iter_count_for_50x_errors": iter_count_for_50x_errors,
+            "increase_by_seconds": increase_by_seconds,
+            "increase_by_minutes_for_50x_errors": increase_by_minutes_for_50x_errors,
+            "ignore_404": ignore_404,
+            "ignore_410": ignore_410,
+            "long_wait_for_50x": long_wait_for_50x,
+            "save_bad_urls": save_bad_urls,
+            "get_raw_aiohttp_response_content": get_raw_aiohttp_response_content,
+            "check_page": check_page,
+            "check_page_args": check_page_args,
+        }
+
+        async def make_task(i: int) -> AiohttpResponse | bytes | None:
+            url, request_params = await make_request_params(i)
+            return await self._single_flight(
+                self._get_request_key(url, request_params),
+                lambda: self.__fetch(
+                    session=session,
+                    url=url,
+                    params=request_params,
+                    random_sleep_time_every_request=random_sleep_time_every_request,
+                    **fetch_params,
+                ),
+            )
+
+        async def prepare_attempts(
+            i: int,
+        ) -> tuple[str, tuple[str, dict, list | ProxyPool | None]]:
+            url, request_params = await make_request_params(i)
+            await self._sleep_random_time(random_sleep_time_every_request)
+            request_proxies = request_params.get("proxy")
+            return self._get_request_key(url, request_params), (
+                url,
+                request_params,
+                request_proxies if isinstance(request_proxies, list | ProxyPool) else None,
+            )
+
+        def run_attempt(
+            attempt_params: tuple[str, dict, list | ProxyPool | None], attempt: int
+        ) -> Awaitable[tuple[bool, AiohttpResponse | bytes | None]]:
+            url, request_params, request_proxies = attempt_params
+            return self.__fetch_attempt(
+                session=session,
+                url=url,
+                params=request_params,
+                proxies=request_proxies,
+                iteration=attempt,
+                **fetch_params,
+            )
+
+        make_attempt = self._single_flight_attempts(prepare_attempts, run_attempt, iter_count)
+        return max_requests, make_task, make_attempt
 
     async def __get_request_params(
         self,
         method: str,
         verify: bool,
         with_random_useragent: bool,
-        proxies: list[str] | str | None,
+        proxies: list[str] | str | ProxyPool | None,
         headers: dict | list | None,
         cookies: dict | list | None,
         data: dict | None,
         json: dict | None,
         params: dict | None = None,
+        timeout: int | None = None,
     ) -> dict:
         """
         Возвращает словарь параметров для запроса через requests
@@ -358,7 +1040,7 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             Проверка безопасности сайта
         :param with_random_useragent: bool
             Использование рандомного юзерагента
-        :param proxies: list[str] | str | None
+        :param proxies: list[str] | str | ProxyPool | None
             Прокси
         :param headers: dict | list
             Заголовки запроса, возможно передать в виде списка,
@@ -372,6 +1054,8 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             Данные запроса
         :param params: dict | None = None
             Словарь параметров запроса
+        :param timeout: int | None = None
+            Время максимального ожидания ответа
         :return:
         """
 
@@ -381,7 +1065,8 @@ class AsyncBaseParser(AsyncRequestsParserBase):
         random_index = await self._calculate_random_cookies_headers_index(
             cookies=cookies, headers=headers
         )
-        headers = await self._get_by_random_index(headers, random_index, "Headers")
+        # Копия, чтобы User-Agent не записывался в словарь вызывающего кода
+        headers = dict(await self._get_by_random_index(headers, random_index, "Headers"))
         cookies = await self._get_by_random_index(cookies, random_index, "Cookies")
 
         if with_random_useragent:
@@ -400,22 +1085,32 @@ class AsyncBaseParser(AsyncRequestsParserBase):
             request_params["proxy"] = proxies
         if params:
             request_params["params"] = params
+        if timeout is not None:
+            request_params["timeout"] = aiohttp.ClientTimeout(total=timeout)
 
         return request_params
 
+    def __forming_cached_response(self, cached_response: CachedResponse) -> AiohttpResponse:
+        return AiohttpResponse(
+            url=cached_response.url,
+            status_code=cached_response.status_code,
+            content=cached_response.content,
+            encoding=cached_response.encoding,
+            content_type=cached_response.content_type,
+            json_loads=self.json_loads,
+        )
+
     async def __forming_aiohttp_response(self, response: Any) -> AiohttpResponse | None:
         try:
-            try:
-                text = await response.text()
-            except UnicodeDecodeError as Ex:
-                text = f"Encoding error: {Ex}"
-            try:
-                json = await response.json()
-            except aiohttp.client_exceptions.ContentTypeError:
-                json = None
-            response_url = str(response.url)
-            status = response.status
-            return AiohttpResponse(text=text, json=json, url=response_url, status_code=status)
+            content = await response.read()
+            return AiohttpResponse(
+                url=str(response.url),
+                status_code=response.status,
+                content=content,
+                encoding=response.get_encoding(),
+                content_type=response.content_type,
+                json_loads=self.json_loads,
+            )
         except Exception if not self.check_exceptions else () as Ex:
             logger.info_log(f"forming AiohttpResponse error {Ex}", self.print_logs)
             return None
@@ -1,15 +1,24 @@
+import os
 import random
 import time
+import weakref
+from concurrent.futures import FIRST_EXCEPTION, Future, ThreadPoolExecutor, wait
 from http import HTTPStatus
-from threading import Thread
+from threading import Event, Lock, Thread, local
 from typing import Any, Callable
 
 import requests
 import urllib3
-from fake_useragent import UserAgent
 
 from base_pars_lib.config import logger
 from base_pars_lib.core import _requests_digest_proxy
+from base_pars_lib.core.bad_urls import BadUrls
+from base_pars_lib.core.json_backends import get_json_loads
+from base_pars_lib.core.metrics import RequestHooks
+from base_pars_lib.core.proxy_pool import ProxyPool
+from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+from base_pars_lib.core.session_affinity import SessionAffinity
+from base_pars_lib.core.user_agents import get_user_agent_pool
 
 
 class BaseParser:
@@ -19,6 +28,13 @@ class BaseParser:
         debug: bool = False,
         print_logs: bool = False,
         check_exceptions: bool = False,
+        json_backend: str = "auto",
+        thread_local_sessions: bool = False,
+        pool_connections: int | None = None,
+        pool_maxsize: int | None = None,
+        session_affinity: SessionAffinity | None = None,
+        response_cache: ResponseCache | None = None,
+        hooks: RequestHooks | None = None,
     ) -> None:
         """
         :param requests_session: = None
@@ -31,11 +47,33 @@ class BaseParser:
         :param check_exceptions: bool = False
             Позволяет посмотреть внутренние ошибки библиотеки, отключает все try/except конструкции,
             кроме тех, на которых завязана логика (например _calculate_random_cookies_headers_index)
+        :param json_backend: str = "auto"
+            Библиотека для разбора json ответов в _response_json: "orjson", "msgspec" или "json".
+            Если "auto" - orjson или msgspec, если установлены, иначе стандартный json
+        :param thread_local_sessions: bool = False
+            Если True, запросы с from_one_session=True отправляются через отдельную
+            requests.Session для каждого потока (см. _get_thread_session), а не через одну
+            общую requests_session. Так потоки _threading_method не делят куки и пул соединений
+        :param pool_connections: int | None = None
+            Количество хостов, пулы соединений к которым хранит сессия потока (HTTPAdapter).
+            Если None - равно количеству потоков последнего запущенного _threading_method или
+            _threading_pool_method (10, если потоки ещё не запускались)
+        :param pool_maxsize: int | None = None
+            Максимальное количество соединений к одному хосту в сессии потока (HTTPAdapter).
+            Если None - равно количеству потоков, как и pool_connections
+        :param session_affinity: SessionAffinity | None = None
+            Закрепление прокси, заголовков и кук за хостом после успешного запроса,
+            см. SessionAffinity
+        :param response_cache: ResponseCache | None = None
+            Кэш ответов с TTL и условными запросами (ETag / Last-Modified), см. ResponseCache
+        :param hooks: RequestHooks | None = None
+            Хуки событий запросов (начало и конец запроса, повтор, backoff, выбор прокси),
+            например RequestMetrics для счётчиков и гистограмм времени ответа по хостам
         """
 
         self.requests_session = requests_session
 
-        self.user_agent = UserAgent()
+        self.user_agent = get_user_agent_pool()
 
         self.ignore_exceptions = (
             requests.exceptions.ProxyError,
@@ -49,7 +87,21 @@ class BaseParser:
         self.debug = debug
         self.print_logs = print_logs
 
-        self.bad_urls: list = []
+        self.bad_urls = BadUrls()
+
+        self.json_loads = get_json_loads(json_backend)
+
+        self.thread_local_sessions = thread_local_sessions
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._pool_workers: int | None = None
+
+        self.session_affinity = session_affinity
+        self.response_cache = response_cache
+        self.hooks = hooks or RequestHooks()
+        self._thread_local = local()
+        self._thread_sessions: weakref.WeakSet[requests.Session] = weakref.WeakSet()
+        self._thread_sessions_lock = Lock()
 
     def _make_request(self, params: dict, from_one_session: bool = True) -> Any:
         """
@@ -64,7 +116,9 @@ class BaseParser:
             response
         """
 
-        if from_one_session:
+        if from_one_session and self.thread_local_sessions:
+            response = self._get_thread_session().request(**params)
+        elif from_one_session:
             response = self.requests_session.request(**params)
         else:
             response = requests.request(**params)
@@ -72,6 +126,61 @@ class BaseParser:
             logger.info_log(f"_make_request status code: {response.status_code}", self.print_logs)
         return response
 
+    def _get_thread_session(self) -> requests.Session:
+        """
+        Возвращает requests.Session текущего потока, при первом вызове в потоке создаёт её.
+        Сессия получает HTTPAdapter с pool_connections и pool_maxsize (HTTPProxyDigestAdapter,
+        если он смонтирован в requests_session), а также копию заголовков, кук, auth и прокси
+        из requests_session, если она передана. Не заданные pool_connections и pool_maxsize
+        равны количеству потоков последнего запущенного _threading_method / _threading_pool_method
+
+        :return: requests.Session
+        """
+
+        session: requests.Session | None = getattr(self._thread_local, "session", None)
+        if session is not None:
+            return session
+
+        session = requests.Session()
+        adapter_class = requests.adapters.HTTPAdapter
+        if isinstance(self.requests_session, requests.Session) and isinstance(
+            self.requests_session.get_adapter("https://"),
+            _requests_digest_proxy.HTTPProxyDigestAdapter,
+        ):
+            # Сессия ротационного прокси (rotating_proxy_auth) - сохраняем авторизацию в прокси
+            adapter_class = _requests_digest_proxy.HTTPProxyDigestAdapter
+        workers = self._pool_workers or requests.adapters.DEFAULT_POOLSIZE
+        adapter = adapter_class(
+            pool_connections=self.pool_connections or workers,
+            pool_maxsize=self.pool_maxsize or workers,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        if isinstance(self.requests_session, requests.Session):
+            session.headers.update(self.requests_session.headers)
+            session.cookies.update(self.requests_session.cookies.copy())
+            session.auth = self.requests_session.auth
+            session.proxies.update(self.requests_session.proxies)
+
+        self._thread_local.session = session
+        with self._thread_sessions_lock:
+            self._thread_sessions.add(session)
+        return session
+
+    def _close_thread_sessions(self) -> None:
+        """
+        Закрывает сессии всех потоков, созданные _get_thread_session.
+        Сессии завершившихся потоков освобождаются сборщиком мусора и без этого вызова
+        """
+
+        with self._thread_sessions_lock:
+            sessions = list(self._thread_sessions)
+            self._thread_sessions.clear()
+        for session in sessions:
+            session.close()
+        self._thread_local = local()
+
     def _make_backoff_request(
         self,
         url: str,
@@ -83,7 +192,7 @@ class BaseParser:
         verify: bool = True,
         with_random_useragent: bool = True,
         from_one_session: bool = True,
-        proxies: list[dict] | dict | None = None,
+        proxies: list[dict] | dict | ProxyPool | None = None,
         headers: dict | list | None = None,
         cookies: dict | list | None = None,
         json: dict | None = None,
@@ -121,8 +230,9 @@ class BaseParser:
             Случайный юзер-агент
         :param from_one_session: bool = True
             Использование одной сессии
-        :param proxies: list[dict] | dict | None = None
-            Прокси
+        :param proxies: list[dict] | dict | ProxyPool | None = None
+            Прокси. Если передан ProxyPool, прокси на каждой попытке выбирается по его
+            статистике, а результат попытки записывается в пул
         :param headers: dict | list = None
             Заголовки запроса, возможно передать в виде списка,
             тогда выбирутся рандомно
@@ -150,7 +260,7 @@ class BaseParser:
         :param long_wait_for_50x: bool = False
             Если True, применяет increase_by_minutes_for_50x_errors
         :param save_bad_urls: bool = False
-            Собирает ссылки, по которым ошибка или код не 200 в список self.bad_urls
+            Собирает ссылки, по которым ошибка или код не 200 в реестр self.bad_urls (BadUrls)
         :param compare_headers_and_cookies_indexes: bool = True
             Если True, индекс для списков хедеров и куков будет одинаков:
                 (если требуется, чтобы пары были обязательно вместе)
@@ -187,28 +297,96 @@ class BaseParser:
             timeout=timeout,
         )
 
-        if isinstance(request_params.get("proxies"), list):
+        if isinstance(request_params.get("proxies"), list | ProxyPool):
             proxies = request_params.get("proxies")
         else:
             proxies = None
 
+        cache_key = self._get_response_cache_key(url, request_params)
+        cached_response = (
+            self.response_cache.get(cache_key) if self.response_cache and cache_key else None
+        )
+        if cached_response is not None and cached_response.is_fresh:
+            return self._forming_cached_response(cached_response)
+
         iteration_for_50x = 1
         for i in range(1, iter_count + 1):
+            if i > 1:
+                self.hooks.on_retry(url, i)
+            pinned_params = self.session_affinity.get(url) if self.session_affinity else None
+            request_start = time.monotonic()
             try:
-                if proxies is not None:
+                if pinned_params is not None:
+                    request_params.update(pinned_params)
+                elif isinstance(proxies, ProxyPool):
+                    request_params["proxies"] = proxies.choose()
+                elif proxies is not None:
                     request_params["proxies"] = random.choice(proxies)
-
-                response = self._make_request(
-                    from_one_session=from_one_session, params=request_params
-                )
+                if request_params.get("proxies") is not None:
+                    self.hooks.on_proxy_chosen(url, request_params["proxies"])
+
+                self.hooks.on_request_start(url, i)
+                request_start = time.monotonic()
+                if cached_response is not None:
+                    response = self._make_request(
+                        from_one_session=from_one_session,
+                        params={
+                            **request_params,
+                            "headers": {
+                                **(request_params.get("headers") or {}),
+                                **cached_response.conditional_headers(),
+                            },
+                        },
+                    )
+                else:
+                    response = self._make_request(
+                        from_one_session=from_one_session, params=request_params
+                    )
             except ignore_exceptions if not self.check_exceptions else () as Ex:
+                self.hooks.on_request_end(url, None, time.monotonic() - request_start, exception=Ex)
+                self._update_session_affinity(url, False)
+                if isinstance(proxies, ProxyPool):
+                    proxies.report_failure(request_params["proxies"])
                 if self.debug:
                     logger.backoff_exception(Ex, i, self.print_logs, url)
                 if save_bad_urls:
-                    self._append_to_bad_urls(url)
-                time.sleep(i * increase_by_seconds)
+                    self._append_to_bad_urls(url, exception=Ex)
+                self._backoff_sleep(i * increase_by_seconds, url)
                 continue
 
+            self.hooks.on_request_end(
+                url,
+                response.status_code,
+                time.monotonic() - request_start,
+                len(response.content) if isinstance(response.content, bytes) else 0,
+            )
+            if isinstance(proxies, ProxyPool):
+                proxies.report_response(
+                    request_params["proxies"],
+                    response.status_code,
+                    time.monotonic() - request_start,
+                )
+            if cached_response is not None and response.status_code == HTTPStatus.NOT_MODIFIED:
+                # Страница не изменилась - берём её из кэша
+                self.response_cache.revalidate(cache_key)  # type: ignore[union-attr, arg-type]
+                response = self._forming_cached_response(cached_response)
+            elif cache_key and response.status_code == HTTPStatus.OK:
+                self.response_cache.set(  # type: ignore[union-attr]
+                    cache_key,
+                    url=response.url,
+                    status_code=response.status_code,
+                    content=response.content,
+                    headers=dict(response.headers),
+                )
+
+            self._update_session_affinity(
+                url,
+                response.status_code == HTTPStatus.OK,
+                proxies=request_params.get("proxies"),
+                headers=request_params.get("headers"),
+                cookies=request_params.get("cookies"),
+            )
+
             if response.status_code == HTTPStatus.OK or i == iter_count:
                 if save_bad_urls and response.status_code == HTTPStatus.OK:
                     self._delete_from_bad_urls(url)
@@ -217,7 +395,7 @@ class BaseParser:
             if save_bad_urls and response.status_code not in (
                     HTTPStatus.NOT_FOUND, HTTPStatus.GONE
             ):
-                self._append_to_bad_urls(url)
+                self._append_to_bad_urls(url, status_code=response.status_code)
 
             elif (
                     response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE)
@@ -230,15 +408,23 @@ class BaseParser:
                 iteration_for_50x += 1
                 if self.debug:
                     logger.backoff_status_code(response.status_code, i, url, self.print_logs)
-                time.sleep(i * increase_by_minutes_for_50x_errors * 60)
+                self._backoff_sleep(i * increase_by_minutes_for_50x_errors * 60, url)
                 continue
 
             if self.debug:
                 logger.backoff_status_code(response.status_code, i, url, self.print_logs)
-            time.sleep(i * increase_by_seconds)
+            self._backoff_sleep(i * increase_by_seconds, url)
 
         return None
 
+    def _backoff_sleep(self, seconds: float, url: str = "") -> None:
+        """
+        Задержка перед повторной попыткой запроса
+        """
+
+        self.hooks.on_backoff_sleep(url, seconds)
+        time.sleep(seconds)
+
     def _get_request_params(
         self,
         url: str,
@@ -250,7 +436,7 @@ class BaseParser:
         verify: bool = True,
         json: dict | str | None = None,
         data: dict | str | None = None,
-        proxies: list[dict] | dict | None = None,
+        proxies: list[dict] | dict | ProxyPool | None = None,
         params: dict | bool = False,
         timeout: int | None = None,
     ) -> dict:
@@ -275,8 +461,9 @@ class BaseParser:
             json-данные
         :param data: dict = None
             Данные запроса
-        :param proxies: list[dict] | dict | None = None
-            Прокси
+        :param proxies: list[dict] | dict | ProxyPool | None = None
+            Прокси. Если передан ProxyPool, прокси на каждой попытке выбирается по его
+            статистике, а результат попытки записывается в пул
         :param compare_headers_and_cookies_indexes: bool
             Если True, индекс для списков хедеров и куков будет одинаков:
                 (если требуется, чтобы пары были обязательно вместе)
@@ -303,7 +490,8 @@ class BaseParser:
             )
         else:
             random_index = None
-        headers = self._get_by_random_index(headers, random_index, "Headers")
+        # Копия, чтобы User-Agent не записывался в словарь вызывающего кода
+        headers = dict(self._get_by_random_index(headers, random_index, "Headers"))
         cookies = self._get_by_random_index(cookies, random_index, "Cookies")
 
         if with_random_useragent:
@@ -338,16 +526,66 @@ class BaseParser:
                 logger.info_log(f"{item_name} index: {random_index}", self.print_logs)
         return item  # type: ignore[return-value]
 
-    def _append_to_bad_urls(self, url: Any) -> None:
-        if url not in self.bad_urls:
-            self.bad_urls.append(url)
+    def _response_json(self, response: requests.Response | None) -> Any:
+        """
+        Разбирает json из ответа функцией self.json_loads (задаётся параметром json_backend)
+
+        :param response: requests.Response | None
+            Ответ из _make_backoff_request
+        :return:
+            json ответа или None, если ответа нет или тело ответа не является json
+        """
+
+        if response is None:
+            return None
+        try:
+            return self.json_loads(response.content)
+        except ValueError:
+            return None
+
+    def _append_to_bad_urls(
+        self, url: Any, status_code: int | None = None, exception: BaseException | None = None
+    ) -> None:
+        self.bad_urls.add(url, status_code=status_code, exception=exception)
 
     def _delete_from_bad_urls(self, url: Any) -> None:
-        if url in self.bad_urls:
-            self.bad_urls.remove(url)
+        self.bad_urls.discard(url)
+
+    def _get_response_cache_key(self, url: str, params: dict) -> str | None:
+        """
+        Ключ ответа в self.response_cache по методу, ссылке, query-параметрам и телу запроса.
+        Если кэш не задан - None
+        """
+
+        if self.response_cache is None:
+            return None
+        body = {name: params[name] for name in ("params", "data", "json") if params.get(name)}
+        return self.response_cache.make_key(params.get("method", "GET"), url, body or None)
 
     @staticmethod
-    def _threading_method(chunked_array: list | tuple, method: Callable) -> None:
+    def _forming_cached_response(cached_response: CachedResponse) -> requests.Response:
+        response = requests.Response()
+        response.url = cached_response.url
+        response.status_code = cached_response.status_code
+        response._content = cached_response.content
+        response.headers = requests.structures.CaseInsensitiveDict(cached_response.headers)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        return response
+
+    def _update_session_affinity(self, url: str, is_success: bool, **params: Any) -> None:
+        """
+        Закрепляет параметры запроса за ссылкой в self.session_affinity, если запрос успешен,
+        иначе открепляет их. Если session_affinity не задан, ничего не делает
+        """
+
+        if self.session_affinity is None:
+            return
+        if is_success:
+            self.session_affinity.pin(url, params)
+        else:
+            self.session_affinity.unpin(url)
+
+    def _threading_method(self, chunked_array: list | tuple, method: Callable) -> None:
         """
         Создаёт столько потоков, сколько чанков передано в chunked_array,
         выполняет метод method для каждого чанка в отдельном потоке
@@ -362,6 +600,7 @@ class BaseParser:
             None
         """
 
+        self._pool_workers = len(chunked_array)
         threads = []
         for chunk in chunked_array:
             chunk_thread = Thread(target=method, args=(chunk,))
@@ -370,6 +609,74 @@ class BaseParser:
         for thread in threads:
             thread.join()
 
+    def _threading_pool_method(
+        self,
+        chunked_array: list | tuple,
+        method: Callable,
+        max_workers: int | None = None,
+        return_exceptions: bool = False,
+        cancel_event: Event | None = None,
+    ) -> list:
+        """
+        Выполняет метод method для каждого чанка в пуле из max_workers потоков
+        и возвращает результаты в порядке чанков.
+        В отличие от _threading_method не создаёт по потоку на каждый чанк
+
+        :param chunked_array: list | tuple
+            Массив из чанков с url-ами или другими данными для запроса
+        :param method: Callable
+            Метод, который работает с чанком из переданного массива и возвращает результат
+        :param max_workers: int | None = None
+            Максимальное количество потоков,
+            если None - по умолчанию ThreadPoolExecutor (min(32, cpu + 4))
+        :param return_exceptions: bool = False
+            Если False - при первом исключении ещё не начатые чанки отменяются,
+            исключение пробрасывается после завершения уже запущенных.
+            Если True - исключение записывается в результат вместо значения
+        :param cancel_event: threading.Event | None = None
+            Если событие установлено (в том числе из самого method), ещё не начатые
+            чанки отменяются, их результат - None
+
+        :return: list
+            Результаты method для каждого чанка
+        """
+
+        if max_workers is None:
+            # Значение по умолчанию ThreadPoolExecutor
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        self._pool_workers = max_workers
+
+        results: list = [None] * len(chunked_array)
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures: dict[Future, int] = {
+                executor.submit(method, chunk): index for index, chunk in enumerate(chunked_array)
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(
+                    pending,
+                    timeout=0.1 if cancel_event is not None else None,
+                    return_when=FIRST_EXCEPTION,
+                )
+                if cancel_event is not None and cancel_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                    executor.shutdown(wait=True)
+                    done |= {future for future in pending if not future.cancelled()}
+                    pending = set()
+                for future in done:
+                    exception = future.exception()
+                    if exception is None:
+                        results[futures[future]] = future.result()
+                    elif return_exceptions:
+                        results[futures[future]] = exception
+                    else:
+                        raise exception
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return results
+
     @staticmethod
     def _calculate_random_cookies_headers_index(
         cookies: list[dict] | dict, headers: list[dict] | dict
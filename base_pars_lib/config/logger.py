@@ -1,53 +1,90 @@
-import inspect
+import atexit
 import logging
-from datetime import datetime
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - message: %(message)s")
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(funcName)s - message: %(message)s"
+)
 
+# Логи парсеров пишутся логгером base_pars_lib (передаёт записи обработчикам root),
+# а при print_logs=True - логгером base_pars_lib.print в stdout, как раньше печатались принтами.
+# Имя функции парсера, из которой пришёл лог, logging берёт сам через stacklevel=2,
+# сообщения форматируются только если уровень INFO включён
+logger = logging.getLogger("base_pars_lib")
+print_logger = logging.getLogger("base_pars_lib.print")
+print_logger.propagate = False
+# Уровень задан явно, чтобы print_logs=True печатал логи, даже если у root уровень выше INFO
+print_logger.setLevel(logging.INFO)
 
-def backoff_exception(ex: Exception, iteration: int, print_logs: bool, url: str = "") -> None:
-    func_name = __get_caller_name()
+_print_handler = logging.StreamHandler(sys.stdout)
+_print_handler.setFormatter(logging.Formatter("%(asctime)s - info - %(funcName)s - %(message)s"))
+print_logger.addHandler(_print_handler)
 
-    if print_logs:
-        print(f"{datetime.now()} - info - {func_name} - {ex}: iter {iteration}: url {url}")
-    else:
-        logging.info(f"{func_name} - {ex}: iter {iteration}: url {url}")
+_queue_listeners: list[tuple[logging.Logger, QueueHandler, QueueListener]] = []
 
 
-def backoff_status_code(status_code: int, iteration: int, url: str, print_logs: bool) -> None:
-    func_name = __get_caller_name()
+def backoff_exception(ex: Exception, iteration: int, print_logs: bool, url: str = "") -> None:
+    _get_logger(print_logs).info("%s: iter %s: url %s", ex, iteration, url, stacklevel=2)
 
-    if print_logs:
-        print(
-            f"{datetime.now()} - "
-            f"info - {func_name} - {status_code}: "
-            f"iter {iteration}: "
-            f"url {url}"
-        )
-    else:
-        logging.info(f"{func_name} - {status_code}: iter {iteration}: url {url}")
+
+def backoff_status_code(status_code: int, iteration: int, url: str, print_logs: bool) -> None:
+    _get_logger(print_logs).info("%s: iter %s: url %s", status_code, iteration, url, stacklevel=2)
 
 
 def info_log(message: str, print_logs: bool) -> None:
-    func_name = __get_caller_name()
+    _get_logger(print_logs).info("%s", message, stacklevel=2)
+
+
+def enable_queue_logging() -> None:
+    """
+    Переводит логи парсеров на очередь: вызов лога только кладёт запись в очередь,
+    а запись в stdout / файлы делает отдельный поток QueueListener, поэтому медленный
+    вывод логов не блокирует событийный цикл. Обработчики берутся текущие:
+    вызывайте после настройки logging. Повторный вызов ничего не делает
+    """
+
+    if _queue_listeners:
+        return
+
+    for lib_logger in (logger, print_logger):
+        if lib_logger.propagate:
+            handlers = list(logging.getLogger().handlers)
+        else:
+            handlers = list(lib_logger.handlers)
+        for handler in handlers:
+            if handler in lib_logger.handlers:
+                lib_logger.removeHandler(handler)
+
+        queue_handler = QueueHandler(queue.SimpleQueue())
+        listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        lib_logger.addHandler(queue_handler)
+        listener.start()
+        _queue_listeners.append((lib_logger, queue_handler, listener))
+
+    logger.propagate = False
+
 
-    if print_logs:
-        print(f"{datetime.now()} - info - {func_name} - {message}")
-    else:
-        logging.info(f"{func_name} - {message}")
+def disable_queue_logging() -> None:
+    """
+    Останавливает поток записи логов (дописав записи из очереди)
+    и возвращает обработчики, которые были до enable_queue_logging
+    """
 
+    while _queue_listeners:
+        lib_logger, queue_handler, listener = _queue_listeners.pop()
+        listener.stop()
+        lib_logger.removeHandler(queue_handler)
+        if lib_logger is logger:
+            lib_logger.propagate = True
+        else:
+            for handler in listener.handlers:
+                lib_logger.addHandler(handler)
 
-def __get_caller_name() -> str:
-    current_frame = inspect.currentframe()
-    if current_frame is None:
-        return ""
 
-    caller_frame = current_frame.f_back
-    if caller_frame is None:
-        return ""
+def _get_logger(print_logs: bool) -> logging.Logger:
+    return print_logger if print_logs else logger
 
-    caller_caller_frame = caller_frame.f_back
-    if caller_caller_frame is None:
-        return ""
 
-    return caller_caller_frame.f_code.co_name
+atexit.register(disable_queue_logging)
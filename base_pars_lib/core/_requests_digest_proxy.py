@@ -1,8 +1,8 @@
 # type: ignore
 
 """
-Переопределяет методы библиотеки requests,
-реализует правильную работу ротационного прокси
+Реализует правильную работу ротационного прокси в requests: авторизацию HTTPProxyDigestAuth
+и транспорт HTTPProxyDigestAdapter, который подключается только к нужным сессиям
 """
 
 
@@ -93,40 +93,6 @@ class HTTPProxyDigestAuth(requests.auth.HTTPDigestAuth):
         return r
 
 
-def hook(cls, name=None):
-    def decorator(func):
-        import functools
-
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            return func(original, *args, **kwargs)
-
-        if name is None:
-            g = globals()
-            original = g[cls]
-            g[cls] = wrapper
-        else:
-            def dummy(*args, **kwargs):
-                pass
-
-            original = getattr(cls, name, dummy)
-            setattr(cls, name, wrapper)
-
-        return wrapper
-
-    return decorator
-
-
-def hook_trace(cls, name=None):
-    path = cls if name is None else (cls.__name__ + '.' + name)
-
-    def print_trace(original, *args, **kwargs):
-        dbg_print('TRACE<%s>', path)
-        return original(*args, **kwargs)
-
-    hook(cls, name)(print_trace)
-
-
 class ProxyError(RuntimeError):
     pass
 
@@ -165,72 +131,131 @@ class BufferedHTTPResponse(httplib.HTTPResponse):
         return True
 
 
-@hook(httplib.HTTPConnection, '_tunnel')
-def HTTPConnection__tunnel_hook(original, self, *args, **kwargs):
-    resp = [None]
+class ProxyDigestConnectionMixin(object):
+    """
+    Туннель CONNECT, который при ответе прокси 407 не бросает ошибку, а отдаёт его
+    как обычный ответ, чтобы HTTPProxyDigestAuth повторил запрос с Proxy-Authorization
+    """
 
-    def resp_builder(*args, **kwargs):
-        dbg_print('HTTPProxyResponse.__init__')
-        resp[0] = r = HTTPProxyResponse(*args, **kwargs)
-        return r
+    _status_line = None
 
-    response_class = self.response_class
-    self.response_class = resp_builder
+    def _tunnel(self, *args, **kwargs):
+        resp = [None]
 
-    try:
-        original(self, *args, **kwargs)
-    finally:
-        resp = resp[0]
-        if resp is not None and resp._status_line is not None:
-            self._status_line = resp._status_line
+        def resp_builder(*args, **kwargs):
+            dbg_print('HTTPProxyResponse.__init__')
+            resp[0] = r = HTTPProxyResponse(*args, **kwargs)
+            return r
 
-        self.response_class = response_class
+        response_class = self.response_class
+        self.response_class = resp_builder
 
+        try:
+            super(ProxyDigestConnectionMixin, self)._tunnel(*args, **kwargs)
+        finally:
+            resp = resp[0]
+            if resp is not None and resp._status_line is not None:
+                self._status_line = resp._status_line
 
-@hook(urllib3.connection.HTTPSConnection, 'connect')
-def urllib3_connection_HTTPSConnection_connect_hook(original, self, *args, **kwargs):
-    # Reset
-    self._status_line = None
+            self.response_class = response_class
 
-    try:
-        original(self, *args, **kwargs)
-    except ProxyError as e:
-        dbg_print("ProxyError")
-        self.is_verified = True
+    def send(self, *args, **kwargs):
+        if self._status_line is not None:
+            dbg_print("send(%d)", len(args[0]))
+        else:
+            return super(ProxyDigestConnectionMixin, self).send(*args, **kwargs)
 
-        def resp_builder(*args, **kwargs):
-            dbg_print('BufferedHTTPResponse.__init__')
-            r = BufferedHTTPResponse(*args, **kwargs)
-            r._status_line = self._status_line
-            self.response_class = response_class
-            return r
 
-        response_class = self.response_class
-        self.response_class = resp_builder
+class ProxyDigestHTTPConnection(ProxyDigestConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class ProxyDigestHTTPSConnection(ProxyDigestConnectionMixin, urllib3.connection.HTTPSConnection):
+    def connect(self, *args, **kwargs):
+        # Reset
+        self._status_line = None
+
+        try:
+            super(ProxyDigestHTTPSConnection, self).connect(*args, **kwargs)
+        except ProxyError:
+            dbg_print("ProxyError")
+            self.is_verified = True
+
+            def resp_builder(*args, **kwargs):
+                dbg_print('BufferedHTTPResponse.__init__')
+                r = BufferedHTTPResponse(*args, **kwargs)
+                r._status_line = self._status_line
+                self.response_class = response_class
+                return r
+
+            response_class = self.response_class
+            self.response_class = resp_builder
+
+
+class ProxyDigestPoolMixin(object):
+    """
+    Переносит Proxy-Authorization из заголовков запроса в заголовки прокси,
+    чтобы они отправлялись и в CONNECT
+    """
+
+    def urlopen(self, *args, **kwargs):
+        headers = kwargs.get('headers', self.headers)
+        for (name, value) in list(headers.items()):
+            if name.lower() == 'proxy-authorization':
+                del headers[name]
+                self.proxy_headers[name] = value
+                dbg_print("<PROXY> %s: %s", name, value)
+
+        return super(ProxyDigestPoolMixin, self).urlopen(*args, **kwargs)
+
+
+class ProxyDigestHTTPConnectionPool(ProxyDigestPoolMixin, urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = ProxyDigestHTTPConnection
+
+
+class ProxyDigestHTTPSConnectionPool(
+    ProxyDigestPoolMixin, urllib3.connectionpool.HTTPSConnectionPool
+):
+    ConnectionCls = ProxyDigestHTTPSConnection
+
+
+PROXY_DIGEST_POOL_CLASSES = {
+    'http': ProxyDigestHTTPConnectionPool,
+    'https': ProxyDigestHTTPSConnectionPool,
+}
+
 
+class HTTPProxyDigestAdapter(requests.adapters.HTTPAdapter):
+    """
+    Транспорт requests для авторизации в прокси (HTTPProxyDigestAuth, HTTPProxyAuth),
+    в том числе в туннеле CONNECT для https. Действует только на сессии,
+    в которые смонтирован (mount_proxy_digest_adapter), остальные запросы процесса
+    идут через обычные классы urllib3
+    """
 
-@hook(urllib3.connection.HTTPConnection, 'send')
-def urllib3_connection_HTTPConnection_send_hook(original, self, *args, **kwargs):
-    if self._status_line is not None:
-        dbg_print("send(%d)", len(args[0]))
-        pass
-    else:
-        return original(self, *args, **kwargs)
+    def init_poolmanager(self, *args, **kwargs):
+        super(HTTPProxyDigestAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = PROXY_DIGEST_POOL_CLASSES
 
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super(HTTPProxyDigestAdapter, self).proxy_manager_for(proxy, **proxy_kwargs)
+        if isinstance(manager, urllib3.ProxyManager):
+            manager.pool_classes_by_scheme = PROXY_DIGEST_POOL_CLASSES
+        return manager
 
-@hook(urllib3.connection.HTTPConnection, '__init__')
-def urllib3_connection_HTTPConnection___init___hook(original, self, *args, **kwargs):
-    self._status_line = None
-    return original(self, *args, **kwargs)
 
+def mount_proxy_digest_adapter(session, adapter=None):
+    """
+    Монтирует HTTPProxyDigestAdapter в сессию для http:// и https://
 
-@hook(urllib3.connectionpool.HTTPConnectionPool, 'urlopen')
-def urllib3_connectionpool_HTTPConnectionPool_urlopen_hook(original, self, *args, **kwargs):
-    headers = kwargs.get('headers', self.headers)
-    for (name, value) in list(headers.items()):
-        if name.lower() == 'proxy-authorization':
-            del headers[name]
-            self.proxy_headers[name] = value
-            dbg_print("<PROXY> %s: %s", name, value)
+    :param session: requests.Session
+    :param adapter: HTTPProxyDigestAdapter = None
+        Адаптер, если нужны свои pool_connections / pool_maxsize
+    :return:
+        session
+    """
 
-    return original(self, *args, **kwargs)
+    adapter = adapter or HTTPProxyDigestAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
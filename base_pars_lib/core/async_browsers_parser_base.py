@@ -4,11 +4,12 @@ import asyncio
 from dataclasses import dataclass
 from typing import Any, Callable, Literal
 
-from fake_useragent import UserAgent
 from playwright.async_api import Page
 from zendriver.core.tab import Tab
 
 from base_pars_lib.config import logger
+from base_pars_lib.core.crawl_checkpoint import CrawlCheckpoint
+from base_pars_lib.core.user_agents import get_user_agent_pool
 
 
 @dataclass
@@ -20,20 +21,13 @@ class JsResponse:
 
 class AsyncBrowsersParserBase:
     def __init__(self) -> None:
-        self.user_agent = UserAgent()
+        self.user_agent = get_user_agent_pool()
 
         self.debug = False
         self.print_logs = False
 
     async def _get_pc_user_agent(self) -> str:
-        while True:
-            user_agent = self.user_agent.random
-            if (
-                "Android" not in user_agent
-                and "iPhone" not in user_agent
-                and "iPad" not in user_agent
-            ):
-                return user_agent
+        return self.user_agent.pc
 
     async def _make_js_script(
         self,
@@ -110,7 +104,10 @@ class AsyncBrowsersParserBase:
 
     @staticmethod
     async def _method_in_series(
-        chunked_array: list | tuple, async_method: Callable, sleep_time: int = 0
+        chunked_array: list | tuple,
+        async_method: Callable,
+        sleep_time: int = 0,
+        checkpoint: CrawlCheckpoint | None = None,
     ) -> None:
         """
         Выполняет метод method для каждого чанка последовательно
@@ -124,13 +121,21 @@ class AsyncBrowsersParserBase:
             и сохраняет результаты во внешний массив
         :param sleep_time: int = 0
             Задержка между чанками запросов
+        :param checkpoint: CrawlCheckpoint | None = None
+            Хранилище прогресса: после каждого чанка сохраняется его номер,
+            при повторном запуске обработанные чанки пропускаются
 
         :return:
             None
         """
 
-        for chunk in chunked_array:
+        # Запросы к SQLite выполняются в потоке, чтобы не блокировать цикл событий
+        for index, chunk in enumerate(chunked_array):
+            if checkpoint is not None and await asyncio.to_thread(checkpoint.is_done, index, chunk):
+                continue
             await async_method(chunk)
+            if checkpoint is not None:
+                await asyncio.to_thread(checkpoint.mark_done, index, chunk)
             await asyncio.sleep(sleep_time)
 
     @staticmethod
@@ -1,5 +1,12 @@
 import asyncio
+import codecs
+import heapq
+import json as json_module
 import random
+import re
+from collections.abc import AsyncIterator, Awaitable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from contextvars import ContextVar
 from dataclasses import dataclass
 from http import HTTPStatus
 from typing import Any, Callable
@@ -7,14 +14,146 @@ from typing import Any, Callable
 from curl_cffi.requests.models import Response
 
 from base_pars_lib.config import logger
+from base_pars_lib.core.bad_urls import BadUrls
+from base_pars_lib.core.crawl_checkpoint import CrawlCheckpoint
+from base_pars_lib.core.host_rate_limiter import HostRateLimiter, HostSlot
+from base_pars_lib.core.json_backends import JsonLoads
+from base_pars_lib.core.metrics import RequestHooks
+from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+from base_pars_lib.core.session_affinity import SessionAffinity
+
+_JSON_CONTENT_TYPE_RE = re.compile(r"^application/(?:[\w.+-]+?\+)?json")
+_NOT_DECODED: Any = object()
+
+# Если задан список, _backoff_sleep не ждёт, а записывает в него задержку
+# (используется планировщиком повторов, см. _iter_with_retry_queue)
+_deferred_backoff_delays: ContextVar[list[float] | None] = ContextVar(
+    "_deferred_backoff_delays", default=None
+)
 
 
-@dataclass
 class AiohttpResponse:
-    text: str
-    json: dict | None
-    url: str
-    status_code: int
+    """
+    Ответ aiohttp. Тело хранится один раз в виде байтов (content), а text и json
+    декодируются при первом обращении и кэшируются, поэтому ответы, у которых нужен только
+    статус-код или только json, не декодируются лишний раз
+
+    Если передать text и json без content (как раньше), они используются как есть
+    """
+
+    def __init__(
+        self,
+        text: str | None = None,
+        json: Any = None,
+        url: str = "",
+        status_code: int = 0,
+        content: bytes | None = None,
+        encoding: str = "utf-8",
+        content_type: str = "",
+        json_loads: JsonLoads = json_module.loads,
+    ) -> None:
+        """
+        :param text: str | None = None
+            Текст ответа, если ответ создаётся без content
+        :param json: Any = None
+            json ответа, если ответ создаётся без content
+        :param url: str = ""
+            Ссылка ответа
+        :param status_code: int = 0
+            Статус-код ответа
+        :param content: bytes | None = None
+            Тело ответа. Если передано, text и json декодируются из него при первом обращении
+        :param encoding: str = "utf-8"
+            Кодировка тела ответа
+        :param content_type: str = ""
+            MIME-тип ответа, json декодируется только для application/json (как в aiohttp)
+        :param json_loads: JsonLoads = json.loads
+            Функция разбора json (см. core.json_backends.get_json_loads)
+        """
+
+        self.url = url
+        self.status_code = status_code
+        self.encoding = encoding
+        self.content_type = content_type
+        self.json_loads = json_loads
+
+        self._content = content
+        if content is None:
+            self._text = text
+            self._json = json
+        else:
+            self._text = _NOT_DECODED
+            self._json = _NOT_DECODED
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = (self._text or "").encode(self.encoding)
+        return self._content
+
+    @property
+    def text(self) -> str:
+        if self._text is _NOT_DECODED:
+            try:
+                self._text = self.content.decode(self.encoding)
+            except UnicodeDecodeError as Ex:
+                self._text = f"Encoding error: {Ex}"
+        return self._text  # type: ignore[return-value]
+
+    @text.setter
+    def text(self, value: str) -> None:
+        self._text = value
+
+    @property
+    def json(self) -> Any:
+        """
+        json ответа или None, если ответ не application/json, пустой или не является json
+        """
+
+        if self._json is _NOT_DECODED:
+            self._json = self.__decode_json()
+        return self._json
+
+    @json.setter
+    def json(self, value: Any) -> None:
+        self._json = value
+
+    def __decode_json(self) -> Any:
+        if not _JSON_CONTENT_TYPE_RE.match(self.content_type.lower()):
+            return None
+        stripped = self.content.strip()
+        if not stripped:
+            return None
+        try:
+            if codecs.lookup(self.encoding).name == "utf-8":
+                # Быстрые библиотеки разбирают utf-8 байты без создания промежуточной строки
+                return self.json_loads(stripped)
+            return self.json_loads(stripped.decode(self.encoding))
+        except (ValueError, LookupError):
+            return None
+
+    def __repr__(self) -> str:
+        return f"AiohttpResponse(url={self.url!r}, status_code={self.status_code})"
+
+
+@dataclass
+class _InFlightRequest:
+    """
+    Выполняющийся запрос, результат которого ждут все одинаковые запросы (см. _single_flight)
+    """
+
+    future: asyncio.Future
+    waiters: int = 0
+
+
+@dataclass
+class _PendingResult:
+    """
+    Результат попытки для _iter_with_retry_queue: задача завершится результатом awaitable,
+    но место в пуле освобождается сразу
+    """
+
+    awaitable: Awaitable
 
 
 class AsyncRequestsParserBase:
@@ -23,7 +162,20 @@ class AsyncRequestsParserBase:
 
         self.print_logs: bool = False
 
-        self.bad_urls: list[Any] = []
+        self.bad_urls = BadUrls()
+
+        self.json_loads: JsonLoads = json_module.loads
+
+        self.rate_limiter: HostRateLimiter | None = None
+
+        self.session_affinity: SessionAffinity | None = None
+
+        self.response_cache: ResponseCache | None = None
+
+        self.hooks: RequestHooks = RequestHooks()
+
+        self.single_flight: bool = False
+        self._in_flight: dict[str, _InFlightRequest] = {}
 
     # TODO: Переписать под паттерн цепочка обязанностей
     #  (https://refactoring.guru/ru/design-patterns/chain-of-responsibility)
@@ -59,16 +211,12 @@ class AsyncRequestsParserBase:
                 logger.info_log(f"response is None, iter: {iteration}, {url}", self.print_logs)
             if save_bad_urls:
                 await self._append_to_bad_urls(url)
-            await asyncio.sleep(iteration * increase_by_seconds)
+            await self._backoff_sleep(iteration * increase_by_seconds, url)
             return False, None
 
         if response.status_code == HTTPStatus.OK:
             if check_page is not None:
-                if check_page_args is not None:
-                    check_page_status = await check_page(response, **check_page_args)
-                else:
-                    check_page_status = await check_page(response)
-                if check_page_status:
+                if await self._check_page(response, check_page, check_page_args):
                     if save_bad_urls:
                         await self._delete_from_bad_urls(url)
                     return True, response
@@ -77,14 +225,14 @@ class AsyncRequestsParserBase:
                         logger.info_log(
                             f"check_page returned False, iter: {iteration}, {url}", self.print_logs
                         )
-                        await asyncio.sleep(iteration * increase_by_seconds)
+                        await self._backoff_sleep(iteration * increase_by_seconds, url)
                     return False, response
             else:
                 if save_bad_urls:
                     await self._delete_from_bad_urls(url)
                 return True, response
         if save_bad_urls and response.status_code not in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE):
-            await self._append_to_bad_urls(url)
+            await self._append_to_bad_urls(url, status_code=response.status_code)
         if (
                 response.status_code in (HTTPStatus.NOT_FOUND, HTTPStatus.GONE)
                 and (ignore_404 or ignore_410)
@@ -97,23 +245,364 @@ class AsyncRequestsParserBase:
             iteration_for_50x += 1
             if self.debug:
                 logger.backoff_status_code(response.status_code, iteration, url, self.print_logs)
-            await asyncio.sleep(iteration * increase_by_minutes_for_50x_errors * 60)
+            await self._backoff_sleep(iteration * increase_by_minutes_for_50x_errors * 60, url)
             return False, None
 
         if response.status_code != HTTPStatus.OK:
             if self.debug:
                 logger.backoff_status_code(response.status_code, iteration, url, self.print_logs)
-            await asyncio.sleep(iteration * increase_by_seconds)
+            await self._backoff_sleep(iteration * increase_by_seconds, url)
 
         return False, None
 
-    async def _append_to_bad_urls(self, url: Any) -> None:
-        if url not in self.bad_urls:
-            self.bad_urls.append(url)
+    @staticmethod
+    async def _check_page(
+        response: AiohttpResponse | Response,
+        check_page: Callable | None,
+        check_page_args: dict | None,
+    ) -> bool:
+        """
+        :return: bool
+            Результат check_page для ответа. Если check_page не передан - True
+        """
+
+        if check_page is None:
+            return True
+        if check_page_args is not None:
+            return bool(await check_page(response, **check_page_args))
+        return bool(await check_page(response))
+
+    @staticmethod
+    def _is_response_accepted(
+        response: None | AiohttpResponse | Response,
+        is_cycle_end: bool,
+        iteration: int,
+        iter_count: int,
+        check_page: Callable | None,
+    ) -> bool:
+        """
+        Принят ли ответ _check_response: код 200 и check_page вернул True.
+        На последней попытке _check_response возвращает ответ без check_page,
+        поэтому такой ответ с check_page не считается принятым
+        """
+
+        return (
+            is_cycle_end
+            and response is not None
+            and response.status_code == HTTPStatus.OK
+            and (check_page is None or iteration < iter_count)
+        )
+
+    async def _get_cached_response(self, cache_key: str | None) -> CachedResponse | None:
+        """
+        Ответ из self.response_cache по ключу или None. Запросы к SQLite выполняются в потоке,
+        чтобы не блокировать цикл событий
+        """
+
+        if self.response_cache is None or cache_key is None:
+            return None
+        return await asyncio.to_thread(self.response_cache.get, cache_key)
+
+    async def _delete_cached_response(self, cache_key: str | None) -> None:
+        if self.response_cache is not None and cache_key is not None:
+            await asyncio.to_thread(self.response_cache.delete, cache_key)
+
+    async def _update_response_cache(
+        self,
+        cache_key: str | None,
+        response: None | AiohttpResponse | Response,
+        headers: dict[str, str],
+        is_accepted: bool,
+        is_from_cache: bool,
+    ) -> None:
+        """
+        Обновляет self.response_cache после проверки ответа (_check_response и check_page),
+        поэтому страница, которую не принял check_page (например, капча), не попадает в кэш
+
+        :param cache_key: str | None
+            Ключ ответа в кэше (см. _get_response_cache_key)
+        :param response: None | AiohttpResponse | Response
+            Ответ
+        :param headers: dict[str, str]
+            Заголовки ответа
+        :param is_accepted: bool
+            Принят ли ответ (см. _is_response_accepted)
+        :param is_from_cache: bool
+            Ответ взят из кэша после ответа 304. Принятый ответ снова становится свежим,
+            непринятый удаляется из кэша
+        """
+
+        if self.response_cache is None or cache_key is None or response is None:
+            return
+        if is_from_cache:
+            if is_accepted:
+                await asyncio.to_thread(self.response_cache.revalidate, cache_key)
+            else:
+                await asyncio.to_thread(self.response_cache.delete, cache_key)
+        elif is_accepted:
+            await asyncio.to_thread(
+                self.response_cache.set,
+                cache_key,
+                url=str(response.url),
+                status_code=response.status_code,
+                content=response.content,
+                headers=headers,
+            )
+
+    def _host_slot(self, url: str) -> AbstractAsyncContextManager[HostSlot]:
+        """
+        Место для запроса к хосту ссылки из self.rate_limiter.
+        Если лимитер не задан, место выдаётся сразу
+        """
+
+        if self.rate_limiter is None:
+            return nullcontext(HostSlot(url))
+        return self.rate_limiter.slot(url)
+
+    def _update_session_affinity(self, url: str, is_success: bool, **params: Any) -> None:
+        """
+        Закрепляет параметры запроса за ссылкой в self.session_affinity, если запрос успешен,
+        иначе открепляет их. Если session_affinity не задан, ничего не делает
+        """
+
+        if self.session_affinity is None:
+            return
+        if is_success:
+            self.session_affinity.pin(url, params)
+        else:
+            self.session_affinity.unpin(url)
+
+    @staticmethod
+    def _get_request_key(url: str, params: dict) -> str:
+        """
+        Ключ запроса по методу, ссылке, query-параметрам и телу запроса.
+        Прокси, заголовки и куки в ключ не входят
+        """
+
+        body = {name: params[name] for name in ("params", "data", "json") if params.get(name)}
+        return ResponseCache.make_key(params.get("method", "GET"), url, body or None)
+
+    def _get_response_cache_key(self, url: str, params: dict) -> str | None:
+        """
+        Ключ ответа в self.response_cache (см. _get_request_key). Если кэш не задан - None
+        """
+
+        if self.response_cache is None:
+            return None
+        return self._get_request_key(url, params)
+
+    def _get_in_flight(self, key: str) -> _InFlightRequest | None:
+        """
+        Выполняющийся запрос с тем же ключом или None. Если single_flight выключен - всегда None
+        """
+
+        if not self.single_flight:
+            return None
+        return self._in_flight.get(key)
+
+    def _lead_in_flight(self, key: str, future: asyncio.Future) -> _InFlightRequest:
+        """
+        Регистрирует запрос с ключом key как выполняющийся: пока future не завершён,
+        одинаковые запросы ждут его результат (_wait_in_flight), а не отправляются сами
+        """
+
+        in_flight = self._in_flight[key] = _InFlightRequest(future)
+
+        def forget(done_future: asyncio.Future) -> None:
+            if self._in_flight.get(key) is in_flight:
+                del self._in_flight[key]
+            if not done_future.cancelled():
+                # Ошибку получат ожидающие запросы, если они есть
+                done_future.exception()
+
+        future.add_done_callback(forget)
+        return in_flight
+
+    @staticmethod
+    async def _wait_in_flight(in_flight: _InFlightRequest) -> Any:
+        """
+        Ждёт результат выполняющегося запроса. Отмена одного из ожидающих не отменяет запрос,
+        запрос отменяется, только если его больше никто не ждёт
+        """
+
+        in_flight.waiters += 1
+        try:
+            return await asyncio.shield(in_flight.future)
+        except asyncio.CancelledError:
+            if in_flight.waiters == 1 and not in_flight.future.done():
+                in_flight.future.cancel()
+            raise
+        finally:
+            in_flight.waiters -= 1
+
+    @staticmethod
+    def _finish_in_flight(
+        future: asyncio.Future | None, result: Any = None, exception: BaseException | None = None
+    ) -> None:
+        """
+        Передаёт результат или ошибку запроса, зарегистрированного в _lead_in_flight,
+        ожидающим его одинаковым запросам
+        """
+
+        if future is None or future.done():
+            return
+        if isinstance(exception, asyncio.CancelledError):
+            future.cancel()
+        elif exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    async def _single_flight(self, key: str, make_coroutine: Callable[[], Awaitable]) -> Any:
+        """
+        Если single_flight включен и запрос с тем же ключом уже выполняется (в этом же или
+        в параллельном вызове _make_backoff_request), ждёт его и возвращает тот же ответ,
+        иначе выполняет make_coroutine()
+
+        :param key: str
+            Ключ запроса (см. _get_request_key)
+        :param make_coroutine: Callable[[], Awaitable]
+            Функция, которая создаёт корутину запроса
+        """
+
+        if not self.single_flight:
+            return await make_coroutine()
+        in_flight = self._get_in_flight(key)
+        if in_flight is None:
+            in_flight = self._lead_in_flight(key, asyncio.ensure_future(make_coroutine()))
+        return await self._wait_in_flight(in_flight)
+
+    def _single_flight_attempts(
+        self,
+        prepare_attempts: Callable[[int], Awaitable[tuple[str, Any]]],
+        run_attempt: Callable[[Any, int], Awaitable[tuple[bool, Any]]],
+        iter_count: int,
+    ) -> Callable[[int, int], Awaitable[tuple[bool, Any, float]]]:
+        """
+        Создаёт функцию одной попытки запроса для планировщика повторов
+        (_iter_with_retry_queue). Если single_flight включен и такой же запрос уже выполняется,
+        задача получает его ответ, а не отправляет запрос сама
+
+        :param prepare_attempts: Callable[[int], Awaitable[tuple[str, Any]]]
+            Функция, которая по индексу задачи формирует параметры запроса перед первой
+            попыткой и возвращает кортеж (ключ запроса (см. _get_request_key), параметры попыток)
+        :param run_attempt: Callable[[Any, int], Awaitable[tuple[bool, Any]]]
+            Функция, которая по параметрам попыток и номеру попытки создаёт корутину попытки,
+            возвращающую кортеж (завершён ли цикл попыток, ответ)
+        :param iter_count: int
+            Количество попыток
+
+        :return: Callable[[int, int], Awaitable[tuple[bool, Any, float]]]
+            Функция попытки по индексу задачи и номеру попытки (см. _iter_with_retry_queue)
+        """
+
+        # Параметры запросов, которые ждут повторной попытки в планировщике повторов
+        attempts_params: dict[int, Any] = {}
+        # Запросы, результат которых ждут одинаковые запросы (single_flight)
+        leaders: dict[int, asyncio.Future] = {}
+
+        async def make_attempt(i: int, attempt: int) -> tuple[bool, Any, float]:
+            if attempt == 1:
+                request_key, attempts_params[i] = await prepare_attempts(i)
+                in_flight = self._get_in_flight(request_key)
+                if in_flight is not None:
+                    # Такой же запрос уже выполняется - ждём его ответ вне пула: иначе, если
+                    # все места заняты ожидающими, отложенный повтор этого запроса
+                    # некому выполнить
+                    del attempts_params[i]
+                    return True, _PendingResult(self._wait_in_flight(in_flight)), 0.0
+                if self.single_flight:
+                    leaders[i] = asyncio.get_running_loop().create_future()
+                    self._lead_in_flight(request_key, leaders[i])
+
+            try:
+                (is_cycle_end, response), delay = await self._collect_backoff_delay(
+                    run_attempt(attempts_params[i], attempt)
+                )
+            except BaseException as Ex:
+                self._finish_in_flight(leaders.pop(i, None), exception=Ex)
+                raise
+            if is_cycle_end or attempt >= iter_count:
+                del attempts_params[i]
+                result = response if is_cycle_end else None
+                self._finish_in_flight(leaders.pop(i, None), result)
+                return True, result, 0.0
+            return False, None, delay
+
+        return make_attempt
+
+    @staticmethod
+    async def _sleep_random_time(random_sleep_time_every_request: list | bool) -> None:
+        """
+        Случайная задержка перед запросом из random_sleep_time_every_request, если он передан
+        """
+
+        if random_sleep_time_every_request:
+            await asyncio.sleep(
+                random.uniform(
+                    random_sleep_time_every_request[0],  # type: ignore[index]
+                    random_sleep_time_every_request[1],  # type: ignore[index]
+                )
+            )
+
+    async def _backoff_sleep(self, seconds: float, url: str = "") -> None:
+        """
+        Задержка перед повторной попыткой запроса. Если попытка выполняется планировщиком
+        повторов (_iter_with_retry_queue), задержка не выполняется, а передаётся планировщику
+        """
+
+        self.hooks.on_backoff_sleep(url, seconds)
+        deferred_delays = _deferred_backoff_delays.get()
+        if deferred_delays is None:
+            await asyncio.sleep(seconds)
+        else:
+            deferred_delays.append(seconds)
+
+    @staticmethod
+    async def _collect_backoff_delay(attempt: Awaitable) -> tuple[Any, float]:
+        """
+        Выполняет попытку запроса, не ожидая задержек _backoff_sleep внутри неё
+
+        :param attempt: Awaitable
+            Корутина попытки запроса
+        :return: tuple[Any, float]
+            Результат попытки и суммарная задержка перед следующей попыткой в секундах
+        """
+
+        delays: list[float] = []
+        token = _deferred_backoff_delays.set(delays)
+        try:
+            result = await attempt
+        finally:
+            _deferred_backoff_delays.reset(token)
+        return result, sum(delays)
+
+    def _response_json(self, response: None | AiohttpResponse | Response) -> Any:
+        """
+        Разбирает json из ответа функцией self.json_loads (задаётся параметром json_backend)
+
+        :param response: None | AiohttpResponse | Response
+            Ответ из _make_backoff_request
+        :return:
+            json ответа или None, если ответа нет или тело ответа не является json
+        """
+
+        if response is None:
+            return None
+        if isinstance(response, AiohttpResponse):
+            return response.json
+        try:
+            return self.json_loads(response.content)
+        except ValueError:
+            return None
+
+    async def _append_to_bad_urls(
+        self, url: Any, status_code: int | None = None, exception: BaseException | None = None
+    ) -> None:
+        self.bad_urls.add(url, status_code=status_code, exception=exception)
 
     async def _delete_from_bad_urls(self, url: Any) -> None:
-        if url in self.bad_urls:
-            self.bad_urls.remove(url)
+        self.bad_urls.discard(url)
 
     async def _get_by_random_index(
         self, item: list[dict] | dict, random_index: int, item_name: str
@@ -124,9 +613,12 @@ class AsyncRequestsParserBase:
                 logger.info_log(f"{item_name} index: {random_index}", self.print_logs)
         return item  # type: ignore[return-value]
 
-    @staticmethod
     async def _method_in_series(
-        chunked_array: list | tuple, async_method: Callable, sleep_time: int = 0
+        self,
+        chunked_array: list | tuple,
+        async_method: Callable,
+        sleep_time: int = 0,
+        checkpoint: CrawlCheckpoint | None = None,
     ) -> None:
         """
         Выполняет метод method для каждого чанка последовательно
@@ -140,15 +632,226 @@ class AsyncRequestsParserBase:
             и сохраняет результаты во внешний массив
         :param sleep_time: int = 0
             Задержка между чанками запросов
+        :param checkpoint: CrawlCheckpoint | None = None
+            Хранилище прогресса: после каждого чанка сохраняются его номер и self.bad_urls,
+            при повторном запуске обработанные чанки пропускаются, а пустой self.bad_urls
+            восстанавливается из хранилища
 
         :return:
             None
         """
 
-        for chunk in chunked_array:
+        # Запросы к SQLite выполняются в потоке, чтобы не блокировать цикл событий
+        if checkpoint is not None and not self.bad_urls:
+            self.bad_urls.update(await asyncio.to_thread(checkpoint.load_bad_urls))
+        for index, chunk in enumerate(chunked_array):
+            if checkpoint is not None and await asyncio.to_thread(checkpoint.is_done, index, chunk):
+                continue
             await async_method(chunk)
+            if checkpoint is not None:
+                await asyncio.to_thread(checkpoint.mark_done, index, chunk, self.bad_urls)
             await asyncio.sleep(sleep_time)
 
+    @staticmethod
+    def _check_max_concurrency(max_concurrency: int | None) -> None:
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be >= 1 or None, got {max_concurrency}")
+
+    @staticmethod
+    async def _gather_in_pool(
+        tasks_count: int,
+        make_task: Callable[[int], Awaitable],
+        max_concurrency: int | None = None,
+    ) -> list:
+        """
+        Выполняет make_task(i) для каждого i из range(tasks_count) и возвращает результаты
+        в порядке индексов
+
+        :param tasks_count: int
+            Количество задач
+        :param make_task: Callable[[int], Awaitable]
+            Функция, которая по индексу создаёт корутину задачи.
+            Вызывается только в момент запуска задачи, поэтому корутины и параметры запросов
+            не создаются заранее для всего списка
+        :param max_concurrency: int | None = None
+            Максимальное количество одновременно выполняемых задач.
+            Если None, все задачи запускаются одновременно
+
+        :return: list
+            Результаты задач в порядке индексов
+        """
+
+        AsyncRequestsParserBase._check_max_concurrency(max_concurrency)
+        if max_concurrency is None:
+            return list(await asyncio.gather(*(make_task(i) for i in range(tasks_count))))
+
+        results: list = [None] * tasks_count
+        indexes = iter(range(tasks_count))
+
+        async def worker() -> None:
+            for i in indexes:
+                results[i] = await make_task(i)
+
+        await asyncio.gather(*(worker() for _ in range(min(max_concurrency, tasks_count))))
+        return results
+
+    @staticmethod
+    async def _iter_in_pool(
+        tasks_count: int,
+        make_task: Callable[[int], Awaitable],
+        max_concurrency: int | None = None,
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """
+        Выполняет make_task(i) для каждого i из range(tasks_count) и отдаёт пары (i, результат)
+        по мере завершения задач
+
+        :param tasks_count: int
+            Количество задач
+        :param make_task: Callable[[int], Awaitable]
+            Функция, которая по индексу создаёт корутину задачи.
+            Вызывается только в момент запуска задачи
+        :param max_concurrency: int | None = None
+            Максимальное количество одновременно выполняемых задач.
+            Если None, все задачи запускаются одновременно.
+            Пока результат не забран из итератора, новые задачи не запускаются, поэтому
+            в памяти одновременно находится не больше 2 * max_concurrency результатов
+
+        :return:
+            Асинхронный итератор кортежей (индекс задачи, результат)
+        """
+
+        AsyncRequestsParserBase._check_max_concurrency(max_concurrency)
+        workers_count = min(max_concurrency or tasks_count, tasks_count)
+        if not workers_count:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers_count)
+        indexes = iter(range(tasks_count))
+
+        async def worker() -> None:
+            for i in indexes:
+                try:
+                    result = await make_task(i)
+                except Exception as Ex:
+                    await queue.put((i, None, Ex))
+                    return
+                await queue.put((i, result, None))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(workers_count)]
+        try:
+            for _ in range(tasks_count):
+                i, result, exception = await queue.get()
+                if exception is not None:
+                    raise exception
+                yield i, result
+        finally:
+            for worker_task in workers:
+                worker_task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    @staticmethod
+    async def _iter_with_retry_queue(
+        tasks_count: int,
+        make_attempt: Callable[[int, int], Awaitable[tuple[bool, Any, float]]],
+        max_concurrency: int | None = None,
+    ) -> AsyncIterator[tuple[int, Any]]:
+        """
+        То же самое, что и _iter_in_pool, но задача выполняется по одной попытке.
+        Если попытка неудачна, задача откладывается в очередь с задержкой (куча по времени
+        следующей попытки), а освободившееся место сразу занимает отложенная задача, время
+        которой подошло, или новая задача. Так ожидание backoff не занимает место в пуле
+
+        :param tasks_count: int
+            Количество задач
+        :param make_attempt: Callable[[int, int], Awaitable[tuple[bool, Any, float]]]
+            Функция, которая по индексу задачи и номеру попытки (с 1) выполняет одну попытку
+            и возвращает кортеж (завершена ли задача, результат, задержка до следующей попытки).
+            Если результат - _PendingResult, задача завершится его результатом, а место
+            в пуле сразу занимает следующая задача
+        :param max_concurrency: int | None = None
+            Максимальное количество одновременно выполняемых попыток.
+            Если None, все задачи запускаются одновременно
+
+        :return:
+            Асинхронный итератор кортежей (индекс задачи, результат) по мере завершения задач
+        """
+
+        AsyncRequestsParserBase._check_max_concurrency(max_concurrency)
+        workers_count = min(max_concurrency or tasks_count, tasks_count)
+        if not workers_count:
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers_count)
+        indexes = iter(range(tasks_count))
+        delayed: list[tuple[float, int, int]] = []
+        pending: list[asyncio.Future] = []
+
+        async def wait_pending(i: int, awaitable: Awaitable) -> None:
+            try:
+                result = await awaitable
+            except Exception as Ex:
+                await queue.put((i, None, Ex))
+                return
+            await queue.put((i, result, None))
+
+        async def worker() -> None:
+            while True:
+                if delayed and delayed[0][0] <= loop.time():
+                    _, i, attempt = heapq.heappop(delayed)
+                elif (i := next(indexes, -1)) != -1:
+                    attempt = 1
+                elif delayed:
+                    await asyncio.sleep(delayed[0][0] - loop.time())
+                    continue
+                else:
+                    # Отложенные задачи, которые появятся позже, заберут
+                    # воркеры, которые их отложили
+                    return
+
+                try:
+                    is_done, result, delay = await make_attempt(i, attempt)
+                except Exception as Ex:
+                    await queue.put((i, None, Ex))
+                    return
+                if isinstance(result, _PendingResult):
+                    pending.append(asyncio.ensure_future(wait_pending(i, result.awaitable)))
+                elif is_done:
+                    await queue.put((i, result, None))
+                else:
+                    heapq.heappush(delayed, (loop.time() + delay, i, attempt + 1))
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(workers_count)]
+        try:
+            for _ in range(tasks_count):
+                i, result, exception = await queue.get()
+                if exception is not None:
+                    raise exception
+                yield i, result
+        finally:
+            for worker_task in (*workers, *pending):
+                worker_task.cancel()
+            await asyncio.gather(*workers, *pending, return_exceptions=True)
+
+    @classmethod
+    async def _gather_with_retry_queue(
+        cls,
+        tasks_count: int,
+        make_attempt: Callable[[int, int], Awaitable[tuple[bool, Any, float]]],
+        max_concurrency: int | None = None,
+    ) -> list:
+        """
+        То же самое, что и _iter_with_retry_queue, но возвращает результаты всех задач
+        в порядке индексов
+        """
+
+        results: list = [None] * tasks_count
+        async for i, result in cls._iter_with_retry_queue(
+            tasks_count, make_attempt, max_concurrency
+        ):
+            results[i] = result
+        return results
+
     @staticmethod
     async def _calculate_random_cookies_headers_index(
         cookies: list[dict] | dict, headers: list[dict] | dict
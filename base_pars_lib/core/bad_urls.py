@@ -0,0 +1,214 @@
+import json
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from typing import Any, overload
+
+
+@dataclass
+class BadUrlInfo:
+    url: Any
+    failures_count: int = 0
+    last_status_code: int | None = None
+    last_exception: str | None = None
+
+
+class BadUrls:
+    """
+    Реестр ссылок, по которым запрос завершился ошибкой или кодом не 200
+
+    Хранит ссылки в словаре в порядке добавления, поэтому проверка, добавление и удаление
+    выполняются за O(1). Для каждой ссылки запоминает количество неудачных попыток,
+    последний статус-код и последнее исключение.
+    Все операции защищены блокировкой, поэтому реестр можно использовать из потоков
+    _threading_method
+
+    Поддерживает основные операции списка (in, len, итерация, индексы и срезы, сравнение
+    со списком, append, remove), поэтому заменяет прежний список self.bad_urls.
+    Для передачи ссылок в повторный обход и для json.dumps используйте to_list()
+    """
+
+    def __init__(self, urls: Iterable[Any] = ()) -> None:
+        """
+        :param urls: Iterable[Any] = ()
+            Ссылки, которые нужно сразу добавить в реестр
+        """
+
+        self._urls: dict[Any, BadUrlInfo] = {}
+        self._lock = threading.Lock()
+
+        for url in urls:
+            self.add(url)
+
+    def add(
+        self, url: Any, status_code: int | None = None, exception: BaseException | None = None
+    ) -> None:
+        """
+        Добавляет ссылку в реестр или увеличивает счётчик неудачных попыток по ней
+
+        :param url: Any
+            Ссылка
+        :param status_code: int | None = None
+            Статус-код ответа, если он был получен
+        :param exception: BaseException | None = None
+            Исключение, если запрос завершился ошибкой
+        """
+
+        with self._lock:
+            info = self._urls.get(url)
+            if info is None:
+                info = self._urls[url] = BadUrlInfo(url=url)
+            info.failures_count += 1
+            if status_code is not None:
+                info.last_status_code = status_code
+            if exception is not None:
+                info.last_exception = repr(exception)
+
+    def append(self, url: Any) -> None:
+        """
+        То же самое, что и add(url), для совместимости со списком
+        """
+
+        self.add(url)
+
+    def discard(self, url: Any) -> None:
+        """
+        Удаляет ссылку из реестра, если она там есть
+        """
+
+        with self._lock:
+            self._urls.pop(url, None)
+
+    def remove(self, url: Any) -> None:
+        """
+        Удаляет ссылку из реестра, если ссылки нет - ValueError, как у списка
+        """
+
+        with self._lock:
+            if url not in self._urls:
+                raise ValueError(f"{url!r} is not in bad urls")
+            del self._urls[url]
+
+    def get(self, url: Any) -> BadUrlInfo | None:
+        """
+        Возвращает информацию о неудачных попытках по ссылке или None
+        """
+
+        with self._lock:
+            return self._urls.get(url)
+
+    def update(self, other: "BadUrls | Iterable[Any]") -> None:
+        """
+        Добавляет в реестр ссылки из другого реестра (вместе со счётчиками) или из списка
+
+        :param other: BadUrls | Iterable[Any]
+            Другой реестр или список ссылок
+        """
+
+        if not isinstance(other, BadUrls):
+            for url in other:
+                self.add(url)
+            return
+
+        for other_info in other.infos():
+            with self._lock:
+                info = self._urls.get(other_info.url)
+                if info is None:
+                    info = self._urls[other_info.url] = BadUrlInfo(url=other_info.url)
+                info.failures_count += other_info.failures_count
+                if other_info.last_status_code is not None:
+                    info.last_status_code = other_info.last_status_code
+                if other_info.last_exception is not None:
+                    info.last_exception = other_info.last_exception
+
+    def clear(self) -> None:
+        with self._lock:
+            self._urls.clear()
+
+    def to_list(self) -> list[Any]:
+        """
+        :return: list[Any]
+            Ссылки в порядке добавления
+        """
+
+        with self._lock:
+            return list(self._urls)
+
+    def infos(self) -> list[BadUrlInfo]:
+        """
+        :return: list[BadUrlInfo]
+            Копии записей о ссылках в порядке добавления
+        """
+
+        with self._lock:
+            return [BadUrlInfo(**asdict(info)) for info in self._urls.values()]
+
+    def dump(self, path: str) -> None:
+        """
+        Сохраняет реестр в файл в формате JSON Lines - по одной записи BadUrlInfo на строку
+
+        :param path: str
+            Путь к файлу
+        """
+
+        with open(path, "w", encoding="utf-8") as file:
+            for info in self.infos():
+                file.write(json.dumps(asdict(info), ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "BadUrls":
+        """
+        Загружает реестр из файла, сохранённого через dump
+
+        :param path: str
+            Путь к файлу
+        :return: BadUrls
+        """
+
+        with open(path, encoding="utf-8") as file:
+            return cls.from_infos(BadUrlInfo(**json.loads(line)) for line in file if line.strip())
+
+    @classmethod
+    def from_infos(cls, infos: Iterable[BadUrlInfo]) -> "BadUrls":
+        """
+        Создаёт реестр из записей BadUrlInfo (например, из infos() другого реестра)
+
+        :param infos: Iterable[BadUrlInfo]
+            Записи о ссылках
+        :return: BadUrls
+        """
+
+        bad_urls = cls()
+        for info in infos:
+            bad_urls._urls[info.url] = info
+        return bad_urls
+
+    def __contains__(self, url: Any) -> bool:
+        return url in self._urls
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.to_list())
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Any]: ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        return self.to_list()[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BadUrls):
+            return self.to_list() == other.to_list()
+        if isinstance(other, list | tuple):
+            return self.to_list() == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"BadUrls({self.to_list()!r})"
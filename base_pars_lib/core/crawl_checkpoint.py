@@ -0,0 +1,190 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from base_pars_lib.core.bad_urls import BadUrlInfo, BadUrls
+
+
+class CrawlCheckpoint:
+    """
+    Сохраняет прогресс обхода чанков _method_in_series в SQLite: номера обработанных чанков
+    и реестр bad_urls после каждого чанка. Если программа упала, при повторном запуске
+    с тем же файлом и job обработанные чанки пропускаются, а bad_urls восстанавливаются
+
+    Вместе с номером чанка хранится хэш его содержимого: если список ссылок изменился
+    и чанк с тем же номером стал другим, он обрабатывается заново
+
+    bad_urls хранятся по строке на ссылку: после чанка записываются только новые
+    и изменившиеся ссылки и удаляются исчезнувшие из реестра, а не весь реестр целиком
+    """
+
+    def __init__(self, path: str, job: str = "default", resume: bool = True) -> None:
+        """
+        :param path: str
+            Путь к файлу базы SQLite
+        :param job: str = "default"
+            Название обхода, в одном файле можно хранить прогресс нескольких обходов
+        :param resume: bool = True
+            Если True - продолжить обход с сохранённого места,
+            если False - удалить сохранённый прогресс job и начать заново
+        """
+
+        self.path = path
+        self.job = job
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                job TEXT NOT NULL,
+                chunk_index INTEGER NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                finished_at REAL NOT NULL,
+                PRIMARY KEY (job, chunk_index)
+            );
+            CREATE TABLE IF NOT EXISTS bad_urls (
+                job TEXT NOT NULL,
+                url TEXT NOT NULL,
+                info TEXT NOT NULL,
+                PRIMARY KEY (job, url)
+            );
+            """
+        )
+        # Записи bad_urls job, которые сейчас лежат в базе: ключ ссылки -> info
+        self._saved_bad_urls: dict[str, str] = {}
+        if resume:
+            self.load_bad_urls()
+        else:
+            self.reset()
+
+    @staticmethod
+    def get_chunk_hash(chunk: Any) -> str:
+        """
+        :return: str
+            Хэш содержимого чанка
+        """
+
+        return hashlib.sha256(json.dumps(chunk, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def __get_url_key(url: Any) -> str:
+        return json.dumps(url, sort_keys=True, default=str, ensure_ascii=False)
+
+    def is_done(self, index: int, chunk: Any) -> bool:
+        """
+        :param index: int
+            Номер чанка
+        :param chunk: Any
+            Чанк
+        :return: bool
+            Обработан ли чанк с таким номером и содержимым
+        """
+
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT chunk_hash FROM chunks WHERE job = ? AND chunk_index = ?",
+                (self.job, index),
+            ).fetchone()
+        return row is not None and row[0] == self.get_chunk_hash(chunk)
+
+    def mark_done(self, index: int, chunk: Any, bad_urls: BadUrls | None = None) -> None:
+        """
+        Отмечает чанк обработанным и сохраняет изменения реестра bad_urls
+        с прошлого сохранения в одной транзакции
+
+        :param index: int
+            Номер чанка
+        :param chunk: Any
+            Чанк
+        :param bad_urls: BadUrls | None = None
+            Реестр ссылок с ошибками после обработки чанка
+        """
+
+        chunk_hash = self.get_chunk_hash(chunk)
+        bad_url_infos = (
+            {
+                self.__get_url_key(info.url): json.dumps(vars(info), ensure_ascii=False)
+                for info in bad_urls.infos()
+            }
+            if bad_urls is not None
+            else None
+        )
+        with self._lock:
+            self._connection.execute("BEGIN")
+            try:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?)",
+                    (self.job, index, chunk_hash, time.time()),
+                )
+                if bad_url_infos is not None:
+                    self._connection.executemany(
+                        "DELETE FROM bad_urls WHERE job = ? AND url = ?",
+                        (
+                            (self.job, url_key)
+                            for url_key in self._saved_bad_urls
+                            if url_key not in bad_url_infos
+                        ),
+                    )
+                    # ON CONFLICT сохраняет rowid, поэтому порядок добавления ссылок не меняется
+                    self._connection.executemany(
+                        "INSERT INTO bad_urls VALUES (?, ?, ?) "
+                        "ON CONFLICT (job, url) DO UPDATE SET info = excluded.info",
+                        (
+                            (self.job, url_key, info)
+                            for url_key, info in bad_url_infos.items()
+                            if self._saved_bad_urls.get(url_key) != info
+                        ),
+                    )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+            if bad_url_infos is not None:
+                self._saved_bad_urls = bad_url_infos
+
+    def done_indexes(self) -> set[int]:
+        """
+        :return: set[int]
+            Номера обработанных чанков
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT chunk_index FROM chunks WHERE job = ?", (self.job,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def load_bad_urls(self) -> BadUrls:
+        """
+        :return: BadUrls
+            Реестр bad_urls, сохранённый после последнего обработанного чанка
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT url, info FROM bad_urls WHERE job = ? ORDER BY rowid", (self.job,)
+            ).fetchall()
+            self._saved_bad_urls = dict(rows)
+        return BadUrls.from_infos(BadUrlInfo(**json.loads(info)) for _, info in rows)
+
+    def reset(self) -> None:
+        """
+        Удаляет сохранённый прогресс job
+        """
+
+        with self._lock:
+            self._connection.execute("DELETE FROM chunks WHERE job = ?", (self.job,))
+            self._connection.execute("DELETE FROM bad_urls WHERE job = ?", (self.job,))
+            self._saved_bad_urls = {}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        return len(self.done_indexes())
@@ -0,0 +1,149 @@
+import inspect
+import os
+import re
+from collections.abc import Awaitable, Mapping
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import IO, Any, Callable
+
+_CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-\d+/(\d+|\*)")
+
+DownloadSink = Callable[[bytes], Awaitable[Any] | Any]
+DownloadProgress = Callable[[int, int | None], Any]
+
+
+@dataclass
+class DownloadResult:
+    """
+    Результат _download
+
+    url - ссылка, status_code - код последнего ответа (200, 206 или 416, если файл
+    уже был скачан полностью), size - количество скачанных байт вместе с докачанными,
+    total - размер тела по заголовкам ответа (None, если сайт его не сообщил),
+    resumed_from - с какого байта продолжена загрузка
+    """
+
+    url: str
+    status_code: int
+    size: int
+    total: int | None = None
+    path: str | None = None
+    resumed_from: int = 0
+
+    @property
+    def is_complete(self) -> bool:
+        return self.total is None or self.size >= self.total
+
+
+class DownloadTarget:
+    """
+    Куда записывается тело ответа в _download: файл или функция sink.
+    Помнит, сколько байт уже записано, чтобы после обрыва соединения продолжить загрузку
+    заголовком Range. Если сайт не поддерживает Range и отдаёт тело целиком (200),
+    уже записанные байты пропускаются
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        sink: DownloadSink | None = None,
+        resume: bool = True,
+        progress: DownloadProgress | None = None,
+    ) -> None:
+        """
+        :param path: str | None = None
+            Путь к файлу, в который записывается тело
+        :param sink: DownloadSink | None = None
+            Функция (обычная или асинхронная), которая получает тело по частям, если path не задан
+        :param resume: bool = True
+            Если файл path уже есть - докачать его, иначе перезаписать
+        :param progress: DownloadProgress | None = None
+            Функция progress(скачано байт, размер тела или None), вызывается после каждой части
+        """
+
+        if (path is None) == (sink is None):
+            raise ValueError("Exactly one of path and sink is required")
+
+        self.path = path
+        self.sink = sink
+        self.progress = progress
+
+        self.offset = 0
+        if path is not None and resume and os.path.exists(path):
+            self.offset = os.path.getsize(path)
+        self.resumed_from = self.offset
+        self.total: int | None = None
+
+        self._skip = 0
+        self._file: IO[bytes] | None = None
+
+    def get_range_headers(self) -> dict[str, str]:
+        """
+        :return: dict[str, str]
+            Заголовок Range для продолжения загрузки с self.offset
+        """
+
+        return {"Range": f"bytes={self.offset}-"} if self.offset else {}
+
+    def start(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """
+        Готовит запись тела ответа с кодом 200 или 206
+
+        :param status_code: int
+            Код ответа
+        :param headers: Mapping[str, str]
+            Заголовки ответа
+        """
+
+        content_length = headers.get("Content-Length")
+        match = _CONTENT_RANGE_RE.match(headers.get("Content-Range", ""))
+        if status_code == HTTPStatus.PARTIAL_CONTENT and match is not None:
+            start = int(match.group(1))
+            if start > self.offset:
+                raise ValueError(f"Content-Range starts at {start}, expected {self.offset}")
+            self._skip = self.offset - start
+            self.total = None if match.group(2) == "*" else int(match.group(2))
+        else:
+            # Сайт отдаёт тело с начала
+            self._skip = self.offset
+            self.total = int(content_length) if content_length else None
+
+        if self.path is not None and self._file is None:
+            self._file = open(self.path, "ab" if self.offset else "wb")  # noqa: SIM115
+
+    async def write(self, chunk: bytes) -> None:
+        if self._skip:
+            skipped = min(self._skip, len(chunk))
+            self._skip -= skipped
+            chunk = chunk[skipped:]
+            if not chunk:
+                return
+
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            written = self.sink(chunk)  # type: ignore[misc]
+            if inspect.isawaitable(written):
+                await written
+        self.offset += len(chunk)
+
+        if self.progress is not None:
+            self.progress(self.offset, self.total)
+
+    def get_result(self, url: str, status_code: int) -> DownloadResult:
+        if status_code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+            # Файл уже скачан полностью
+            self.total = self.offset
+        return DownloadResult(
+            url=url,
+            status_code=status_code,
+            size=self.offset,
+            total=self.total,
+            path=self.path,
+            resumed_from=self.resumed_from,
+        )
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
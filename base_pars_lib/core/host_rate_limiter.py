@@ -0,0 +1,221 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+
+@dataclass
+class HostSlot:
+    """
+    Место для одного запроса к хосту, выданное HostRateLimiter.slot.
+    В status_code записывается код ответа, по нему лимитер меняет ограничение хоста
+    """
+
+    host: str
+    status_code: int | None = None
+
+
+@dataclass
+class _HostState:
+    concurrency: float
+    rate: float | None
+    tokens: float = 1.0
+    last_refill: float = 0.0
+    in_flight: int = 0
+    # Номер последнего начатого запроса и номер последнего запроса, начатого
+    # до уменьшения ограничения
+    started: int = 0
+    decreased_at: int = 0
+    waiters: deque[asyncio.Future] = field(default_factory=deque)
+
+
+class HostRateLimiter:
+    """
+    Ограничивает запросы к каждому хосту отдельно:
+        - token bucket: не больше rate запросов в секунду (с запасом burst);
+        - AIMD: количество одновременных запросов к хосту растёт на additive_increase
+          за каждые concurrency успешных ответов и умножается на multiplicative_decrease
+          при 429, 5xx или ошибке запроса (например, таймауте). Ограничение уменьшается
+          не больше одного раза за окно: ответы запросов, начатых до последнего
+          уменьшения, его не уменьшают, поэтому пачка одновременных 429 уменьшает
+          ограничение один раз, а не по разу на каждый ответ
+
+    Так каждый хост опрашивается с максимальной скоростью, которую он выдерживает,
+    без слепых задержек random_sleep_time_every_request
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int = 1,
+        initial_concurrency: int = 10,
+        min_concurrency: int = 1,
+        max_concurrency: int = 100,
+        additive_increase: float = 1.0,
+        multiplicative_decrease: float = 0.5,
+        host_rates: dict[str, float] | None = None,
+    ) -> None:
+        """
+        :param rate: float | None = None
+            Максимальное количество запросов в секунду к одному хосту, None - без ограничения
+        :param burst: int = 1
+            Сколько запросов подряд можно отправить без ожидания, если хост давно не опрашивался
+        :param initial_concurrency: int = 10
+            Начальное количество одновременных запросов к хосту
+        :param min_concurrency: int = 1
+            Минимальное количество одновременных запросов к хосту
+        :param max_concurrency: int = 100
+            Максимальное количество одновременных запросов к хосту
+        :param additive_increase: float = 1.0
+            На сколько увеличивается количество одновременных запросов за каждые
+            concurrency успешных ответов
+        :param multiplicative_decrease: float = 0.5
+            Во сколько раз уменьшается количество одновременных запросов при 429, 5xx
+            или ошибке запроса
+        :param host_rates: dict[str, float] | None = None
+            Ограничение rate для отдельных хостов, например {"api.example.com": 5}
+        """
+
+        if not 0 < multiplicative_decrease < 1:
+            raise ValueError("multiplicative_decrease must be between 0 and 1")
+        if not 1 <= min_concurrency <= initial_concurrency <= max_concurrency:
+            raise ValueError(
+                "min_concurrency <= initial_concurrency <= max_concurrency is required"
+            )
+
+        self.rate = rate
+        self.burst = burst
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.host_rates = host_rates or {}
+
+        self._hosts: dict[str, _HostState] = {}
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def get_concurrency(self, host: str) -> int:
+        """
+        :return: int
+            Текущее количество одновременных запросов, разрешённое для хоста
+        """
+
+        state = self._hosts.get(host)
+        return self.initial_concurrency if state is None else int(state.concurrency)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[HostSlot]:
+        """
+        Ждёт свободное место и токен для хоста ссылки и занимает место на время запроса.
+        Если внутри блока произошло исключение, ограничение хоста уменьшается,
+        иначе меняется по коду ответа из HostSlot.status_code
+
+        :param url: str
+            Ссылка запроса
+        """
+
+        host = self.get_host(url)
+        state = self.__get_state(host)
+        request_number = await self.__acquire(state)
+        host_slot = HostSlot(host)
+        try:
+            yield host_slot
+        except Exception:
+            self.__decrease(state, request_number)
+            raise
+        else:
+            if host_slot.status_code is not None and (
+                host_slot.status_code == HTTPStatus.TOO_MANY_REQUESTS
+                or host_slot.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+            ):
+                self.__decrease(state, request_number)
+            else:
+                self.__increase(state)
+        finally:
+            state.in_flight -= 1
+            self.__wake_waiters(state)
+
+    def __get_state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            rate = self.host_rates.get(host, self.rate)
+            state = self._hosts[host] = _HostState(
+                concurrency=self.initial_concurrency,
+                rate=rate,
+                tokens=self.burst,
+                last_refill=asyncio.get_running_loop().time(),
+            )
+        return state
+
+    async def __acquire(self, state: _HostState) -> int:
+        """
+        :return: int
+            Номер запроса к хосту (по порядку начала)
+        """
+
+        loop = asyncio.get_running_loop()
+        while state.in_flight >= int(state.concurrency):
+            waiter = loop.create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Задачу разбудили, но отменили до занятия места - будим следующую
+                    self.__wake_waiters(state)
+                raise
+            finally:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+        state.in_flight += 1
+        state.started += 1
+        request_number = state.started
+
+        if state.rate is None:
+            return request_number
+        try:
+            while True:
+                now = loop.time()
+                state.tokens = min(
+                    self.burst, state.tokens + (now - state.last_refill) * state.rate
+                )
+                state.last_refill = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return request_number
+                await asyncio.sleep((1 - state.tokens) / state.rate)
+        except BaseException:
+            state.in_flight -= 1
+            self.__wake_waiters(state)
+            raise
+
+    def __increase(self, state: _HostState) -> None:
+        state.concurrency = min(
+            self.max_concurrency,
+            state.concurrency + self.additive_increase / state.concurrency,
+        )
+
+    def __decrease(self, state: _HostState, request_number: int) -> None:
+        if request_number <= state.decreased_at:
+            # Запрос начат до последнего уменьшения - его ответ уже учтён
+            return
+        state.decreased_at = state.started
+        state.concurrency = max(
+            self.min_concurrency, state.concurrency * self.multiplicative_decrease
+        )
+
+    @staticmethod
+    def __wake_waiters(state: _HostState) -> None:
+        free_slots = int(state.concurrency) - state.in_flight
+        while free_slots > 0 and state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free_slots -= 1
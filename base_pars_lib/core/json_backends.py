@@ -0,0 +1,56 @@
+import json
+from typing import Any, Callable, Literal
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore[assignment]
+
+JsonBackend = Literal["auto", "orjson", "msgspec", "json"]
+JsonLoads = Callable[[bytes | str], Any]
+
+
+def _msgspec_loads(data: bytes | str) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as Ex:
+        # Как и у json/orjson, ошибка разбора - ValueError
+        raise ValueError(str(Ex)) from Ex
+
+
+def get_json_loads(backend: JsonBackend | str = "auto") -> JsonLoads:
+    """
+    Возвращает функцию разбора json для выбранной библиотеки
+
+    :param backend: JsonBackend | str = "auto"
+        "orjson", "msgspec" или "json" (стандартная библиотека).
+        Если "auto" - используется orjson, если он установлен, затем msgspec,
+        иначе стандартный json
+        Все функции принимают bytes или str и при ошибке разбора бросают ValueError
+
+    :return: JsonLoads
+        Функция разбора json
+    """
+
+    if backend == "auto":
+        if orjson is not None:
+            return orjson.loads  # type: ignore[no-any-return]
+        if msgspec is not None:
+            return _msgspec_loads
+        return json.loads
+    if backend == "orjson":
+        if orjson is None:
+            raise ImportError("orjson is not installed: pip install orjson")
+        return orjson.loads  # type: ignore[no-any-return]
+    if backend == "msgspec":
+        if msgspec is None:
+            raise ImportError("msgspec is not installed: pip install msgspec")
+        return _msgspec_loads
+    if backend == "json":
+        return json.loads
+    raise ValueError(f"Unknown json backend: {backend}")
@@ -0,0 +1,359 @@
+import json
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlsplit
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class RequestHooks:
+    """
+    Хуки событий запросов парсеров AsyncBaseParser, AsyncBaseCurlCffiParser и BaseParser.
+    Все методы ничего не делают: чтобы получать события, унаследуйтесь от класса,
+    переопределите нужные методы и передайте объект в парсер параметром hooks.
+    Хуки вызываются в коде запроса, поэтому должны быть быстрыми и не бросать исключений
+    """
+
+    def on_request_start(self, url: str, attempt: int) -> None:
+        """
+        Перед отправкой запроса
+
+        :param url: str
+            Ссылка
+        :param attempt: int
+            Номер попытки, начиная с 1
+        """
+
+    def on_retry(self, url: str, attempt: int) -> None:
+        """
+        Перед повторной попыткой запроса (attempt > 1), вызывается перед on_request_start,
+        то есть только для попыток, которые отправляют запрос (не для ответов из кэша)
+        """
+
+    def on_proxy_chosen(self, url: str, proxy: Any) -> None:
+        """
+        После выбора прокси для попытки (из списка, ProxyPool или закреплённого SessionAffinity)
+        """
+
+    def on_request_end(
+        self,
+        url: str,
+        status_code: int | None,
+        latency: float,
+        bytes_received: int = 0,
+        exception: BaseException | None = None,
+    ) -> None:
+        """
+        После получения ответа или ошибки запроса
+
+        :param url: str
+            Ссылка
+        :param status_code: int | None
+            Код ответа, None - если запрос завершился ошибкой
+        :param latency: float
+            Время запроса в секундах вместе с чтением тела
+        :param bytes_received: int = 0
+            Размер тела ответа в байтах
+        :param exception: BaseException | None = None
+            Ошибка запроса
+        """
+
+    def on_backoff_sleep(self, url: str, seconds: float) -> None:
+        """
+        Перед задержкой backoff перед следующей попыткой
+        (в том числе отложенной планировщиком повторов)
+        """
+
+
+@dataclass
+class HostMetrics:
+    """
+    Счётчики и гистограмма времени ответа одного хоста
+    """
+
+    requests: int = 0
+    retries: int = 0
+    responses: dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    errors: dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    backoff_seconds: float = 0.0
+    bytes_received: int = 0
+    latency_buckets: list[int] = field(default_factory=list)
+    latency_sum: float = 0.0
+    latency_count: int = 0
+
+    @property
+    def retry_amplification(self) -> float:
+        """
+        Во сколько раз запросов больше, чем первых попыток
+        """
+
+        first_attempts = self.requests - self.retries
+        return self.requests / first_attempts if first_attempts else 0.0
+
+
+class RequestMetrics(RequestHooks):
+    """
+    Встроенные метрики запросов по хостам: количество запросов, повторов, ответов по кодам,
+    ошибок по типам, секунд backoff, полученных байт и гистограмма времени ответа.
+    Выгружаются в текстовом формате Prometheus (to_prometheus / dump_prometheus,
+    например для textfile collector node_exporter) или в JSON (to_dict / dump_json)
+
+    Потокобезопасен, один объект можно передать нескольким парсерам
+    """
+
+    def __init__(
+        self,
+        latency_buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+        prefix: str = "base_pars_lib",
+    ) -> None:
+        """
+        :param latency_buckets: tuple[float, ...] = (0.05, 0.1, ..., 30, 60)
+            Верхние границы корзин гистограммы времени ответа в секундах
+        :param prefix: str = "base_pars_lib"
+            Префикс названий метрик Prometheus
+        """
+
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self.prefix = prefix
+
+        self._hosts: dict[str, HostMetrics] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        return urlsplit(url).netloc or url
+
+    def on_request_start(self, url: str, attempt: int) -> None:
+        with self._lock:
+            self.__get_host_metrics(url).requests += 1
+
+    def on_retry(self, url: str, attempt: int) -> None:
+        with self._lock:
+            self.__get_host_metrics(url).retries += 1
+
+    def on_request_end(
+        self,
+        url: str,
+        status_code: int | None,
+        latency: float,
+        bytes_received: int = 0,
+        exception: BaseException | None = None,
+    ) -> None:
+        with self._lock:
+            metrics = self.__get_host_metrics(url)
+            if status_code is not None:
+                metrics.responses[status_code] += 1
+            if exception is not None:
+                metrics.errors[type(exception).__name__] += 1
+            metrics.bytes_received += bytes_received
+            metrics.latency_sum += latency
+            metrics.latency_count += 1
+            for i, upper_bound in enumerate(self.latency_buckets):
+                if latency <= upper_bound:
+                    metrics.latency_buckets[i] += 1
+                    break
+
+    def on_backoff_sleep(self, url: str, seconds: float) -> None:
+        with self._lock:
+            self.__get_host_metrics(url).backoff_seconds += seconds
+
+    def get_latency_quantile(self, host: str, quantile: float) -> float | None:
+        """
+        Оценка квантиля времени ответа хоста по гистограмме (как histogram_quantile
+        в Prometheus: линейная интерполяция внутри корзины)
+
+        :param host: str
+            Хост
+        :param quantile: float
+            Квантиль от 0 до 1, например 0.95
+        :return: float | None
+            Время в секундах или None, если ответов от хоста не было
+        """
+
+        with self._lock:
+            metrics = self._hosts.get(host)
+            if metrics is None or not metrics.latency_count:
+                return None
+            buckets = list(metrics.latency_buckets)
+            count = metrics.latency_count
+
+        rank = quantile * count
+        cumulative = 0
+        lower_bound = 0.0
+        for upper_bound, bucket_count in zip(self.latency_buckets, buckets):
+            if bucket_count and cumulative + bucket_count >= rank:
+                share = (rank - cumulative) / bucket_count
+                return lower_bound + (upper_bound - lower_bound) * share
+            cumulative += bucket_count
+            lower_bound = upper_bound
+        # Квантиль попал в корзину +Inf - возвращаем её нижнюю границу
+        return self.latency_buckets[-1] if self.latency_buckets else None
+
+    def hosts(self) -> dict[str, HostMetrics]:
+        """
+        :return: dict[str, HostMetrics]
+            Копии метрик по хостам
+        """
+
+        with self._lock:
+            return {
+                host: HostMetrics(
+                    requests=metrics.requests,
+                    retries=metrics.retries,
+                    responses=dict(metrics.responses),
+                    errors=dict(metrics.errors),
+                    backoff_seconds=metrics.backoff_seconds,
+                    bytes_received=metrics.bytes_received,
+                    latency_buckets=list(metrics.latency_buckets),
+                    latency_sum=metrics.latency_sum,
+                    latency_count=metrics.latency_count,
+                )
+                for host, metrics in self._hosts.items()
+            }
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        :return: dict[str, Any]
+            Метрики по хостам вместе с p50 / p95 времени ответа и retry_amplification
+        """
+
+        result = {}
+        for host, metrics in self.hosts().items():
+            result[host] = {
+                "requests": metrics.requests,
+                "retries": metrics.retries,
+                "retry_amplification": metrics.retry_amplification,
+                "responses": {str(code): count for code, count in metrics.responses.items()},
+                "errors": metrics.errors,
+                "backoff_seconds": metrics.backoff_seconds,
+                "bytes_received": metrics.bytes_received,
+                "latency_sum": metrics.latency_sum,
+                "latency_count": metrics.latency_count,
+                "latency_p50": self.get_latency_quantile(host, 0.5),
+                "latency_p95": self.get_latency_quantile(host, 0.95),
+            }
+        return result
+
+    def to_prometheus(self) -> str:
+        """
+        :return: str
+            Метрики в текстовом формате Prometheus
+        """
+
+        hosts = self.hosts()
+        name = self.prefix
+        lines: list[str] = []
+
+        def add_metric(metric: str, metric_type: str, help_text: str, samples: list[str]) -> None:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            lines.extend(samples)
+
+        add_metric(
+            f"{name}_requests_total",
+            "counter",
+            "Requests sent, including retries",
+            [
+                f'{name}_requests_total{{host="{_escape(host)}"}} {metrics.requests}'
+                for host, metrics in hosts.items()
+            ],
+        )
+        add_metric(
+            f"{name}_retries_total",
+            "counter",
+            "Retry attempts",
+            [
+                f'{name}_retries_total{{host="{_escape(host)}"}} {metrics.retries}'
+                for host, metrics in hosts.items()
+            ],
+        )
+        add_metric(
+            f"{name}_responses_total",
+            "counter",
+            "Responses by status code",
+            [
+                f'{name}_responses_total{{host="{_escape(host)}",status_code="{code}"}} {count}'
+                for host, metrics in hosts.items()
+                for code, count in sorted(metrics.responses.items())
+            ],
+        )
+        add_metric(
+            f"{name}_request_errors_total",
+            "counter",
+            "Requests failed with an exception",
+            [
+                f'{name}_request_errors_total{{host="{_escape(host)}",exception="{exception}"}} '
+                f"{count}"
+                for host, metrics in hosts.items()
+                for exception, count in sorted(metrics.errors.items())
+            ],
+        )
+        add_metric(
+            f"{name}_backoff_seconds_total",
+            "counter",
+            "Seconds of backoff before retries",
+            [
+                f'{name}_backoff_seconds_total{{host="{_escape(host)}"}} {metrics.backoff_seconds}'
+                for host, metrics in hosts.items()
+            ],
+        )
+        add_metric(
+            f"{name}_received_bytes_total",
+            "counter",
+            "Response body bytes received",
+            [
+                f'{name}_received_bytes_total{{host="{_escape(host)}"}} {metrics.bytes_received}'
+                for host, metrics in hosts.items()
+            ],
+        )
+
+        histogram = f"{name}_request_duration_seconds"
+        samples = []
+        for host, metrics in hosts.items():
+            label = f'host="{_escape(host)}"'
+            cumulative = 0
+            for upper_bound, bucket_count in zip(self.latency_buckets, metrics.latency_buckets):
+                cumulative += bucket_count
+                samples.append(f'{histogram}_bucket{{{label},le="{upper_bound}"}} {cumulative}')
+            samples.append(f'{histogram}_bucket{{{label},le="+Inf"}} {metrics.latency_count}')
+            samples.append(f"{histogram}_sum{{{label}}} {metrics.latency_sum}")
+            samples.append(f"{histogram}_count{{{label}}} {metrics.latency_count}")
+        add_metric(histogram, "histogram", "Request duration including body read", samples)
+
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: str) -> None:
+        """
+        Сохраняет метрики в файл в формате Prometheus. Файл перезаписывается целиком,
+        поэтому его можно указывать в textfile collector node_exporter
+        """
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+
+    def dump_json(self, path: str) -> None:
+        """
+        Сохраняет метрики (to_dict) в файл в формате JSON
+        """
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._hosts.clear()
+
+    def __get_host_metrics(self, url: str) -> HostMetrics:
+        host = self.get_host(url)
+        metrics = self._hosts.get(host)
+        if metrics is None:
+            metrics = self._hosts[host] = HostMetrics(
+                latency_buckets=[0] * len(self.latency_buckets)
+            )
+        return metrics
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
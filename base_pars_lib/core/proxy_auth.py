@@ -0,0 +1,261 @@
+import asyncio
+import base64
+import hashlib
+import secrets
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Literal
+from urllib.parse import urlsplit
+from urllib.request import parse_http_list, parse_keqv_list
+
+# Значения CURLOPT_PROXYAUTH
+CURLAUTH_BASIC = 1
+CURLAUTH_DIGEST = 2
+
+_DIGEST_HASHES: dict[str, Callable[[bytes], Any]] = {
+    "MD5": hashlib.md5,
+    "SHA-256": hashlib.sha256,
+    "SHA-512-256": lambda data: hashlib.new("sha512_256", data),
+}
+
+
+@dataclass
+class _DigestChallenge:
+    realm: str
+    nonce: str
+    qop: str | None = None
+    opaque: str | None = None
+    algorithm: str = "MD5"
+    nonce_count: int = 0
+    connect_headers: dict[str, str] = field(default_factory=dict)
+
+
+class AsyncProxyAuth:
+    """
+    Авторизация в прокси (ротационном прокси) для AsyncBaseParser и AsyncBaseCurlCffiParser,
+    асинхронный аналог utils.rotating_proxy_auth. Поддерживает Basic и Digest
+
+    Для AsyncBaseParser схема и nonce узнаются из ответа 407 один раз на прокси: пока первый
+    запрос через прокси получает вызов (challenge), остальные конкурентные запросы к этому
+    прокси ждут его, а затем все запросы отправляются сразу с Proxy-Authorization
+    по сохранённому nonce. Если прокси сменил nonce (stale), вызов принимается заново.
+    Если первый ответ через прокси пришёл без 407 (авторизация не нужна, например доступ
+    по IP), запросы к прокси больше не ждут друг друга
+
+    AsyncBaseCurlCffiParser передаёт логин и пароль в libcurl (CURLOPT_PROXYAUTH),
+    и ответ 407 обрабатывает сам libcurl
+    """
+
+    def __init__(
+        self, login: str, password: str, scheme: Literal["auto", "basic", "digest"] = "auto"
+    ) -> None:
+        """
+        :param login: str
+            Логин прокси
+        :param password: str
+            Пароль прокси
+        :param scheme: Literal["auto", "basic", "digest"] = "auto"
+            "auto" - схема по ответу 407 прокси, "basic" - Basic сразу с первого запроса,
+            "digest" - только Digest
+        """
+
+        self.login = login
+        self.password = password
+        self.scheme = scheme
+
+        self._basic_proxies: set[str] = set()
+        self._no_auth_proxies: set[str] = set()
+        self._challenges: dict[str, _DigestChallenge] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @property
+    def curl_auth_mask(self) -> int:
+        """
+        :return: int
+            Значение CURLOPT_PROXYAUTH для схемы
+        """
+
+        return {
+            "basic": CURLAUTH_BASIC,
+            "digest": CURLAUTH_DIGEST,
+        }.get(self.scheme, CURLAUTH_BASIC | CURLAUTH_DIGEST)
+
+    def get_scheme(self, proxy: str) -> Literal["basic", "digest", "none"] | None:
+        """
+        :param proxy: str
+            Прокси
+        :return: Literal["basic", "digest", "none"] | None
+            Схема авторизации в прокси, "none" - прокси ответил без 407 и авторизация
+            не нужна, None - через прокси ещё не было ответов
+        """
+
+        if self.scheme == "basic" or proxy in self._basic_proxies:
+            return "basic"
+        if proxy in self._challenges:
+            return "digest"
+        if proxy in self._no_auth_proxies:
+            return "none"
+        return None
+
+    def get_headers(self, proxy: str, method: str, url: str) -> dict[str, str]:
+        """
+        :param proxy: str
+            Прокси
+        :param method: str
+            Метод запроса
+        :param url: str
+            Ссылка запроса
+        :return: dict[str, str]
+            Заголовок Proxy-Authorization для запроса или пустой словарь, если схема
+            ещё неизвестна. Для https заголовок относится к туннелю CONNECT
+        """
+
+        scheme = self.get_scheme(proxy)
+        if scheme == "basic":
+            credentials = base64.b64encode(f"{self.login}:{self.password}".encode()).decode()
+            return {"Proxy-Authorization": f"Basic {credentials}"}
+        if scheme != "digest":
+            return {}
+
+        challenge = self._challenges[proxy]
+        if self.is_tunnel(url):
+            # Заголовок туннеля не меняется, пока не сменится nonce: одинаковые
+            # заголовки CONNECT позволяют переиспользовать соединения к прокси
+            authority = self.get_authority(url)
+            authorization = challenge.connect_headers.get(authority)
+            if authorization is None:
+                authorization = self.__build_digest(challenge, "CONNECT", authority)
+                challenge.connect_headers[authority] = authorization
+        else:
+            authorization = self.__build_digest(challenge, method.upper(), url)
+        return {"Proxy-Authorization": authorization}
+
+    def handle_no_challenge(self, proxy: str) -> None:
+        """
+        Запоминает, что прокси ответил без 407: пока он не пришлёт 407, запросы через него
+        отправляются без Proxy-Authorization и не ждут друг друга в challenge_lock
+        """
+
+        if self.get_scheme(proxy) is None:
+            self._no_auth_proxies.add(proxy)
+
+    def handle_challenge(self, proxy: str, authenticate_headers: Iterable[str]) -> bool:
+        """
+        Запоминает вызов из заголовков Proxy-Authenticate ответа 407
+
+        :param proxy: str
+            Прокси
+        :param authenticate_headers: Iterable[str]
+            Значения заголовков Proxy-Authenticate
+        :return: bool
+            Есть ли смысл повторить запрос с новой авторизацией. False - прокси
+            отклонил уже отправленные логин и пароль
+        """
+
+        basic = False
+        for header in authenticate_headers:
+            auth_scheme, _, params = header.strip().partition(" ")
+            if auth_scheme.lower() == "basic":
+                basic = True
+            elif auth_scheme.lower() == "digest" and self.scheme != "basic":
+                return self.__set_digest_challenge(proxy, params)
+
+        if basic and self.scheme == "auto" and proxy not in self._basic_proxies:
+            self._basic_proxies.add(proxy)
+            self._no_auth_proxies.discard(proxy)
+            return True
+        return False
+
+    @asynccontextmanager
+    async def challenge_lock(self, proxy: str) -> AsyncIterator[None]:
+        """
+        Пока через прокси не было ответов, пропускает к прокси по одному запросу,
+        чтобы вызов 407 получил только первый из них. Когда схема известна (в том числе
+        "none" - авторизация не нужна, см. handle_no_challenge), не ждёт
+        """
+
+        if self.get_scheme(proxy) is not None:
+            yield
+            return
+
+        lock = self._locks.setdefault(proxy, asyncio.Lock())
+        await lock.acquire()
+        if self.get_scheme(proxy) is not None:
+            lock.release()
+            yield
+            return
+        try:
+            yield
+        finally:
+            lock.release()
+
+    @staticmethod
+    def is_tunnel(url: str) -> bool:
+        return urlsplit(url).scheme.lower() in ("https", "wss")
+
+    @staticmethod
+    def get_authority(url: str) -> str:
+        parsed = urlsplit(url)
+        port = parsed.port or (443 if parsed.scheme.lower() in ("https", "wss") else 80)
+        return f"{parsed.hostname}:{port}"
+
+    @staticmethod
+    def make_cnonce() -> str:
+        return secrets.token_hex(8)
+
+    def __set_digest_challenge(self, proxy: str, params: str) -> bool:
+        challenge_params = parse_keqv_list(parse_http_list(params))
+        if "nonce" not in challenge_params:
+            return False
+
+        previous = self._challenges.get(proxy)
+        is_stale = challenge_params.get("stale", "").lower() == "true"
+        if previous is not None and previous.nonce == challenge_params["nonce"] and not is_stale:
+            return False
+
+        qop_options = [qop.strip() for qop in challenge_params.get("qop", "").split(",")]
+        self._challenges[proxy] = _DigestChallenge(
+            realm=challenge_params.get("realm", ""),
+            nonce=challenge_params["nonce"],
+            qop="auth" if "auth" in qop_options else None,
+            opaque=challenge_params.get("opaque"),
+            algorithm=challenge_params.get("algorithm", "MD5"),
+        )
+        self._basic_proxies.discard(proxy)
+        self._no_auth_proxies.discard(proxy)
+        return True
+
+    def __build_digest(self, challenge: _DigestChallenge, method: str, uri: str) -> str:
+        algorithm = challenge.algorithm.upper()
+        is_session = algorithm.endswith("-SESS")
+        hash_function = _DIGEST_HASHES.get(algorithm.removesuffix("-SESS"), hashlib.md5)
+
+        def digest(data: str) -> str:
+            return str(hash_function(data.encode()).hexdigest())
+
+        challenge.nonce_count += 1
+        nonce_count = f"{challenge.nonce_count:08x}"
+        cnonce = self.make_cnonce()
+
+        ha1 = digest(f"{self.login}:{challenge.realm}:{self.password}")
+        if is_session:
+            ha1 = digest(f"{ha1}:{challenge.nonce}:{cnonce}")
+        ha2 = digest(f"{method}:{uri}")
+        if challenge.qop:
+            response = digest(
+                f"{ha1}:{challenge.nonce}:{nonce_count}:{cnonce}:{challenge.qop}:{ha2}"
+            )
+        else:
+            response = digest(f"{ha1}:{challenge.nonce}:{ha2}")
+
+        header = (
+            f'Digest username="{self.login}", realm="{challenge.realm}", '
+            f'nonce="{challenge.nonce}", uri="{uri}", response="{response}", '
+            f"algorithm={challenge.algorithm}"
+        )
+        if challenge.opaque is not None:
+            header += f', opaque="{challenge.opaque}"'
+        if challenge.qop:
+            header += f', qop={challenge.qop}, nc={nonce_count}, cnonce="{cnonce}"'
+        return header
@@ -0,0 +1,178 @@
+import random
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+
+
+@dataclass
+class ProxyStats:
+    proxy: Any
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency_ewma: float | None = None
+    cooldown_until: float = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # Сглаживание, чтобы новые прокси не считались ни идеальными, ни мёртвыми
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+
+class ProxyPool:
+    """
+    Пул прокси с учётом их состояния. Для каждого прокси хранит долю успешных запросов,
+    скользящее среднее (EWMA) времени ответа, количество ошибок подряд и время, до которого
+    прокси отключён после ошибок (cooldown)
+
+    Передаётся в параметр proxies методов _make_backoff_request вместо списка прокси.
+    Вместо random.choice на каждой попытке выбирается лучший из двух случайных рабочих прокси
+    (по success_rate / latency_ewma), поэтому мёртвые и медленные прокси почти не выбираются,
+    а нагрузка всё равно распределяется между хорошими прокси.
+    Потокобезопасен, поэтому один пул можно использовать в потоках _threading_method
+    """
+
+    def __init__(
+        self,
+        proxies: Iterable[Any],
+        max_consecutive_failures: int = 3,
+        cooldown: float = 60,
+        ewma_alpha: float = 0.3,
+        failure_latency: float = 10,
+        failure_status_codes: Iterable[int] = (
+            HTTPStatus.FORBIDDEN,
+            HTTPStatus.PROXY_AUTHENTICATION_REQUIRED,
+            HTTPStatus.TOO_MANY_REQUESTS,
+        ),
+    ) -> None:
+        """
+        :param proxies: Iterable[Any]
+            Прокси в формате парсера: строки для AsyncBaseParser,
+            словари {"http": ..., "https": ...} для BaseParser и AsyncBaseCurlCffiParser
+        :param max_consecutive_failures: int = 3
+            После скольких ошибок подряд прокси отключается на cooldown секунд
+        :param cooldown: float = 60
+            На сколько секунд отключается прокси
+        :param ewma_alpha: float = 0.3
+            Вес последнего запроса в скользящем среднем времени ответа
+        :param failure_latency: float = 10
+            Время ответа в секундах, которое учитывается в среднем при ошибке,
+            чтобы прокси с ошибками проигрывал быстрым рабочим прокси
+        :param failure_status_codes: Iterable[int] = (403, 407, 429)
+            Коды ответа, которые считаются ошибкой прокси (кроме ошибок запроса)
+        """
+
+        self.max_consecutive_failures = max_consecutive_failures
+        self.cooldown = cooldown
+        self.ewma_alpha = ewma_alpha
+        self.failure_latency = failure_latency
+        self.failure_status_codes = frozenset(failure_status_codes)
+
+        self._stats: dict[Any, ProxyStats] = {}
+        self._lock = threading.Lock()
+        for proxy in proxies:
+            self._stats.setdefault(self.__key(proxy), ProxyStats(proxy=proxy))
+        if not self._stats:
+            raise ValueError("ProxyPool requires at least one proxy")
+
+    def choose(self) -> Any:
+        """
+        :return: Any
+            Прокси для следующей попытки запроса
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            available = [stats for stats in self._stats.values() if stats.cooldown_until <= now]
+            if not available:
+                # Все прокси отключены - берём тот, который включится раньше всех
+                return min(self._stats.values(), key=lambda stats: stats.cooldown_until).proxy
+            if len(available) == 1:
+                return available[0].proxy
+            first, second = random.sample(available, 2)
+            return max(first, second, key=self.__score).proxy
+
+    def report_success(self, proxy: Any, latency: float | None = None) -> None:
+        """
+        Запрос через прокси прошёл успешно
+
+        :param proxy: Any
+            Прокси из choose()
+        :param latency: float | None = None
+            Время ответа в секундах
+        """
+
+        with self._lock:
+            stats = self.__get_stats(proxy)
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            if latency is not None:
+                self.__update_latency(stats, latency)
+
+    def report_failure(self, proxy: Any) -> None:
+        """
+        Запрос через прокси завершился ошибкой или кодом из failure_status_codes
+
+        :param proxy: Any
+            Прокси из choose()
+        """
+
+        with self._lock:
+            stats = self.__get_stats(proxy)
+            stats.failures += 1
+            stats.consecutive_failures += 1
+            self.__update_latency(stats, self.failure_latency)
+            if stats.consecutive_failures >= self.max_consecutive_failures:
+                stats.cooldown_until = time.monotonic() + self.cooldown
+
+    def report_response(self, proxy: Any, status_code: int, latency: float | None = None) -> None:
+        """
+        Вызывает report_failure или report_success в зависимости от кода ответа
+        """
+
+        if status_code in self.failure_status_codes:
+            self.report_failure(proxy)
+        else:
+            self.report_success(proxy, latency)
+
+    def stats(self) -> list[ProxyStats]:
+        """
+        :return: list[ProxyStats]
+            Копии статистики по всем прокси
+        """
+
+        with self._lock:
+            return [ProxyStats(**vars(stats)) for stats in self._stats.values()]
+
+    def __get_stats(self, proxy: Any) -> ProxyStats:
+        key = self.__key(proxy)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ProxyStats(proxy=proxy)
+        return stats
+
+    def __update_latency(self, stats: ProxyStats, latency: float) -> None:
+        if stats.latency_ewma is None:
+            stats.latency_ewma = latency
+        else:
+            stats.latency_ewma += self.ewma_alpha * (latency - stats.latency_ewma)
+
+    @staticmethod
+    def __score(stats: ProxyStats) -> float:
+        # Прокси без замеров времени считается быстрым, чтобы он получил первые запросы
+        return stats.success_rate / (stats.latency_ewma or 0.001)
+
+    @staticmethod
+    def __key(proxy: Any) -> Any:
+        if isinstance(proxy, dict):
+            return tuple(sorted(proxy.items()))
+        return proxy
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def __repr__(self) -> str:
+        return f"ProxyPool({len(self)} proxies)"
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    created_at: float = 0.0
+    is_fresh: bool = True
+
+    @property
+    def etag(self) -> str | None:
+        return self.__get_header("ETag")
+
+    @property
+    def last_modified(self) -> str | None:
+        return self.__get_header("Last-Modified")
+
+    @property
+    def content_type(self) -> str:
+        return (self.__get_header("Content-Type") or "").split(";")[0].strip()
+
+    @property
+    def encoding(self) -> str:
+        for param in (self.__get_header("Content-Type") or "").split(";")[1:]:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "charset" and value.strip():
+                return value.strip().strip('"')
+        return "utf-8"
+
+    def conditional_headers(self) -> dict[str, str]:
+        """
+        :return: dict[str, str]
+            Заголовки условного запроса (If-None-Match, If-Modified-Since): если страница
+            не изменилась, сайт ответит 304 без тела
+        """
+
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def __get_header(self, name: str) -> str | None:
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+
+class ResponseCache:
+    """
+    Кэш ответов в SQLite. Ключ - метод, ссылка и тело запроса. Хранит ответы с кодом 200:
+        - пока ответ моложе ttl, запрос не отправляется, парсер возвращает ответ из кэша;
+        - когда ответ устарел, запрос отправляется с If-None-Match / If-Modified-Since
+          (если сайт отдавал ETag / Last-Modified), и при ответе 304 возвращается ответ из кэша;
+        - если записей больше max_entries, удаляются давно не использованные (LRU)
+
+    Потокобезопасен, один кэш можно передать нескольким парсерам. Асинхронные парсеры
+    обращаются к кэшу из потоков (asyncio.to_thread), чтобы запросы к SQLite не блокировали
+    цикл событий
+    """
+
+    def __init__(
+        self, path: str = ":memory:", ttl: float = 3600, max_entries: int = 10_000
+    ) -> None:
+        """
+        :param path: str = ":memory:"
+            Путь к файлу базы SQLite. ":memory:" - кэш только на время работы программы
+        :param ttl: float = 3600
+            Сколько секунд ответ считается свежим и возвращается без запроса
+        :param max_entries: int = 10_000
+            Максимальное количество ответов в кэше
+        """
+
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+        )
+        self._count = len(self)
+
+    @staticmethod
+    def make_key(method: str, url: str, body: Any = None) -> str:
+        """
+        :param method: str
+            HTTP-метод
+        :param url: str
+            Ссылка
+        :param body: Any = None
+            Тело запроса (data или json)
+        :return: str
+            Ключ ответа в кэше
+        """
+
+        if body is None:
+            body_bytes = b""
+        elif isinstance(body, bytes):
+            body_bytes = body
+        elif isinstance(body, str):
+            body_bytes = body.encode()
+        else:
+            body_bytes = json.dumps(body, sort_keys=True, default=str).encode()
+
+        key = hashlib.sha256(f"{method.upper()} {url}\n".encode())
+        key.update(body_bytes)
+        return key.hexdigest()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """
+        :return: CachedResponse | None
+            Ответ из кэша (в том числе устаревший, см. CachedResponse.is_fresh) или None
+        """
+
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                """
+                SELECT url, status_code, headers, content, created_at
+                FROM responses WHERE key = ?
+                """,
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+
+        url, status_code, headers, content, created_at = row
+        return CachedResponse(
+            url=url,
+            status_code=status_code,
+            content=content,
+            headers=json.loads(headers),
+            created_at=created_at,
+            is_fresh=now - created_at < self.ttl,
+        )
+
+    def set(
+        self, key: str, url: str, status_code: int, content: bytes, headers: dict[str, str]
+    ) -> None:
+        """
+        Сохраняет ответ в кэш. Если записей стало больше max_entries, удаляет давно
+        не использованные ответы сверх max_entries (по индексу accessed_at, без просмотра
+        всей таблицы)
+        """
+
+        now = time.time()
+        with self._lock:
+            is_new = (
+                self._connection.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+                is None
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, status_code, json.dumps(dict(headers)), content, now, now),
+            )
+            self._count += is_new
+            if self._count > self.max_entries:
+                cursor = self._connection.execute(
+                    """
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                    )
+                    """,
+                    (self._count - self.max_entries,),
+                )
+                self._count -= cursor.rowcount
+
+    def revalidate(self, key: str) -> None:
+        """
+        Отмечает ответ как снова свежий (сайт ответил 304 Not Modified)
+        """
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "UPDATE responses SET created_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, key),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            cursor = self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count -= cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._count = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
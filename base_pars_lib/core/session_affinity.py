@@ -0,0 +1,107 @@
+import threading
+import time
+from collections.abc import Hashable
+from typing import Any, Callable, Literal
+from urllib.parse import urlsplit
+
+
+class SessionAffinity:
+    """
+    Закрепляет за хостом (или ссылкой) набор параметров запроса, с которым запрос прошёл
+    успешно: прокси, заголовки (вместе с User-Agent), куки и impersonate.
+    Следующие запросы к тому же хосту в течение ttl секунд отправляются с теми же параметрами,
+    поэтому сайт видит один и тот же IP и cookie jar, а пройденные проверки анти-бот систем
+    не приходится проходить заново.
+    Если запрос с закреплёнными параметрами завершился ошибкой или кодом не 200,
+    параметры открепляются, и следующая попытка выбирает их заново
+
+    Потокобезопасен
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600,
+        key: Literal["host", "url"] | Callable[[str], Hashable] = "host",
+    ) -> None:
+        """
+        :param ttl: float = 600
+            Сколько секунд параметры остаются закреплёнными с момента закрепления
+        :param key: "host" | "url" | Callable[[str], Hashable] = "host"
+            По чему закреплять параметры: по хосту ссылки, по всей ссылке
+            или по ключу, который возвращает переданная функция
+        """
+
+        self.ttl = ttl
+        self.key = key
+
+        self._pins: dict[Hashable, tuple[float, dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        """
+        :return: dict[str, Any] | None
+            Закреплённые параметры запроса для ссылки или None
+        """
+
+        key = self.__get_key(url)
+        with self._lock:
+            pin = self._pins.get(key)
+            if pin is None:
+                return None
+            expires_at, params = pin
+            if expires_at <= time.monotonic():
+                del self._pins[key]
+                return None
+            return _copy_params(params)
+
+    def pin(self, url: str, params: dict[str, Any]) -> None:
+        """
+        Закрепляет параметры запроса за ключом ссылки на ttl секунд.
+        Уже закреплённые и не истёкшие параметры не перезаписываются
+
+        :param url: str
+            Ссылка запроса
+        :param params: dict[str, Any]
+            Параметры запроса (прокси, заголовки, куки, impersonate)
+        """
+
+        key = self.__get_key(url)
+        now = time.monotonic()
+        with self._lock:
+            pin = self._pins.get(key)
+            if pin is None or pin[0] <= now:
+                self._pins[key] = (now + self.ttl, _copy_params(params))
+
+    def unpin(self, url: str) -> None:
+        """
+        Открепляет параметры от ключа ссылки
+        """
+
+        key = self.__get_key(url)
+        with self._lock:
+            self._pins.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pins.clear()
+
+    def __get_key(self, url: str) -> Hashable:
+        if callable(self.key):
+            return self.key(url)
+        if self.key == "url":
+            return url
+        return urlsplit(url).netloc or url
+
+    def __len__(self) -> int:
+        return len(self._pins)
+
+
+def _copy_params(params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Копирует параметры вместе с вложенными словарями (заголовки, куки, прокси), чтобы
+    изменения словарей вызывающим кодом не меняли закреплённые параметры
+    """
+
+    return {
+        name: dict(value) if isinstance(value, dict) else value for name, value in params.items()
+    }
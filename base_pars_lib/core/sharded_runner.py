@@ -0,0 +1,117 @@
+import asyncio
+import inspect
+import multiprocessing
+import os
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from typing import Any, Callable
+
+from base_pars_lib.core.bad_urls import BadUrlInfo, BadUrls
+from base_pars_lib.utils import split_on_chunks_by_count_chunks
+
+
+def _run_shard(
+    parser_factory: Callable[[], Any], method_name: str, shard: list | tuple
+) -> tuple[Any, list[BadUrlInfo]]:
+    """
+    Выполняется в процессе-воркере: создаёт парсер, обрабатывает шард в собственном
+    событийном цикле и возвращает результат вместе с записями bad_urls парсера
+    """
+
+    parser = parser_factory()
+    method = getattr(parser, method_name)
+    if inspect.iscoroutinefunction(method):
+        result = asyncio.run(method(shard))
+    else:
+        result = method(shard)
+
+    bad_urls = getattr(parser, "bad_urls", None)
+    if isinstance(bad_urls, BadUrls):
+        return result, bad_urls.infos()
+    return result, [BadUrlInfo(url=url) for url in bad_urls or ()]
+
+
+class ShardedRunner:
+    """
+    Делит массив на шарды (split_on_chunks_by_count_chunks) и обрабатывает каждый шард
+    в отдельном процессе: в процессе создаётся свой экземпляр парсера и свой событийный цикл,
+    поэтому разбор HTML в парсерах загружает все ядра, а не одно.
+    Результаты отдаются по мере завершения шардов, bad_urls всех процессов объединяются
+    в self.bad_urls
+
+    parser_factory и результаты метода передаются между процессами через pickle:
+    фабрикой может быть класс парсера или функция уровня модуля (в том числе functools.partial)
+    """
+
+    def __init__(
+        self,
+        parser_factory: Callable[[], Any],
+        method_name: str,
+        processes: int | None = None,
+        shards_count: int | None = None,
+        mp_context: str | None = None,
+    ) -> None:
+        """
+        :param parser_factory: Callable[[], Any]
+            Функция без аргументов, которая создаёт парсер в процессе-воркере
+        :param method_name: str
+            Название метода парсера, который обрабатывает шард: method(shard) -> результат.
+            Может быть асинхронным (выполняется через asyncio.run) или обычным
+        :param processes: int | None = None
+            Количество процессов, None - количество ядер
+        :param shards_count: int | None = None
+            Количество шардов, None - в 4 раза больше количества процессов.
+            Результат шарда приходит только после обработки всего шарда, поэтому чем больше
+            шардов, тем чаще приходят результаты и равномернее распределяется нагрузка,
+            но тем больше раз создаётся парсер и передаются данные между процессами
+        :param mp_context: str | None = None
+            Способ запуска процессов: "fork", "spawn" или "forkserver", None - по умолчанию
+        """
+
+        self.parser_factory = parser_factory
+        self.method_name = method_name
+        self.processes = processes or os.cpu_count() or 1
+        self.shards_count = shards_count or self.processes * 4
+        self.mp_context = mp_context
+
+        self.bad_urls = BadUrls()
+
+    def iter_results(self, array: list | tuple) -> Iterator[tuple[int, Any]]:
+        """
+        :param array: list | tuple
+            Ссылки или другие данные для обработки
+        :return:
+            Итератор кортежей (номер шарда, результат метода) по мере завершения шардов:
+            результаты приходят целыми шардами, по shards_count штук за обход.
+            Ошибка в шарде пробрасывается, невыполненные шарды отменяются
+        """
+
+        if not array:
+            return
+        shards = list(split_on_chunks_by_count_chunks(array, min(self.shards_count, len(array))))
+
+        context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+        with ProcessPoolExecutor(
+            max_workers=min(self.processes, len(shards)), mp_context=context
+        ) as executor:
+            futures: dict[Future, int] = {
+                executor.submit(_run_shard, self.parser_factory, self.method_name, shard): index
+                for index, shard in enumerate(shards)
+            }
+            try:
+                for future in as_completed(futures):
+                    result, bad_url_infos = future.result()
+                    self.bad_urls.update(BadUrls.from_infos(bad_url_infos))
+                    yield futures[future], result
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def run(self, array: list | tuple) -> list:
+        """
+        То же самое, что и iter_results, но возвращает результаты всех шардов
+        в порядке шардов
+        """
+
+        results = list(self.iter_results(array))
+        return [result for _, result in sorted(results, key=lambda item: item[0])]
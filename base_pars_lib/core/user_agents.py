@@ -0,0 +1,117 @@
+import itertools
+import random
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from fake_useragent.utils import load
+
+FALLBACK_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36 Edg/122.0.0.0"
+)
+DEFAULT_BROWSERS = ("chrome", "edge", "firefox", "safari")
+
+_pool: "UserAgentPool | None" = None
+_pool_lock = threading.Lock()
+
+
+class UserAgentPool:
+    """
+    Пул user-agent из базы fake_useragent. База читается один раз, и user-agent заранее
+    раскладываются в массивы по всем сочетаниям платформы, браузера и ОС,
+    поэтому выбор случайного user-agent с фильтрами - это поиск в словаре и random.choice
+
+    Один пул на процесс возвращает get_user_agent_pool(), его используют все парсеры
+    """
+
+    def __init__(
+        self,
+        data: Iterable[dict[str, Any]] | None = None,
+        browsers: tuple[str, ...] = DEFAULT_BROWSERS,
+    ) -> None:
+        """
+        :param data: Iterable[dict[str, Any]] | None = None
+            Записи базы в формате fake_useragent (ключи useragent, type, browser, os, percent),
+            None - база fake_useragent
+        :param browsers: tuple[str, ...] = ("chrome", "edge", "firefox", "safari")
+            Браузеры, user-agent которых попадают в пул
+        """
+
+        self._user_agents: dict[tuple[str | None, ...], list[str]] = {}
+        self._cum_weights: dict[tuple[str | None, ...], list[float]] = {}
+
+        for item in load() if data is None else data:
+            if item["browser"] not in browsers:
+                continue
+            key = (item["type"], item["browser"], item["os"])
+            # Каждый user-agent попадает во все 8 сочетаний фильтров,
+            # где None означает "любое значение"
+            for mask in itertools.product((True, False), repeat=len(key)):
+                filter_key = tuple(value if use else None for value, use in zip(key, mask))
+                self._user_agents.setdefault(filter_key, []).append(item["useragent"])
+                cum_weights = self._cum_weights.setdefault(filter_key, [])
+                weight = float(item.get("percent") or 0) or 1.0
+                cum_weights.append((cum_weights[-1] if cum_weights else 0.0) + weight)
+
+    def get(
+        self,
+        platform: str | None = None,
+        browser: str | None = None,
+        os: str | None = None,
+        weighted: bool = False,
+    ) -> str:
+        """
+        :param platform: str | None = None
+            "pc", "mobile" или "tablet", None - любая
+        :param browser: str | None = None
+            "chrome", "edge", "firefox" или "safari", None - любой
+        :param os: str | None = None
+            "win10", "macos", "linux", "android" или "ios", None - любая
+        :param weighted: bool = False
+            Если True - user-agent выбирается с учётом доли браузера в базе (percent),
+            иначе равновероятно
+        :return: str
+            Случайный user-agent. Если подходящих нет - FALLBACK_USER_AGENT
+        """
+
+        key = (platform, browser, os)
+        user_agents = self._user_agents.get(key)
+        if not user_agents:
+            return FALLBACK_USER_AGENT
+        if weighted:
+            return random.choices(user_agents, cum_weights=self._cum_weights[key])[0]
+        return random.choice(user_agents)
+
+    @property
+    def random(self) -> str:
+        """
+        Случайный user-agent, как UserAgent().random
+        """
+
+        return self.get()
+
+    @property
+    def pc(self) -> str:
+        """
+        Случайный user-agent десктопного браузера
+        """
+
+        return self.get(platform="pc")
+
+    def __len__(self) -> int:
+        return len(self._user_agents.get((None, None, None), []))
+
+
+def get_user_agent_pool() -> UserAgentPool:
+    """
+    :return: UserAgentPool
+        Общий для процесса пул user-agent, создаётся при первом вызове
+    """
+
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = UserAgentPool()
+    return _pool
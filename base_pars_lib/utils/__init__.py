@@ -1,6 +1,6 @@
 # ruff: noqa: F401
 
-from base_pars_lib.utils._parser_utils import get_data_from_text
+from base_pars_lib.utils._parser_utils import TextExtractor, get_data_from_text
 from base_pars_lib.utils._working_with_data import (
     split_dict_on_chunks_by_chunk_len,
     split_on_chunks_by_chunk_len,
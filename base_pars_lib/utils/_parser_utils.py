@@ -1,3 +1,7 @@
+import re
+from collections.abc import Iterator, Mapping
+
+
 def get_data_from_text(
         text: str,
         start_row: str,
@@ -28,3 +32,232 @@ def get_data_from_text(
         return raw_data[:raw_data.find(end_row)]
     else:
         return raw_data[:raw_data.find(end_row) + len(end_row)]
+
+
+Marker = str | re.Pattern[str]
+
+# Флаги регулярного выражения, которые переносятся в общее выражение левых границ
+_INLINE_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.MULTILINE, "m"),
+    (re.DOTALL, "s"),
+    (re.VERBOSE, "x"),
+    (re.ASCII, "a"),
+)
+
+
+class TextExtractor:
+    """
+    Вырезает из текста сразу несколько полей по границам (строкам или регулярным выражениям).
+    В отличие от get_data_from_text не копирует остаток текста для каждого поля, копируются
+    только найденные значения. Если поле или его правая граница не найдены, значение - None
+
+    Левые границы всех полей собираются в одно регулярное выражение (строки - через
+    re.escape, регулярные выражения - как есть), и текст просматривается им один раз
+    (finditer): для каждого вхождения левой границы правая граница ищется от его конца
+    (str.find(..., start) или Pattern.search(text, pos)). Поэтому порядок полей на странице
+    не важен, а extract и extract_all не просматривают текст отдельно для каждого поля.
+    Границы разных полей, которые начинаются в одной позиции текста, засчитываются все,
+    но граница, которая начинается внутри вхождения другой границы, пропускается.
+    Регулярные выражения левых границ не должны ссылаться на группы по номеру (\\1)
+
+    Если ordered=True, поля ищутся в порядке объявления: каждое следующее поле - после
+    правой границы предыдущего найденного. Подходит, когда одинаковые границы полей
+    повторяются на странице и нужно взять вхождения по порядку
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, tuple[Marker, Marker]],
+        cut_start_row: bool = True,
+        cut_end_row: bool = True,
+        ordered: bool = False,
+    ) -> None:
+        """
+        :param fields: Mapping[str, tuple[Marker, Marker]]
+            Название поля и пара (левая граница, правая граница). Граница - строка
+            или скомпилированное регулярное выражение re.compile(...)
+        :param cut_start_row: bool = True
+            Обрезать левую границу
+        :param cut_end_row: bool = True
+            Обрезать правую границу
+        :param ordered: bool = False
+            Искать поля по порядку, каждое после предыдущего
+        """
+
+        self.fields = list(fields.items())
+        self.cut_start_row = cut_start_row
+        self.cut_end_row = cut_end_row
+        self.ordered = ordered
+
+        # Поля каждой разной левой границы по её регулярному выражению
+        self._start_fields: dict[str, list[int]] = {}
+        self._start_markers: dict[str, Marker] = {}
+        for index, (_, (start_row, _)) in enumerate(self.fields):
+            key = _get_marker_pattern(start_row)
+            self._start_fields.setdefault(key, []).append(index)
+            self._start_markers.setdefault(key, start_row)
+        # Без групп в выражении re находит первые символы границ быстрым поиском,
+        # а границу-строку можно узнать по найденному тексту
+        self._start_pattern = re.compile("|".join(self._start_markers))
+        self._literal_keys = {
+            marker: key for key, marker in self._start_markers.items() if isinstance(marker, str)
+        }
+        # Для каждой границы - другие границы, которые могут начинаться в той же позиции
+        markers = list(self._start_markers.items())
+        self._same_position_markers: dict[str, list[tuple[str, Marker]]] = {
+            key: [
+                (other_key, other_marker)
+                for other_key, other_marker in markers
+                if other_key != key
+                and (
+                    not isinstance(marker, str)
+                    or not isinstance(other_marker, str)
+                    or marker.startswith(other_marker)
+                    or other_marker.startswith(marker)
+                )
+            ]
+            for key, marker in markers
+        }
+
+    def extract(self, text: str) -> dict[str, str | None]:
+        """
+        :param text: str
+            Основной текст
+        :return: dict[str, str | None]
+            Значения полей (первое вхождение)
+        """
+
+        result: dict[str, str | None] = dict.fromkeys(name for name, _ in self.fields)
+        if self.ordered:
+            cursor = 0
+            for name, (start_row, end_row) in self.fields:
+                start, start_end = _find_marker(text, start_row, cursor)
+                found = self.__cut_field(text, start, start_end, end_row) if start != -1 else None
+                if found is not None:
+                    result[name], cursor = found
+            return result
+
+        not_found_keys = dict(self._start_fields)
+        for key, start, start_end in self.__iter_start_rows(text) if not_found_keys else ():
+            indexes = not_found_keys.pop(key, None)
+            if indexes is None:
+                continue
+            for index in indexes:
+                name, (_, end_row) = self.fields[index]
+                found = self.__cut_field(text, start, start_end, end_row)
+                result[name] = found[0] if found is not None else None
+            if not not_found_keys:
+                break
+        return result
+
+    def extract_all(self, text: str) -> dict[str, list[str]]:
+        """
+        :param text: str
+            Основной текст
+        :return: dict[str, list[str]]
+            Все непересекающиеся вхождения каждого поля
+        """
+
+        result: dict[str, list[str]] = {name: [] for name, _ in self.fields}
+        # Позиция, с которой засчитываются вхождения поля, None - поиск поля закончен
+        positions: list[int | None] = [0] * len(self.fields)
+        active_count = len(self.fields)
+        for key, start, start_end in self.__iter_start_rows(text) if active_count else ():
+            for index in self._start_fields[key]:
+                position = positions[index]
+                if position is None or start < position:
+                    continue
+                name, (_, end_row) = self.fields[index]
+                found = self.__cut_field(text, start, start_end, end_row)
+                if found is not None:
+                    value, next_position = found
+                    result[name].append(value)
+                    # Пустые границы - дальше искать нечего
+                    positions[index] = next_position if next_position != position else None
+                else:
+                    positions[index] = None
+                if positions[index] is None:
+                    active_count -= 1
+            if not active_count:
+                break
+        return result
+
+    def __iter_start_rows(self, text: str) -> Iterator[tuple[str, int, int]]:
+        """
+        Просматривает текст общим выражением левых границ
+
+        :return: Iterator[tuple[str, int, int]]
+            Выражение левой границы, начало и конец её вхождения, в порядке вхождений
+        """
+
+        all_markers = list(self._start_markers.items())
+        for match in self._start_pattern.finditer(text):
+            start = match.start()
+            key = self._literal_keys.get(match.group())
+            if key is not None:
+                yield key, start, match.end()
+                other_markers = self._same_position_markers[key]
+            else:
+                # Найдено регулярное выражение - проверяем все границы в этой позиции
+                other_markers = all_markers
+            for other_key, marker in other_markers:
+                start_end = _match_marker(text, marker, start)
+                if start_end != -1:
+                    yield other_key, start, start_end
+
+    def __cut_field(
+        self, text: str, start: int, start_end: int, end_row: Marker
+    ) -> tuple[str, int] | None:
+        """
+        :return: tuple[str, int] | None
+            Значение поля с левой границей text[start:start_end]
+            и позиция после его правой границы
+        """
+
+        end, end_end = _find_marker(text, end_row, start_end)
+        if end == -1:
+            return None
+        return text[
+            start_end if self.cut_start_row else start : end if self.cut_end_row else end_end
+        ], end_end
+
+
+def _get_marker_pattern(marker: Marker) -> str:
+    """
+    :return: str
+        Регулярное выражение границы для общего выражения, с флагами marker
+    """
+
+    if isinstance(marker, str):
+        return re.escape(marker)
+    flags = "".join(letter for flag, letter in _INLINE_FLAGS if marker.flags & flag)
+    if not flags:
+        return marker.pattern
+    # Перенос строки закрывает комментарий в конце выражения с флагом re.VERBOSE
+    return f"(?{flags}:{marker.pattern}\n)" if "x" in flags else f"(?{flags}:{marker.pattern})"
+
+
+def _match_marker(text: str, marker: Marker, position: int) -> int:
+    """
+    :return: int
+        Конец вхождения границы, которое начинается ровно в position, или -1
+    """
+
+    if isinstance(marker, str):
+        return position + len(marker) if text.startswith(marker, position) else -1
+    match = marker.match(text, position)
+    return match.end() if match is not None else -1
+
+
+def _find_marker(text: str, marker: Marker, position: int) -> tuple[int, int]:
+    """
+    :return: tuple[int, int]
+        Начало и конец первого вхождения границы, начиная с position, или (-1, -1)
+    """
+
+    if isinstance(marker, str):
+        start = text.find(marker, position)
+        return (start, start + len(marker)) if start != -1 else (-1, -1)
+    match = marker.search(text, position)
+    return match.span() if match is not None else (-1, -1)
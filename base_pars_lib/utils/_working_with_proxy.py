@@ -1,7 +1,10 @@
 import requests
 from requests.auth import HTTPProxyAuth
 
-from base_pars_lib.core._requests_digest_proxy import HTTPProxyDigestAuth
+from base_pars_lib.core._requests_digest_proxy import (
+    HTTPProxyDigestAuth,
+    mount_proxy_digest_adapter,
+)
 
 
 def rotating_proxy_auth(
@@ -22,10 +25,10 @@ def rotating_proxy_auth(
     :param password: str
         пароль ротационного прокси
     :return:
-        requests-сессию, через которую отправляются запросы
+        requests-сессию с HTTPProxyDigestAdapter, через которую отправляются запросы
     """
 
-    session_proxy = requests.session()
+    session_proxy = mount_proxy_digest_adapter(requests.session())
     session_proxy.proxies = {
         'http': http_url,
         'https': https_url
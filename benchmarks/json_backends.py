@@ -0,0 +1,52 @@
+"""
+Сравнение скорости разбора json библиотеками из core.json_backends на больших ответах API
+
+Запуск:
+    python -m benchmarks.json_backends
+"""
+
+import json
+import random
+import string
+import time
+
+from base_pars_lib.core.json_backends import get_json_loads
+
+
+def make_payload(items_count: int) -> bytes:
+    random.seed(0)
+    items = [
+        {
+            "id": i,
+            "title": "".join(random.choices(string.ascii_letters, k=40)),
+            "price": round(random.uniform(1, 10_000), 2),
+            "in_stock": bool(i % 2),
+            "tags": [random.choice(["new", "sale", "hit", "last"]) for _ in range(3)],
+            "seller": {"id": i % 100, "name": "Продавец", "rating": 4.7},
+        }
+        for i in range(items_count)
+    ]
+    return json.dumps({"items": items, "total": items_count}, ensure_ascii=False).encode()
+
+
+def main(items_count: int = 50_000, repeats: int = 10) -> None:
+    payload = make_payload(items_count)
+    size_mb = len(payload) / 1024 / 1024
+    print(f"payload: {size_mb:.1f} MB, {items_count} items, {repeats} repeats")
+
+    for backend in ("json", "orjson", "msgspec"):
+        try:
+            loads = get_json_loads(backend)
+        except ImportError:
+            print(f"{backend:>8}: not installed")
+            continue
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            loads(payload)
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"{backend:>8}: {elapsed * 1000:8.1f} ms/payload, {size_mb / elapsed:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Накладные расходы транспорта авторизации в прокси на один запрос.
+
+Раньше импорт base_pars_lib подменял HTTPConnectionPool.urlopen и HTTPConnection.send
+для всего процесса: каждый запрос любой библиотеки проходил через лишние обёртки
+и просмотр всех заголовков в поисках Proxy-Authorization. Теперь эти обёртки есть только
+в сессиях с HTTPProxyDigestAdapter. Бенчмарк измеряет их стоимость отдельно от сети:
+методы пула и соединения urllib3 заменены заглушками
+
+Запуск:
+    python -m benchmarks.proxy_digest_adapter
+"""
+
+import functools
+import timeit
+from typing import Any
+
+from base_pars_lib.core._requests_digest_proxy import (
+    ProxyDigestConnectionMixin,
+    ProxyDigestPoolMixin,
+)
+
+
+class StubPool:
+    def __init__(self) -> None:
+        self.headers: dict[str, str] = {}
+        self.proxy_headers: dict[str, str] = {}
+
+    def urlopen(self, *args: Any, **kwargs: Any) -> None:
+        pass
+
+
+class StubConnection:
+    def send(self, data: bytes) -> None:
+        pass
+
+
+class DigestPool(ProxyDigestPoolMixin, StubPool):
+    pass
+
+
+class DigestConnection(ProxyDigestConnectionMixin, StubConnection):
+    pass
+
+
+def measure_request(pool: StubPool, connection: StubConnection, headers: dict[str, str]) -> None:
+    # Запрос без тела: заголовки отправляются одним send
+    pool.urlopen("GET", "/", headers=headers)
+    connection.send(b"GET / HTTP/1.1\r\n\r\n")
+
+
+def main(requests_count: int = 200_000, repeats: int = 5) -> None:
+    print(f"{requests_count} requests, best of {repeats}")
+
+    for headers_count in (5, 20, 50):
+        headers = {f"X-Header-{i}": "value" for i in range(headers_count)}
+        results = {}
+        for name, pool, connection in (
+            ("urllib3", StubPool(), StubConnection()),
+            ("digest", DigestPool(), DigestConnection()),
+        ):
+            timer = timeit.Timer(functools.partial(measure_request, pool, connection, headers))
+            results[name] = min(timer.repeat(repeats, requests_count)) / requests_count
+        overhead = (results["digest"] - results["urllib3"]) * 1_000_000_000
+        print(
+            f"{headers_count:>3} headers: urllib3 {results['urllib3'] * 1e9:7.0f} ns, "
+            f"digest {results['digest'] * 1e9:7.0f} ns, overhead {overhead:7.0f} ns/request"
+        )
+
+
+if __name__ == "__main__":
+    main()
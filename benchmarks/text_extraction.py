@@ -0,0 +1,92 @@
+"""
+Извлечение многих полей из большой страницы: get_data_from_text и TextExtractor.
+
+get_data_from_text для каждого поля копирует остаток текста от левой границы (срез),
+поэтому на странице в несколько мегабайт с десятками полей большая часть времени уходит
+на копирование. Поиск каждого поля через str.find без копирования всё равно просматривает
+текст отдельно для каждого поля. TextExtractor ищет левые границы всех полей одним
+регулярным выражением за один просмотр текста и копирует только значения, порядок
+объявления полей при этом не важен ("unordered" - поля объявлены в случайном порядке)
+
+Запуск:
+    python -m benchmarks.text_extraction
+"""
+
+import functools
+import random
+import re
+import timeit
+from collections.abc import Callable
+
+from base_pars_lib.utils import TextExtractor, get_data_from_text
+
+
+def make_page(fields_count: int, page_size: int) -> str:
+    # Поля равномерно разбросаны по странице, между ними - шум без границ полей
+    filler_size = page_size // (fields_count + 1)
+    rng = random.Random(0)
+    filler = "".join(rng.choice("abcdefgh <>/=\n") for _ in range(filler_size))
+    return (
+        "".join(f'{filler}<meta name="field{i}" content="value {i}">' for i in range(fields_count))
+        + filler
+    )
+
+
+def extract_with_get_data_from_text(text: str, fields: dict[str, tuple[str, str]]) -> None:
+    for start_row, end_row in fields.values():
+        get_data_from_text(text, start_row, end_row)
+
+
+def extract_with_find(text: str, fields: dict[str, tuple[str, str]]) -> None:
+    # Без копирования, но текст просматривается от начала для каждого поля
+    for start_row, end_row in fields.values():
+        start = text.find(start_row)
+        if start != -1:
+            start += len(start_row)
+            text[start : text.find(end_row, start)]
+
+
+def main(fields_count: int = 30, page_size: int = 2_000_000, repeats: int = 5) -> None:
+    text = make_page(fields_count, page_size)
+    fields = {f"field{i}": (f'name="field{i}" content="', '"') for i in range(fields_count)}
+    regex_fields = {
+        name: (re.compile(re.escape(start_row)), end_row)
+        for name, (start_row, end_row) in fields.items()
+    }
+
+    shuffled_names = list(fields)
+    random.Random(0).shuffle(shuffled_names)
+    unordered_fields = {name: fields[name] for name in shuffled_names}
+
+    extractor = TextExtractor(fields)
+    unordered_extractor = TextExtractor(unordered_fields)
+    expected = extractor.extract(text)
+    assert expected == TextExtractor(fields, ordered=True).extract(text)
+    assert expected == unordered_extractor.extract(text)
+    assert expected == TextExtractor(regex_fields).extract(text)
+    assert all(expected[name] == get_data_from_text(text, *fields[name]) for name in fields)
+
+    print(f"{fields_count} fields, page {len(text) / 1_000_000:.1f} MB, best of {repeats}")
+    benchmarks: list[tuple[str, Callable[[], object]]] = [
+        ("get_data_from_text", functools.partial(extract_with_get_data_from_text, text, fields)),
+        ("str.find for each field", functools.partial(extract_with_find, text, fields)),
+        ("TextExtractor", functools.partial(extractor.extract, text)),
+        ("TextExtractor unordered", functools.partial(unordered_extractor.extract, text)),
+        (
+            "TextExtractor ordered",
+            functools.partial(TextExtractor(fields, ordered=True).extract, text),
+        ),
+        ("TextExtractor regex", functools.partial(TextExtractor(regex_fields).extract, text)),
+        ("TextExtractor extract_all", functools.partial(extractor.extract_all, text)),
+        (
+            "TextExtractor unordered extract_all",
+            functools.partial(unordered_extractor.extract_all, text),
+        ),
+    ]
+    for name, function in benchmarks:
+        result = min(timeit.Timer(function).repeat(repeats, 10)) / 10
+        print(f"{name:<36} {result * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import logging
+import sys
+
+import pytest
+
+from base_pars_lib.config import logger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def parser_method(print_logs: bool) -> None:
+    logger.backoff_exception(TimeoutError("timeout"), 2, print_logs, "https://example.com")
+
+
+def test_caller_name_and_lazy_format(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.INFO, logger="base_pars_lib"):
+        parser_method(print_logs=False)
+        logger.backoff_status_code(429, 3, "https://example.com", print_logs=False)
+
+    first, second = caplog.records
+    assert first.funcName == "parser_method"
+    assert first.getMessage() == "timeout: iter 2: url https://example.com"
+    assert second.funcName == "test_caller_name_and_lazy_format"
+    assert second.getMessage() == "429: iter 3: url https://example.com"
+
+
+def test_print_logs(capsys: pytest.CaptureFixture) -> None:
+    handler = logger.print_logger.handlers[0]
+    stream = handler.setStream(sys.stdout)  # type: ignore[attr-defined]
+    root_level = logging.getLogger().level
+    # Логи печатаются, даже если у root уровень выше INFO
+    logging.getLogger().setLevel(logging.WARNING)
+    try:
+        parser_method(print_logs=True)
+    finally:
+        logging.getLogger().setLevel(root_level)
+        handler.setStream(stream)  # type: ignore[attr-defined]
+
+    assert " - info - parser_method - timeout: iter 2: url https://example.com" in (
+        capsys.readouterr().out
+    )
+
+
+def test_queue_logging() -> None:
+    handler = ListHandler()
+    records = handler.records
+    logging.getLogger().addHandler(handler)
+
+    logger.enable_queue_logging()
+    try:
+        parser_method(print_logs=False)
+    finally:
+        logger.disable_queue_logging()
+        logging.getLogger().removeHandler(handler)
+
+    assert logger.logger.propagate
+    assert [record.getMessage() for record in records] == [
+        "timeout: iter 2: url https://example.com"
+    ]
+    assert records[0].funcName == "parser_method"
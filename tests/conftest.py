@@ -69,9 +69,9 @@ def mock_response() -> ClientResponse:
     response = MagicMock(spec=ClientResponse)
     response.url = "http://example.com"
     response.status = 200
-    response.text.return_value = "test text"
-    response.json.return_value = {"key": "value"}
-    response.read.return_value = b"raw content"
+    response.read.return_value = b'{"key": "value"}'
+    response.get_encoding.return_value = "utf-8"
+    response.content_type = "application/json"
     return response
 
 
@@ -1,11 +1,11 @@
 from typing import List
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
 import pytest
-from fake_useragent import UserAgent
 from playwright.async_api import Page
 
 from base_pars_lib.core.async_browsers_parser_base import AsyncBrowsersParserBase
+from base_pars_lib.core.user_agents import UserAgentPool
 
 
 async def page_method(url: str) -> str:
@@ -13,21 +13,21 @@ async def page_method(url: str) -> str:
 
 
 @pytest.mark.asyncio
-async def test_get_pc_user_agent(
-    async_browsers_parser: AsyncBrowsersParserBase, monkeypatch: pytest.MonkeyPatch
-) -> None:
-    # Мокаем UserAgent
-    mock_user_agent = MagicMock()
-    mock_user_agent.random = (
+async def test_get_pc_user_agent(async_browsers_parser: AsyncBrowsersParserBase) -> None:
+    pc_user_agent = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
         "Chrome/91.0.4472.124 Safari/537.36"
     )
+    async_browsers_parser.user_agent = UserAgentPool(
+        [
+            {"useragent": pc_user_agent, "type": "pc", "browser": "chrome", "os": "win10"},
+            {"useragent": "iPhone", "type": "mobile", "browser": "safari", "os": "ios"},
+        ]
+    )
 
-    monkeypatch.setattr(UserAgent, "random", mock_user_agent.random)
-
-    user_agent = await async_browsers_parser._get_pc_user_agent()
-    assert user_agent == mock_user_agent.random
+    for _ in range(10):
+        assert await async_browsers_parser._get_pc_user_agent() == pc_user_agent
 
 
 @pytest.mark.asyncio
@@ -1,9 +1,16 @@
+import asyncio
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pytest
 from curl_cffi.requests.models import Response
 
-from base_pars_lib.core.async_requests_parser_base import AiohttpResponse, AsyncRequestsParserBase
+from base_pars_lib.core.async_requests_parser_base import (
+    _NOT_DECODED,
+    AiohttpResponse,
+    AsyncRequestsParserBase,
+)
+from base_pars_lib.core.crawl_checkpoint import CrawlCheckpoint
 
 
 async def async_page_method(url: List[str]) -> List[str]:
@@ -19,6 +26,51 @@ async def check_page(
     return test_arg
 
 
+def test_aiohttp_response_lazy_decoding() -> None:
+    response = AiohttpResponse(
+        url="http://example.com",
+        status_code=200,
+        content='{"key": "значение"}'.encode("cp1251"),
+        encoding="cp1251",
+        content_type="application/json",
+    )
+
+    # До обращения ничего не декодировано, json декодируется без text
+    assert response._text is _NOT_DECODED
+    assert response.json == {"key": "значение"}
+    assert response._text is _NOT_DECODED
+    assert response.text == '{"key": "значение"}'
+    assert response.text is response.text
+
+
+@pytest.mark.parametrize(
+    "content, content_type, expected_json",
+    [
+        (b'{"key": "value"}', "text/html", None),
+        (b"   ", "application/json", None),
+        (b"not json", "application/json", None),
+        (b'{"key": "value"}', "application/problem+json", {"key": "value"}),
+    ],
+)
+def test_aiohttp_response_json(content: bytes, content_type: str, expected_json: Any) -> None:
+    response = AiohttpResponse(
+        url="http://example.com", status_code=200, content=content, content_type=content_type
+    )
+    assert response.json == expected_json
+
+
+def test_aiohttp_response_encoding_error() -> None:
+    response = AiohttpResponse(url="http://example.com", status_code=200, content=b"\xff\xfe")
+    assert response.text.startswith("Encoding error:")
+
+
+def test_aiohttp_response_without_content() -> None:
+    response = AiohttpResponse(text="Hihi", json={"hi": "hihi"}, url="", status_code=200)
+    assert response.text == "Hihi"
+    assert response.json == {"hi": "hihi"}
+    assert response.content == b"Hihi"
+
+
 @pytest.mark.parametrize(
     "params, response_status_code, results",
     [
@@ -211,6 +263,210 @@ async def test_method_in_series(
     assert results == expected_results
 
 
+@pytest.mark.parametrize("max_concurrency", [None, 1, 3, 100])
+@pytest.mark.asyncio
+async def test_gather_in_pool(
+    async_requests_parser: AsyncRequestsParserBase, max_concurrency: Optional[int]
+) -> None:
+    in_flight = 0
+    max_in_flight = 0
+
+    async def make_task(i: int) -> int:
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        # Более ранние задачи завершаются позже, чтобы проверить сохранение порядка
+        await asyncio.sleep(0.001 * (10 - i))
+        in_flight -= 1
+        return i * 2
+
+    results = await async_requests_parser._gather_in_pool(10, make_task, max_concurrency)
+
+    assert results == [i * 2 for i in range(10)]
+    if max_concurrency is not None:
+        assert max_in_flight <= max_concurrency
+    else:
+        assert max_in_flight == 10
+
+
+@pytest.mark.parametrize("max_concurrency", [None, 2])
+@pytest.mark.asyncio
+async def test_iter_in_pool(
+    async_requests_parser: AsyncRequestsParserBase, max_concurrency: Optional[int]
+) -> None:
+    async def make_task(i: int) -> int:
+        await asyncio.sleep(0.001 * (5 - i))
+        return i * 2
+
+    results = [
+        item
+        async for item in async_requests_parser._iter_in_pool(5, make_task, max_concurrency)
+    ]
+
+    # Результаты отдаются по мере готовности, но каждый приходит со своим индексом
+    assert sorted(results) == [(i, i * 2) for i in range(5)]
+    if max_concurrency is None:
+        assert [index for index, _ in results] == [4, 3, 2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_iter_in_pool_exception(async_requests_parser: AsyncRequestsParserBase) -> None:
+    async def make_task(i: int) -> int:
+        if i == 1:
+            raise ValueError("task error")
+        return i
+
+    with pytest.raises(ValueError, match="task error"):
+        async for _ in async_requests_parser._iter_in_pool(3, make_task, 1):
+            pass
+
+
+@pytest.mark.parametrize("max_concurrency", [0, -1])
+@pytest.mark.asyncio
+async def test_pool_invalid_max_concurrency(
+    async_requests_parser: AsyncRequestsParserBase, max_concurrency: int
+) -> None:
+    async def make_task(i: int) -> int:
+        return i
+
+    async def make_attempt(i: int, attempt: int) -> tuple[bool, int, float]:
+        return True, i, 0
+
+    with pytest.raises(ValueError, match="max_concurrency"):
+        await async_requests_parser._gather_in_pool(3, make_task, max_concurrency)
+    with pytest.raises(ValueError, match="max_concurrency"):
+        async for _ in async_requests_parser._iter_in_pool(3, make_task, max_concurrency):
+            pass
+    with pytest.raises(ValueError, match="max_concurrency"):
+        await async_requests_parser._gather_with_retry_queue(3, make_attempt, max_concurrency)
+
+
+@pytest.mark.asyncio
+async def test_iter_with_retry_queue(async_requests_parser: AsyncRequestsParserBase) -> None:
+    attempts: list[tuple[int, int]] = []
+
+    async def make_attempt(i: int, attempt: int) -> tuple[bool, int, float]:
+        attempts.append((i, attempt))
+        # Задача 0 дважды неудачна и откладывается, остальные выполняются с первой попытки
+        if i == 0 and attempt < 3:
+            return False, 0, 0.05
+        return True, i * 2, 0.0
+
+    results = [
+        item
+        async for item in async_requests_parser._iter_with_retry_queue(5, make_attempt, 1)
+    ]
+
+    assert sorted(results) == [(i, i * 2) for i in range(5)]
+    # Пока задача 0 ждёт повтора, единственный воркер выполняет остальные задачи
+    assert [index for index, _ in results][:4] == [1, 2, 3, 4]
+    assert attempts[:2] == [(0, 1), (1, 1)]
+    assert attempts.count((0, 3)) == 1
+
+
+@pytest.mark.asyncio
+async def test_gather_with_retry_queue_backoff_delay(
+    async_requests_parser: AsyncRequestsParserBase,
+) -> None:
+    async def attempt_coro(i: int) -> int:
+        await async_requests_parser._backoff_sleep(100)
+        return i
+
+    async def make_attempt(i: int, attempt: int) -> tuple[bool, int, float]:
+        result, delay = await async_requests_parser._collect_backoff_delay(attempt_coro(i))
+        assert delay == 100
+        return True, result, 0.0
+
+    results = await asyncio.wait_for(
+        async_requests_parser._gather_with_retry_queue(3, make_attempt, 2), timeout=1
+    )
+
+    assert results == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_method_in_series_checkpoint(
+    async_requests_parser: AsyncRequestsParserBase, tmp_path: Path
+) -> None:
+    path = str(tmp_path / "checkpoint.sqlite")
+    chunked_array = [["http://example.com/1"], ["http://example.com/2"], ["http://example.com/3"]]
+    processed: list[list[str]] = []
+
+    async def failing_method(chunk: list[str]) -> None:
+        if chunk == chunked_array[2]:
+            raise RuntimeError("crash")
+        processed.append(chunk)
+        async_requests_parser.bad_urls.add(chunk[0], status_code=500)
+
+    with pytest.raises(RuntimeError):
+        await async_requests_parser._method_in_series(
+            chunked_array, failing_method, checkpoint=CrawlCheckpoint(path)
+        )
+
+    async def method(chunk: list[str]) -> None:
+        processed.append(chunk)
+
+    # Перезапуск: обработанные чанки пропускаются, bad_urls восстанавливаются
+    async_requests_parser.bad_urls.clear()
+    await async_requests_parser._method_in_series(
+        chunked_array, method, checkpoint=CrawlCheckpoint(path)
+    )
+
+    assert processed == chunked_array
+    assert async_requests_parser.bad_urls.to_list() == ["http://example.com/1", "http://example.com/2"]
+
+
+@pytest.mark.asyncio
+async def test_single_flight(async_requests_parser: AsyncRequestsParserBase) -> None:
+    async_requests_parser.single_flight = True
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    async def fetch() -> str:
+        calls.append("fetch")
+        await release.wait()
+        return "response"
+
+    first = asyncio.ensure_future(async_requests_parser._single_flight("key", fetch))
+    second = asyncio.ensure_future(async_requests_parser._single_flight("key", fetch))
+    await asyncio.sleep(0)
+
+    # Отмена первого ожидающего не отменяет запрос для второго
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == "response"
+    assert first.cancelled()
+    assert calls == ["fetch"]
+    assert not async_requests_parser._in_flight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_attempts(async_requests_parser: AsyncRequestsParserBase) -> None:
+    async_requests_parser.single_flight = True
+    urls = ["https://a.com", "https://a.com", "https://b.com"]
+    attempts: list[tuple[str, int]] = []
+
+    async def prepare_attempts(i: int) -> tuple[str, str]:
+        return urls[i], urls[i]
+
+    async def run_attempt(url: str, attempt: int) -> tuple[bool, str | None]:
+        attempts.append((url, attempt))
+        await asyncio.sleep(0.01)
+        # Первая попытка https://a.com неудачна
+        return url != "https://a.com" or attempt > 1, f"{url} {attempt}"
+
+    make_attempt = async_requests_parser._single_flight_attempts(
+        prepare_attempts, run_attempt, iter_count=3
+    )
+    results = await async_requests_parser._gather_with_retry_queue(3, make_attempt, 3)
+
+    assert results == ["https://a.com 2", "https://a.com 2", "https://b.com 1"]
+    assert sorted(attempts) == [("https://a.com", 1), ("https://a.com", 2), ("https://b.com", 1)]
+    assert not async_requests_parser._in_flight
+
+
 @pytest.mark.asyncio
 async def test_calculate_random_cookies_headers_index(
     async_requests_parser: AsyncRequestsParserBase,
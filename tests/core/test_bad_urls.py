@@ -0,0 +1,94 @@
+from pathlib import Path
+from threading import Thread
+
+import pytest
+
+from base_pars_lib.core.bad_urls import BadUrls
+
+
+def test_add_and_discard() -> None:
+    bad_urls = BadUrls()
+    bad_urls.add("http://example.com", status_code=500)
+    bad_urls.add("http://example.com", exception=ValueError("proxy error"))
+    bad_urls.append("http://example.org")
+
+    assert "http://example.com" in bad_urls
+    assert len(bad_urls) == 2
+    assert list(bad_urls) == ["http://example.com", "http://example.org"]
+
+    info = bad_urls.get("http://example.com")
+    assert info is not None
+    assert info.failures_count == 2
+    assert info.last_status_code == 500
+    assert info.last_exception == "ValueError('proxy error')"
+
+    bad_urls.discard("http://example.com")
+    bad_urls.discard("http://not-in-bad-urls.com")
+    assert bad_urls.to_list() == ["http://example.org"]
+
+    with pytest.raises(ValueError):
+        bad_urls.remove("http://example.com")
+
+
+def test_list_compatibility() -> None:
+    bad_urls = BadUrls(["http://example.com", "http://example.org"])
+
+    # Индексы, срезы и сравнение работают, как у прежнего списка self.bad_urls
+    assert bad_urls[0] == "http://example.com"
+    assert bad_urls[-1] == "http://example.org"
+    assert bad_urls[:1] == ["http://example.com"]
+    assert bad_urls == ["http://example.com", "http://example.org"]
+    assert bad_urls == BadUrls(["http://example.com", "http://example.org"])
+    assert BadUrls() == []
+    assert bad_urls != ["http://example.org"]
+    with pytest.raises(IndexError):
+        bad_urls[2]
+
+
+def test_update() -> None:
+    bad_urls = BadUrls(["http://example.com"])
+    other = BadUrls()
+    other.add("http://example.com", status_code=403)
+    other.add("http://example.org")
+
+    bad_urls.update(other)
+    bad_urls.update(["http://example.net"])
+
+    assert bad_urls.to_list() == ["http://example.com", "http://example.org", "http://example.net"]
+    info = bad_urls.get("http://example.com")
+    assert info is not None
+    assert info.failures_count == 2
+    assert info.last_status_code == 403
+
+
+def test_dump_and_load(tmp_path: Path) -> None:
+    bad_urls = BadUrls()
+    bad_urls.add("http://example.com", status_code=503)
+    bad_urls.add("http://example.org", exception=TimeoutError())
+
+    path = str(tmp_path / "bad_urls.jsonl")
+    bad_urls.dump(path)
+    loaded = BadUrls.load(path)
+
+    assert loaded.to_list() == bad_urls.to_list()
+    assert loaded.infos() == bad_urls.infos()
+
+
+def test_threads() -> None:
+    bad_urls = BadUrls()
+
+    def worker() -> None:
+        for i in range(1000):
+            bad_urls.add(f"http://example.com/{i % 10}")
+
+    threads = [Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(bad_urls) == 10
+    assert sum(info.failures_count for info in bad_urls.infos()) == 8000
+
+
+# pytest tests/core/test_bad_urls.py
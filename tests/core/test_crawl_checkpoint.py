@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from base_pars_lib.core.bad_urls import BadUrls
+from base_pars_lib.core.crawl_checkpoint import CrawlCheckpoint
+
+
+def test_mark_done_and_resume(tmp_path: Path) -> None:
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = CrawlCheckpoint(path, job="products")
+    bad_urls = BadUrls()
+    bad_urls.add("https://example.com/1", status_code=500)
+
+    checkpoint.mark_done(0, ["https://example.com/1"], bad_urls)
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path, job="products")
+    assert checkpoint.is_done(0, ["https://example.com/1"])
+    # Чанк с тем же номером, но другим содержимым не считается обработанным
+    assert not checkpoint.is_done(0, ["https://example.com/2"])
+    assert not checkpoint.is_done(1, ["https://example.com/3"])
+    assert checkpoint.load_bad_urls().get("https://example.com/1").last_status_code == 500  # type: ignore[union-attr]
+
+    # Прогресс других обходов в том же файле не затрагивается
+    assert CrawlCheckpoint(path, job="categories").done_indexes() == set()
+    checkpoint.close()
+
+
+def test_without_resume(tmp_path: Path) -> None:
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.mark_done(0, ["https://example.com/1"], BadUrls(["https://example.com/1"]))
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path, resume=False)
+    assert len(checkpoint) == 0
+    assert not checkpoint.load_bad_urls()
+    checkpoint.close()
+
+
+def test_mark_done_writes_only_changes(tmp_path: Path) -> None:
+    path = str(tmp_path / "checkpoint.sqlite")
+    checkpoint = CrawlCheckpoint(path)
+    bad_urls = BadUrls(["https://example.com/1", "https://example.com/2"])
+    checkpoint.mark_done(0, [0], bad_urls)
+
+    # Реестр не изменился - записывается только строка чанка
+    changes = checkpoint._connection.total_changes
+    checkpoint.mark_done(1, [1], bad_urls)
+    assert checkpoint._connection.total_changes - changes == 1
+
+    bad_urls.remove("https://example.com/1")
+    bad_urls.add("https://example.com/2", status_code=500)
+    bad_urls.add("https://example.com/3")
+    changes = checkpoint._connection.total_changes
+    checkpoint.mark_done(2, [2], bad_urls)
+    assert checkpoint._connection.total_changes - changes == 4
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path)
+    loaded = checkpoint.load_bad_urls()
+    assert loaded == ["https://example.com/2", "https://example.com/3"]
+    assert loaded.get("https://example.com/2").last_status_code == 500  # type: ignore[union-attr]
+    checkpoint.close()
+
+
+# pytest tests/core/test_crawl_checkpoint.py
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import pytest
+
+from base_pars_lib.core.downloads import DownloadTarget
+
+
+@pytest.mark.asyncio
+async def test_resume_file(tmp_path: Path) -> None:
+    path = tmp_path / "feed.xml"
+    path.write_bytes(b"abc")
+    progress: list[tuple[int, int | None]] = []
+
+    target = DownloadTarget(
+        path=str(path), progress=lambda size, total: progress.append((size, total))
+    )
+    assert target.get_range_headers() == {"Range": "bytes=3-"}
+
+    target.start(206, {"Content-Range": "bytes 3-5/6", "Content-Length": "3"})
+    await target.write(b"def")
+    target.close()
+
+    result = target.get_result("https://example.com/feed.xml", 206)
+    assert path.read_bytes() == b"abcdef"
+    assert progress == [(6, 6)]
+    assert (result.size, result.total, result.resumed_from) == (6, 6, 3)
+    assert result.is_complete
+
+
+@pytest.mark.asyncio
+async def test_range_not_supported(tmp_path: Path) -> None:
+    path = tmp_path / "feed.xml"
+    path.write_bytes(b"abc")
+
+    # Сайт игнорирует Range и отдаёт тело с начала - уже записанные байты пропускаются
+    target = DownloadTarget(path=str(path))
+    target.start(200, {"Content-Length": "6"})
+    await target.write(b"ab")
+    await target.write(b"cdef")
+    target.close()
+
+    assert path.read_bytes() == b"abcdef"
+
+
+@pytest.mark.asyncio
+async def test_async_sink_and_without_resume(tmp_path: Path) -> None:
+    path = tmp_path / "feed.xml"
+    path.write_bytes(b"old")
+    assert DownloadTarget(path=str(path), resume=False).get_range_headers() == {}
+
+    chunks: list[bytes] = []
+
+    async def sink(chunk: bytes) -> None:
+        chunks.append(chunk)
+
+    target = DownloadTarget(sink=sink)
+    target.start(200, {})
+    await target.write(b"abc")
+
+    assert chunks == [b"abc"]
+    assert target.get_result("https://example.com", 200).total is None
+
+    with pytest.raises(ValueError):
+        DownloadTarget()
@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from base_pars_lib.core.host_rate_limiter import HostRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit() -> None:
+    limiter = HostRateLimiter(initial_concurrency=2, max_concurrency=2)
+    active = 0
+    max_active = 0
+
+    async def request(url: str) -> None:
+        nonlocal active, max_active
+        async with limiter.slot(url) as slot:
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            slot.status_code = 200
+
+    await asyncio.gather(
+        *(request(f"https://a.example.com/{i}") for i in range(6)),
+        *(request(f"https://b.example.com/{i}") for i in range(6)),
+    )
+
+    # Ограничение действует для каждого хоста отдельно
+    assert max_active == 4
+
+
+@pytest.mark.asyncio
+async def test_aimd() -> None:
+    limiter = HostRateLimiter(initial_concurrency=4, min_concurrency=1, max_concurrency=5)
+    host = "example.com"
+
+    # За concurrency успешных ответов ограничение растёт на 1
+    for _ in range(5):
+        async with limiter.slot(f"https://{host}/") as slot:
+            slot.status_code = 200
+    assert limiter.get_concurrency(host) == 5
+
+    async with limiter.slot(f"https://{host}/") as slot:
+        slot.status_code = 429
+    assert limiter.get_concurrency(host) == 2
+
+    with pytest.raises(asyncio.TimeoutError):
+        async with limiter.slot(f"https://{host}/"):
+            raise asyncio.TimeoutError
+    assert limiter.get_concurrency(host) == 1
+
+    async with limiter.slot(f"https://{host}/") as slot:
+        slot.status_code = 503
+    assert limiter.get_concurrency(host) == 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_one_decrease_per_window() -> None:
+    limiter = HostRateLimiter(initial_concurrency=8, min_concurrency=1, max_concurrency=8)
+    host = "example.com"
+
+    async def request(status_code: int) -> None:
+        async with limiter.slot(f"https://{host}/") as slot:
+            await asyncio.sleep(0.01)
+            slot.status_code = status_code
+
+    # 8 одновременных 429 из одного окна уменьшают ограничение один раз
+    await asyncio.gather(*(request(429) for _ in range(8)))
+    assert limiter.get_concurrency(host) == 4
+
+    # Запрос, начатый после уменьшения, уменьшает ограничение снова
+    await request(429)
+    assert limiter.get_concurrency(host) == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit() -> None:
+    limiter = HostRateLimiter(rate=50, host_rates={"slow.example.com": 20})
+    loop = asyncio.get_running_loop()
+
+    async def run(url: str, count: int) -> float:
+        start = loop.time()
+        for _ in range(count):
+            async with limiter.slot(url):
+                pass
+        return loop.time() - start
+
+    fast_time, slow_time = await asyncio.gather(
+        run("https://fast.example.com/", 6), run("https://slow.example.com/", 6)
+    )
+
+    # Первый запрос без ожидания, остальные - не чаще rate в секунду
+    assert fast_time == pytest.approx(5 / 50, abs=0.05)
+    assert slow_time == pytest.approx(5 / 20, abs=0.05)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_wakes_next() -> None:
+    limiter = HostRateLimiter(initial_concurrency=1, max_concurrency=1)
+    url = "https://example.com/"
+    entered = []
+
+    async def request(name: str) -> None:
+        async with limiter.slot(url):
+            entered.append(name)
+
+    async with limiter.slot(url):
+        first = asyncio.create_task(request("first"))
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep(0)
+    # Место освободилось и first разбужена, но отменяется до того, как займёт его
+    first.cancel()
+
+    await asyncio.wait_for(second, timeout=1)
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert entered == ["second"]
+
+
+def test_invalid_params() -> None:
+    with pytest.raises(ValueError):
+        HostRateLimiter(multiplicative_decrease=1.5)
+    with pytest.raises(ValueError):
+        HostRateLimiter(initial_concurrency=200, max_concurrency=100)
+
+
+# pytest tests/core/test_host_rate_limiter.py
@@ -0,0 +1,46 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from base_pars_lib import BaseParser
+from base_pars_lib.core import json_backends
+from base_pars_lib.core.json_backends import get_json_loads
+
+
+@pytest.mark.parametrize("backend", ["auto", "json", "orjson", "msgspec"])
+def test_get_json_loads(backend: str) -> None:
+    try:
+        loads = get_json_loads(backend)
+    except ImportError:
+        pytest.skip(f"{backend} is not installed")
+
+    assert loads(b'{"key": [1, 2.5, "value", null]}') == {"key": [1, 2.5, "value", None]}
+    assert loads('{"key": "значение"}') == {"key": "значение"}
+    with pytest.raises(ValueError):
+        loads(b"not json")
+
+
+def test_get_json_loads_fallback() -> None:
+    with patch.object(json_backends, "orjson", None), patch.object(json_backends, "msgspec", None):
+        assert get_json_loads("auto") is json.loads
+        with pytest.raises(ImportError):
+            get_json_loads("orjson")
+
+
+def test_get_json_loads_unknown_backend() -> None:
+    with pytest.raises(ValueError):
+        get_json_loads("simplejson")
+
+
+def test_response_json(base_parser: BaseParser) -> None:
+    response = MagicMock()
+    response.content = b'{"key": "value"}'
+    assert base_parser._response_json(response) == {"key": "value"}
+
+    response.content = b"<html></html>"
+    assert base_parser._response_json(response) is None
+    assert base_parser._response_json(None) is None
+
+
+# pytest tests/core/test_json_backends.py
@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+from base_pars_lib.core.metrics import RequestMetrics
+
+
+def test_counters_and_quantile() -> None:
+    metrics = RequestMetrics(latency_buckets=(0.1, 1.0))
+    url = "https://example.com/page"
+
+    for latency in (0.05, 0.05, 0.5, 0.5):
+        metrics.on_request_start(url, 1)
+        metrics.on_request_end(url, 200, latency, bytes_received=10)
+    metrics.on_retry(url, 2)
+    metrics.on_request_start(url, 2)
+    metrics.on_request_end(url, None, 2.0, exception=TimeoutError())
+    metrics.on_backoff_sleep(url, 10)
+
+    host = metrics.hosts()["example.com"]
+    assert (host.requests, host.retries) == (5, 1)
+    assert host.responses == {200: 4}
+    assert host.errors == {"TimeoutError": 1}
+    assert host.bytes_received == 40
+    assert host.backoff_seconds == 10
+    assert host.retry_amplification == 5 / 4
+
+    assert metrics.get_latency_quantile("example.com", 0.4) == 0.1
+    # 95-й перцентиль в корзине +Inf - оценка по её нижней границе
+    assert metrics.get_latency_quantile("example.com", 0.95) == 1.0
+    assert metrics.get_latency_quantile("other.com", 0.95) is None
+
+
+def test_prometheus_and_json(tmp_path: Path) -> None:
+    metrics = RequestMetrics(latency_buckets=(0.1, 1.0))
+    metrics.on_request_start("https://example.com/", 1)
+    metrics.on_request_end("https://example.com/", 200, 0.5, bytes_received=100)
+
+    text = metrics.to_prometheus()
+    assert 'base_pars_lib_requests_total{host="example.com"} 1' in text
+    assert 'base_pars_lib_responses_total{host="example.com",status_code="200"} 1' in text
+    assert 'base_pars_lib_request_duration_seconds_bucket{host="example.com",le="0.1"} 0' in text
+    assert 'base_pars_lib_request_duration_seconds_bucket{host="example.com",le="1.0"} 1' in text
+    assert 'base_pars_lib_request_duration_seconds_count{host="example.com"} 1' in text
+
+    path = tmp_path / "metrics.json"
+    metrics.dump_json(str(path))
+    data = json.loads(path.read_text())
+    assert data["example.com"]["responses"] == {"200": 1}
+    assert data["example.com"]["bytes_received"] == 100
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from base_pars_lib.core.proxy_auth import CURLAUTH_BASIC, CURLAUTH_DIGEST, AsyncProxyAuth
+
+PROXY = "http://proxy:8080"
+DIGEST_CHALLENGE = (
+    'Digest realm="testrealm@host.com", qop="auth,auth-int", '
+    'nonce="dcd98b7102dd2f0e8b11d0f600bfb0c093", opaque="5ccc069c403ebaf9f0171e9517f40e41"'
+)
+
+
+def test_digest_header(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Пример из RFC 2617
+    monkeypatch.setattr(AsyncProxyAuth, "make_cnonce", staticmethod(lambda: "0a4f113b"))
+    auth = AsyncProxyAuth("Mufasa", "Circle Of Life")
+
+    assert auth.get_headers(PROXY, "GET", "/dir/index.html") == {}
+    assert auth.handle_challenge(PROXY, [DIGEST_CHALLENGE])
+    assert auth.get_scheme(PROXY) == "digest"
+
+    header = auth.get_headers(PROXY, "GET", "/dir/index.html")["Proxy-Authorization"]
+    assert 'response="6629fae49393a05397450978507c4ef1"' in header
+    assert "nc=00000001" in header
+    assert "nc=00000002" in auth.get_headers(PROXY, "GET", "/dir/index.html")["Proxy-Authorization"]
+
+
+def test_handle_challenge() -> None:
+    auth = AsyncProxyAuth("user", "pass")
+
+    assert auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1"'])
+    # Тот же nonce - логин и пароль отклонены
+    assert not auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1"'])
+    assert auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1", stale=true'])
+    assert auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="2"'])
+
+    assert auth.handle_challenge("http://other:8080", ['Basic realm="proxy"'])
+    assert auth.get_headers("http://other:8080", "GET", "http://example.com") == {
+        "Proxy-Authorization": "Basic dXNlcjpwYXNz"
+    }
+    assert not auth.handle_challenge("http://other:8080", ['Basic realm="proxy"'])
+
+    digest_only = AsyncProxyAuth("user", "pass", scheme="digest")
+    assert not digest_only.handle_challenge(PROXY, ['Basic realm="proxy"'])
+    assert digest_only.curl_auth_mask == CURLAUTH_DIGEST
+    assert auth.curl_auth_mask == CURLAUTH_BASIC | CURLAUTH_DIGEST
+
+
+def test_connect_header_cached() -> None:
+    auth = AsyncProxyAuth("user", "pass")
+    auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1", qop="auth"'])
+
+    first = auth.get_headers(PROXY, "GET", "https://example.com/a")
+    assert 'uri="example.com:443"' in first["Proxy-Authorization"]
+    assert auth.get_headers(PROXY, "POST", "https://example.com/b") == first
+    assert auth.get_headers(PROXY, "GET", "https://other.com/") != first
+
+    auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="2", qop="auth"'])
+    assert auth.get_headers(PROXY, "GET", "https://example.com/a") != first
+
+
+@pytest.mark.asyncio
+async def test_challenge_lock() -> None:
+    auth = AsyncProxyAuth("user", "pass")
+    probes = 0
+
+    async def request() -> None:
+        nonlocal probes
+        async with auth.challenge_lock(PROXY):
+            if auth.get_scheme(PROXY) is None:
+                probes += 1
+                await asyncio.sleep(0.01)
+                auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1"'])
+
+    await asyncio.gather(*(request() for _ in range(10)))
+
+    assert probes == 1
+
+
+@pytest.mark.asyncio
+async def test_challenge_lock_without_challenge() -> None:
+    auth = AsyncProxyAuth("user", "pass")
+    active = 0
+    max_active = 0
+
+    async def request() -> None:
+        nonlocal active, max_active
+        async with auth.challenge_lock(PROXY):
+            active += 1
+            max_active = max(max_active, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            # Прокси ответил без 407
+            auth.handle_no_challenge(PROXY)
+
+    await asyncio.gather(*(request() for _ in range(10)))
+
+    # Ждёт только первый запрос, остальные идут одновременно
+    assert auth.get_scheme(PROXY) == "none"
+    assert auth.get_headers(PROXY, "GET", "http://example.com/") == {}
+    assert max_active == 9
+
+    # Если прокси всё же прислал 407, вызов принимается
+    assert auth.handle_challenge(PROXY, ['Digest realm="proxy", nonce="1"'])
+    assert auth.get_scheme(PROXY) == "digest"
@@ -0,0 +1,59 @@
+import time
+from collections import Counter
+
+import pytest
+
+from base_pars_lib.core.proxy_pool import ProxyPool
+
+
+def test_choose_prefers_healthy_proxies() -> None:
+    pool = ProxyPool(["http://fast", "http://slow", "http://dead"], max_consecutive_failures=100)
+    for _ in range(10):
+        pool.report_success("http://fast", latency=0.1)
+        pool.report_success("http://slow", latency=2)
+        pool.report_failure("http://dead")
+
+    chosen = Counter(pool.choose() for _ in range(300))
+
+    assert chosen["http://fast"] > chosen["http://slow"] > chosen["http://dead"]
+
+
+def test_cooldown() -> None:
+    pool = ProxyPool(["http://a", "http://b"], max_consecutive_failures=2, cooldown=0.05)
+
+    pool.report_failure("http://a")
+    pool.report_failure("http://a")
+    assert {pool.choose() for _ in range(20)} == {"http://b"}
+
+    # Если все прокси отключены, выбирается тот, который включится раньше
+    pool.report_failure("http://b")
+    pool.report_failure("http://b")
+    assert pool.choose() == "http://a"
+
+    time.sleep(0.06)
+    assert {pool.choose() for _ in range(50)} == {"http://a", "http://b"}
+
+
+def test_report_response_and_stats() -> None:
+    proxy = {"http": "http://a", "https": "http://a"}
+    pool = ProxyPool([proxy])
+
+    pool.report_response(proxy, 200, latency=1)
+    pool.report_response(dict(reversed(proxy.items())), 407, latency=1)
+    pool.report_response(proxy, 404, latency=3)
+
+    (stats,) = pool.stats()
+    assert stats.proxy == proxy
+    assert stats.successes == 2
+    assert stats.failures == 1
+    assert stats.consecutive_failures == 0
+    assert stats.latency_ewma is not None and stats.latency_ewma > 1
+    assert pool.choose() == proxy
+
+
+def test_empty_pool() -> None:
+    with pytest.raises(ValueError):
+        ProxyPool([])
+
+
+# pytest tests/core/test_proxy_pool.py
@@ -1,11 +1,19 @@
+import socket
+import threading
+from collections.abc import Generator
 from unittest.mock import Mock, patch
 
 import pytest
+import requests
+import urllib3
+from requests.auth import HTTPProxyAuth
 
 from base_pars_lib.core._requests_digest_proxy import (
     HTTPProxyDigestAuth,
     HTTPProxyResponse,
+    ProxyDigestHTTPSConnectionPool,
     ProxyError,
+    mount_proxy_digest_adapter,
 )
 
 
@@ -56,4 +64,68 @@ def test_check_close(mock_check_close: Mock, mock_socket: Mock) -> None:
     assert result is True
 
 
+def serve_proxy_407(server: socket.socket, connect_requests: list[str]) -> None:
+    while True:
+        try:
+            connection, _ = server.accept()
+        except OSError:
+            return
+        with connection:
+            data = b""
+            while b"\r\n\r\n" not in data:
+                chunk = connection.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+            connect_requests.append(data.decode())
+            connection.sendall(
+                b"HTTP/1.1 407 Proxy Authentication Required\r\n"
+                b'Proxy-Authenticate: Basic realm="proxy"\r\n'
+                b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+
+
+@pytest.fixture
+def proxy_407() -> Generator[tuple[str, list[str]], None, None]:
+    """Прокси, который отвечает 407 на любой CONNECT и запоминает запросы"""
+    connect_requests: list[str] = []
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    threading.Thread(target=serve_proxy_407, args=(server, connect_requests), daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}", connect_requests
+    server.close()
+
+
+def test_adapter_sends_proxy_auth_in_connect(proxy_407: tuple[str, list[str]]) -> None:
+    proxy, connect_requests = proxy_407
+    session = mount_proxy_digest_adapter(requests.Session())
+    session.auth = HTTPProxyAuth("user", "pass")
+    session.proxies = {"https": proxy}
+
+    response = session.get("https://example.com/", timeout=5)
+
+    # 407 от прокси возвращается как ответ, а не ошибка
+    assert response.status_code == 407
+    assert "Proxy-Authorization: Basic dXNlcjpwYXNz" in connect_requests[0]
+    proxy_manager = session.get_adapter("https://").proxy_manager[proxy]
+    assert proxy_manager.pool_classes_by_scheme["https"] is ProxyDigestHTTPSConnectionPool
+
+
+def test_other_sessions_not_affected(proxy_407: tuple[str, list[str]]) -> None:
+    proxy, connect_requests = proxy_407
+    mount_proxy_digest_adapter(requests.Session())
+    session = requests.Session()
+    session.auth = HTTPProxyAuth("user", "pass")
+    session.proxies = {"https": proxy}
+
+    with pytest.raises(requests.exceptions.ProxyError):
+        session.get("https://example.com/", timeout=5)
+
+    assert "Proxy-Authorization" not in connect_requests[0]
+    assert urllib3.connectionpool.HTTPConnectionPool.urlopen.__module__ == (
+        "urllib3.connectionpool"
+    )
+
+
 # pytest tests/core/test_requests_digest_proxy.py
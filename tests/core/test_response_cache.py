@@ -0,0 +1,93 @@
+import time
+from pathlib import Path
+
+from base_pars_lib.core.response_cache import CachedResponse, ResponseCache
+
+
+def test_make_key() -> None:
+    key = ResponseCache.make_key("get", "https://example.com")
+
+    assert key == ResponseCache.make_key("GET", "https://example.com")
+    assert key != ResponseCache.make_key("POST", "https://example.com")
+    assert ResponseCache.make_key("POST", "https://example.com", {"a": 1, "b": 2}) == (
+        ResponseCache.make_key("POST", "https://example.com", {"b": 2, "a": 1})
+    )
+
+
+def test_get_set() -> None:
+    cache = ResponseCache(ttl=60)
+    key = cache.make_key("GET", "https://example.com")
+
+    assert cache.get(key) is None
+
+    cache.set(key, "https://example.com", 200, b"content", {"ETag": '"abc"'})
+    cached = cache.get(key)
+
+    assert cached is not None
+    assert cached.content == b"content"
+    assert cached.etag == '"abc"'
+    assert cached.is_fresh
+    assert len(cache) == 1
+
+
+def test_ttl_and_revalidate() -> None:
+    cache = ResponseCache(ttl=0.02)
+    cache.set("key", "https://example.com", 200, b"content", {})
+
+    time.sleep(0.03)
+    assert not cache.get("key").is_fresh  # type: ignore[union-attr]
+
+    cache.revalidate("key")
+    assert cache.get("key").is_fresh  # type: ignore[union-attr]
+
+
+def test_lru_eviction() -> None:
+    cache = ResponseCache(max_entries=2)
+    cache.set("first", "https://example.com/1", 200, b"1", {})
+    cache.set("second", "https://example.com/2", 200, b"2", {})
+
+    # first использован позже second, поэтому удаляется second
+    cache.get("first")
+    cache.set("third", "https://example.com/3", 200, b"3", {})
+
+    assert len(cache) == 2
+    assert cache.get("first") is not None
+    assert cache.get("second") is None
+
+    # Перезапись и удаление учитываются в количестве записей
+    cache.set("third", "https://example.com/3", 200, b"3", {})
+    cache.delete("first")
+    cache.set("fourth", "https://example.com/4", 200, b"4", {})
+    assert len(cache) == 2
+    assert cache.get("third") is not None
+
+
+def test_conditional_headers() -> None:
+    cached = CachedResponse(
+        url="https://example.com",
+        status_code=200,
+        content=b"",
+        headers={
+            "etag": '"abc"',
+            "last-modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            "content-type": "text/html; charset=cp1251",
+        },
+    )
+
+    assert cached.conditional_headers() == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+    }
+    assert cached.content_type == "text/html"
+    assert cached.encoding == "cp1251"
+
+
+def test_persistence(tmp_path: Path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(path)
+    cache.set("key", "https://example.com", 200, b"content", {})
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get("key").content == b"content"  # type: ignore[union-attr]
+    cache.close()
@@ -0,0 +1,62 @@
+import time
+
+from base_pars_lib.core.session_affinity import SessionAffinity
+
+
+def test_pin_by_host() -> None:
+    affinity = SessionAffinity(ttl=60)
+    params = {"proxy": "http://1.1.1.1:8000", "headers": {"User-Agent": "ua"}}
+
+    assert affinity.get("https://example.com/a") is None
+
+    affinity.pin("https://example.com/a", params)
+    assert affinity.get("https://example.com/b") == params
+    assert affinity.get("https://other.com/a") is None
+
+    # Уже закреплённые параметры не перезаписываются
+    affinity.pin("https://example.com/c", {"proxy": "http://2.2.2.2:8000"})
+    assert affinity.get("https://example.com/a") == params
+
+    affinity.unpin("https://example.com/d")
+    assert affinity.get("https://example.com/a") is None
+
+
+def test_pinned_params_are_copied() -> None:
+    affinity = SessionAffinity(ttl=60)
+    headers = {"User-Agent": "ua"}
+    affinity.pin("https://example.com/", {"headers": headers, "cookies": {"id": "1"}})
+
+    # Изменение исходных и полученных словарей не меняет закреплённые параметры
+    headers["User-Agent"] = "other"
+    pinned = affinity.get("https://example.com/")
+    assert pinned is not None
+    pinned["headers"]["User-Agent"] = "other"
+    pinned["cookies"]["id"] = "2"
+    assert affinity.get("https://example.com/") == {
+        "headers": {"User-Agent": "ua"},
+        "cookies": {"id": "1"},
+    }
+
+
+def test_ttl() -> None:
+    affinity = SessionAffinity(ttl=0.02)
+    affinity.pin("https://example.com/", {"proxy": "http://1.1.1.1:8000"})
+
+    time.sleep(0.03)
+
+    assert affinity.get("https://example.com/") is None
+    assert len(affinity) == 0
+
+
+def test_key_modes() -> None:
+    by_url = SessionAffinity(key="url")
+    by_url.pin("https://example.com/a", {"proxy": "a"})
+    assert by_url.get("https://example.com/b") is None
+    assert by_url.get("https://example.com/a") == {"proxy": "a"}
+
+    by_path = SessionAffinity(key=lambda url: url.split("/")[3])
+    by_path.pin("https://a.example.com/catalog/1", {"proxy": "a"})
+    assert by_path.get("https://b.example.com/catalog/2") == {"proxy": "a"}
+
+
+# pytest tests/core/test_session_affinity.py
@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+import pytest
+
+from base_pars_lib.core.async_requests_parser_base import AsyncRequestsParserBase
+from base_pars_lib.core.sharded_runner import ShardedRunner
+
+
+class ShardParser(AsyncRequestsParserBase):
+    async def parse_shard(self, shard: list[int]) -> list[tuple[int, int]]:
+        await asyncio.sleep(0)
+        for item in shard:
+            if item % 2:
+                await self._append_to_bad_urls(f"https://example.com/{item}", status_code=500)
+        return [(item * 2, os.getpid()) for item in shard]
+
+    async def fail_shard(self, shard: list[int]) -> None:
+        raise ValueError(shard)
+
+
+def test_run() -> None:
+    runner = ShardedRunner(ShardParser, "parse_shard", processes=2, shards_count=4)
+
+    results = runner.run(list(range(10)))
+
+    assert [value for shard in results for value, _ in shard] == [i * 2 for i in range(10)]
+    assert {pid for shard in results for _, pid in shard} - {os.getpid()}
+    assert sorted(runner.bad_urls.to_list()) == sorted(
+        f"https://example.com/{i}" for i in range(1, 10, 2)
+    )
+
+
+def test_iter_results_error() -> None:
+    runner = ShardedRunner(ShardParser, "fail_shard", processes=2)
+
+    with pytest.raises(ValueError):
+        list(runner.iter_results([1, 2, 3]))
+
+    assert list(runner.iter_results([])) == []
+
+
+def test_default_shards_count() -> None:
+    assert ShardedRunner(ShardParser, "parse_shard", processes=2).shards_count == 8
+    assert ShardedRunner(ShardParser, "parse_shard", processes=2, shards_count=3).shards_count == 3
+
+
+# pytest tests/core/test_sharded_runner.py
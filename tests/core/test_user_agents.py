@@ -0,0 +1,39 @@
+from collections import Counter
+from typing import Any
+
+from base_pars_lib.core.user_agents import FALLBACK_USER_AGENT, UserAgentPool, get_user_agent_pool
+
+DATA: list[dict[str, Any]] = [
+    {"useragent": "pc-chrome", "type": "pc", "browser": "chrome", "os": "win10", "percent": 90},
+    {"useragent": "pc-firefox", "type": "pc", "browser": "firefox", "os": "linux", "percent": 10},
+    {"useragent": "ios-safari", "type": "mobile", "browser": "safari", "os": "ios", "percent": 50},
+    {"useragent": "ddg", "type": "mobile", "browser": "DuckDuckGo Mobile", "os": "ios"},
+]
+
+
+def test_filters() -> None:
+    pool = UserAgentPool(DATA)
+
+    assert len(pool) == 3
+    assert {pool.pc for _ in range(50)} == {"pc-chrome", "pc-firefox"}
+    assert pool.get(platform="mobile") == "ios-safari"
+    assert pool.get(browser="firefox") == "pc-firefox"
+    assert pool.get(platform="pc", os="win10") == "pc-chrome"
+    assert pool.get(platform="tablet") == FALLBACK_USER_AGENT
+    assert pool.random in {"pc-chrome", "pc-firefox", "ios-safari"}
+
+
+def test_weighted() -> None:
+    pool = UserAgentPool(DATA)
+
+    counts = Counter(pool.get(platform="pc", weighted=True) for _ in range(1000))
+    assert counts["pc-chrome"] > counts["pc-firefox"] * 3
+
+
+def test_shared_pool() -> None:
+    pool = get_user_agent_pool()
+
+    assert pool is get_user_agent_pool()
+    assert len(pool) > 0
+    user_agent = pool.pc
+    assert "Android" not in user_agent and "iPhone" not in user_agent
@@ -1,10 +1,12 @@
+import asyncio
+from collections.abc import AsyncIterator
 from typing import Any, Dict, List
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from curl_cffi.requests.models import Response
 
-from base_pars_lib import AsyncBaseCurlCffiParser
+from base_pars_lib import AsyncBaseCurlCffiParser, AsyncProxyAuth
 
 parser = AsyncBaseCurlCffiParser(debug=True, print_logs=True)
 
@@ -76,4 +78,124 @@ async def test_make_backoff_request_ignore_404() -> None:
     assert responses[0].status_code == 404  # type: ignore[union-attr]
 
 
+@pytest.mark.asyncio
+async def test_sessions_pool() -> None:
+    def make_session(**kwargs: Any) -> MagicMock:
+        mock_response = MagicMock(spec=Response)
+        mock_response.status_code = 200
+        mock_response.content = b""
+        session = MagicMock()
+        session.request = AsyncMock(return_value=mock_response)
+        session.close = AsyncMock()
+        return session
+
+    with patch(
+        "base_pars_lib.async_base_curl_cffi_parser.AsyncSession", side_effect=make_session
+    ) as session_class:
+        async with AsyncBaseCurlCffiParser() as pool_parser:
+            await pool_parser._make_backoff_request(["http://example.com"], impersonate="chrome")
+            await pool_parser._make_backoff_request(["http://example.com"], impersonate="chrome")
+            await pool_parser._make_backoff_request(["http://example.com"], impersonate="safari")
+
+            sessions = dict(pool_parser.curl_cffi_sessions)  # type: ignore[arg-type]
+
+    # Одна сессия на каждый impersonate, переиспользуется между вызовами
+    assert session_class.call_count == 2
+    assert set(sessions) == {("chrome", None), ("safari", None)}
+    assert sessions[("chrome", None)].request.await_count == 2
+    for session in sessions.values():
+        session.close.assert_awaited_once()
+    assert pool_parser.curl_cffi_sessions is None
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_defer_retries() -> None:
+    urls = [f"http://example.com/{i}" for i in range(3)]
+    requested_urls: list[str] = []
+
+    async def request(url: str, **kwargs: Any) -> MagicMock:
+        mock_response = MagicMock(spec=Response)
+        # Первая ссылка отвечает 500 на первую попытку
+        mock_response.status_code = 500 if url == urls[0] and url not in requested_urls else 200
+        mock_response.url = url
+        mock_response.content = b""
+        requested_urls.append(url)
+        return mock_response
+
+    session = MagicMock()
+    session.request = request
+    session.close = AsyncMock()
+
+    with patch("base_pars_lib.async_base_curl_cffi_parser.AsyncSession", return_value=session):
+        async with AsyncBaseCurlCffiParser() as pool_parser:
+            result = await pool_parser._make_backoff_request(
+                urls, impersonate="chrome", max_concurrency=1, defer_retries=True
+            )
+
+    assert [response.url for response in result] == urls  # type: ignore[union-attr]
+    assert requested_urls == [*urls, urls[0]]
+
+
+@pytest.mark.asyncio
+async def test_download_to_sink() -> None:
+    chunks: list[bytes] = []
+    response = MagicMock(spec=Response)
+    response.status_code = 200
+    response.headers = {"Content-Length": "6"}
+    response.aclose = AsyncMock()
+
+    async def aiter_content() -> AsyncIterator[bytes]:
+        yield b"abc"
+        yield b"def"
+
+    response.aiter_content = aiter_content
+
+    session = MagicMock()
+    session.request = AsyncMock(return_value=response)
+    session.close = AsyncMock()
+
+    with patch("base_pars_lib.async_base_curl_cffi_parser.AsyncSession", return_value=session):
+        async with AsyncBaseCurlCffiParser() as pool_parser:
+            result = await pool_parser._download(
+                "http://example.com/feed.xml", sink=chunks.append, impersonate="chrome"
+            )
+
+    assert chunks == [b"abc", b"def"]
+    assert result is not None and result.size == result.total == 6
+    assert session.request.call_args.kwargs["stream"] is True
+    response.aclose.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_proxy_auth() -> None:
+    proxy_heads: List[str] = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        proxy_heads.append(head)
+        if 'Proxy-Authorization: Digest username="user"' in head:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        else:
+            writer.write(
+                b"HTTP/1.1 407 Proxy Authentication Required\r\n"
+                b'Proxy-Authenticate: Digest realm="proxy", nonce="abc", qop="auth"\r\n'
+                b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    proxy = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    auth_parser = AsyncBaseCurlCffiParser(proxy_auth=AsyncProxyAuth("user", "pass"))
+
+    async with server:
+        responses = await auth_parser._make_backoff_request(
+            ["http://example.com/"], proxies={"http": proxy}, iter_count=1, impersonate=None
+        )
+
+    assert responses[0] is not None and responses[0].text == "ok"
+    # Вызов 407 обработал libcurl
+    assert len(proxy_heads) == 2
+
+
 # pytest tests/test_async_base_curl_cffi_parser.py
@@ -1,10 +1,32 @@
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from aiohttp import ClientResponse, ClientSession
-
-from base_pars_lib import AiohttpResponse
+from aiohttp import ClientPayloadError, ClientResponse, ClientSession
+
+from base_pars_lib import (
+    AiohttpResponse,
+    AsyncProxyAuth,
+    HostRateLimiter,
+    RequestHooks,
+    RequestMetrics,
+    ResponseCache,
+    SessionAffinity,
+)
+
+
+def _make_mock_response(url: str) -> MagicMock:
+    response = MagicMock(spec=ClientResponse)
+    response.__aenter__.return_value = response
+    response.__aexit__.return_value = None
+    response.status = 200
+    response.url = url
+    response.read.return_value = url.encode()
+    response.get_encoding.return_value = "utf-8"
+    return response
 
 
 @pytest.mark.asyncio
@@ -13,7 +35,7 @@ async def test_forming_aiohttp_response_success(
 ) -> None:
     result = await async_base_parser._AsyncBaseParser__forming_aiohttp_response(mock_response)
     assert isinstance(result, AiohttpResponse)
-    assert result.text == "test text"
+    assert result.text == '{"key": "value"}'
     assert result.json == {"key": "value"}
     assert result.url == "http://example.com"
     assert result.status_code == 200
@@ -25,7 +47,7 @@ async def test_forming_aiohttp_response_failure(async_base_parser: Any) -> None:
     bad_response = MagicMock(spec=ClientResponse)
     bad_response.url = "http://example.com"
     bad_response.status = 500
-    bad_response.text = AsyncMock(side_effect=Exception("Error"))
+    bad_response.read = AsyncMock(side_effect=Exception("Error"))
 
     # Проверяем, что при вызове метода возникает исключение
     with pytest.raises(Exception, match="Error"):
@@ -64,8 +86,8 @@ async def test_fetch_success(async_base_parser: Any) -> None:
     mock_response.__aexit__.return_value = None
     mock_response.status = 200
     mock_response.url = "http://example.com"
-    mock_response.text.return_value = "test text"
-    mock_response.json.return_value = {"key": "value"}
+    mock_response.read.return_value = b"test text"
+    mock_response.get_encoding.return_value = "utf-8"
 
     # Создаем mock сессии
     mock_session = MagicMock(spec=ClientSession)
@@ -112,14 +134,16 @@ async def test_fetch_with_retries(async_base_parser: Any) -> None:
     bad_response.__aexit__.return_value = None
     bad_response.url = "http://example.com"
     bad_response.status = 500
-    bad_response.text.return_value = "Server error"
+    bad_response.read.return_value = b"Server error"
+    bad_response.get_encoding.return_value = "utf-8"
 
     good_response = MagicMock(spec=ClientResponse)
     good_response.__aenter__.return_value = good_response
     good_response.__aexit__.return_value = None
     good_response.url = "http://example.com"
     good_response.status = 200
-    good_response.text.return_value = "OK"
+    good_response.read.return_value = b"OK"
+    good_response.get_encoding.return_value = "utf-8"
 
     # Создаем mock сессии
     mock_session = MagicMock(spec=ClientSession)
@@ -152,14 +176,16 @@ async def test_make_backoff_request_with_different_responses(async_base_parser:
     response1.__aexit__.return_value = None
     response1.status = 200
     response1.url = "http://example.com"
-    response1.text.return_value = "response1"
+    response1.read.return_value = b"response1"
+    response1.get_encoding.return_value = "utf-8"
 
     response2 = MagicMock(spec=ClientResponse)
     response2.__aenter__.return_value = response2
     response2.__aexit__.return_value = None
     response2.status = 200
     response2.url = "http://example.org"
-    response2.text.return_value = "response2"
+    response2.read.return_value = b"response2"
+    response2.get_encoding.return_value = "utf-8"
 
     # Настраиваем сессию
     mock_session = MagicMock(spec=ClientSession)
@@ -178,6 +204,499 @@ async def test_make_backoff_request_with_different_responses(async_base_parser:
         assert mock_session.request.call_count == 2
 
 
+@pytest.mark.asyncio
+async def test_make_backoff_request_max_concurrency(async_base_parser: Any) -> None:
+    urls = [f"http://example.com/{i}" for i in range(5)]
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = lambda url, **kwargs: _make_mock_response(url)
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        results = await async_base_parser._make_backoff_request(urls=urls, max_concurrency=2)
+
+    assert [result.text for result in results] == urls
+    assert mock_session.request.call_count == len(urls)
+
+
+@pytest.mark.asyncio
+async def test_iter_backoff_requests(async_base_parser: Any) -> None:
+    urls = [f"http://example.com/{i}" for i in range(3)]
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = lambda url, **kwargs: _make_mock_response(url)
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    results = {}
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        async for index, url, response in async_base_parser._iter_backoff_requests(
+            urls=urls, max_concurrency=2
+        ):
+            results[index] = (url, response.text)
+
+    assert results == {i: (url, url) for i, url in enumerate(urls)}
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_defer_retries(async_base_parser: Any) -> None:
+    urls = [f"http://example.com/{i}" for i in range(4)]
+    requested_urls: list[str] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        response = _make_mock_response(url)
+        # Первая ссылка отвечает 500 на первую попытку
+        if url == urls[0] and url not in requested_urls:
+            response.status = 500
+        requested_urls.append(url)
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        result = await async_base_parser._make_backoff_request(
+            urls=urls, max_concurrency=1, defer_retries=True
+        )
+
+    assert [response.text for response in result] == urls
+    # Повтор первой ссылки отправлен после остальных, а не сразу после неудачной попытки
+    assert requested_urls == [*urls, urls[0]]
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_rate_limiter(async_base_parser: Any) -> None:
+    async_base_parser.rate_limiter = HostRateLimiter(initial_concurrency=4)
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        response = _make_mock_response(url)
+        response.status = 429
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        await async_base_parser._make_backoff_request(urls=["http://example.com"], iter_count=1)
+
+    assert async_base_parser.rate_limiter.get_concurrency("example.com") == 2
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_session_affinity(async_base_parser: Any) -> None:
+    async_base_parser.session_affinity = SessionAffinity()
+    used_params: list[tuple] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        used_params.append((kwargs["proxy"], kwargs["headers"]["User-Agent"]))
+        return _make_mock_response(url)
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    headers = {"Accept": "*/*"}
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        for i in range(5):
+            await async_base_parser._make_backoff_request(
+                urls=[f"http://example.com/{i}"],
+                proxies=[f"http://{i}.proxy.com" for i in range(10)],
+                headers=headers,
+            )
+
+    # Прокси и User-Agent первого успешного запроса закреплены за хостом,
+    # а словарь заголовков вызывающего кода не меняется
+    assert all(params == used_params[0] for params in used_params)
+    assert headers == {"Accept": "*/*"}
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_response_cache(async_base_parser: Any) -> None:
+    async_base_parser.response_cache = ResponseCache(ttl=60)
+    sent_headers: list[dict] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        sent_headers.append(kwargs["headers"])
+        response = _make_mock_response(url)
+        response.headers = {"ETag": '"v1"'}
+        if "If-None-Match" in kwargs["headers"]:
+            response.status = 304
+            response.read.return_value = b""
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        first = await async_base_parser._make_backoff_request(urls=["http://example.com"])
+        # Свежий ответ берётся из кэша без запроса
+        second = await async_base_parser._make_backoff_request(urls=["http://example.com"])
+        assert len(sent_headers) == 1
+
+        # Устаревший ответ проверяется условным запросом, на 304 возвращается ответ из кэша
+        async_base_parser.response_cache.ttl = 0
+        third = await async_base_parser._make_backoff_request(urls=["http://example.com"])
+
+    assert len(sent_headers) == 2
+    assert sent_headers[1]["If-None-Match"] == '"v1"'
+    assert first[0].text == second[0].text == third[0].text == "http://example.com"
+    assert third[0].status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_response_cache_check_page(async_base_parser: Any) -> None:
+    async_base_parser.response_cache = ResponseCache(ttl=60)
+    bodies = iter([b"captcha", b"page", b"page"])
+    sent_count = 0
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        nonlocal sent_count
+        sent_count += 1
+        response = _make_mock_response(url)
+        response.headers = {}
+        response.read.return_value = next(bodies)
+        return response
+
+    async def check_page(response: AiohttpResponse) -> bool:
+        return response.text != "captcha"
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        # Капча, которую не принял check_page, не сохраняется в кэш
+        first = await async_base_parser._make_backoff_request(
+            urls=["http://example.com"], check_page=check_page
+        )
+        second = await async_base_parser._make_backoff_request(
+            urls=["http://example.com"], check_page=check_page
+        )
+        assert sent_count == 2
+        assert first[0].text == second[0].text == "page"
+
+        # Страница из кэша, которую не принял check_page, удаляется и запрашивается заново
+        cache_key = async_base_parser._get_request_key("http://example.com", {"method": "GET"})
+        async_base_parser.response_cache.set(
+            cache_key, url="http://example.com", status_code=200, content=b"captcha", headers={}
+        )
+        third = await async_base_parser._make_backoff_request(
+            urls=["http://example.com"], check_page=check_page
+        )
+
+    assert sent_count == 3
+    assert third[0].text == "page"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("defer_retries", [False, True])
+async def test_make_backoff_request_single_flight(
+    async_base_parser: Any, defer_retries: bool
+) -> None:
+    async_base_parser.single_flight = True
+    requested_urls: list[str] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        requested_urls.append(url)
+        return _make_mock_response(url)
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    urls = ["http://example.com/a", "http://example.com/b", "http://example.com/a"]
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        first, second = await asyncio.gather(
+            async_base_parser._make_backoff_request(urls=urls, defer_retries=defer_retries),
+            async_base_parser._make_backoff_request(urls=urls[:1], defer_retries=defer_retries),
+        )
+
+    assert sorted(requested_urls) == ["http://example.com/a", "http://example.com/b"]
+    assert first[0] is first[2] is second[0]
+    assert first[1].text == "http://example.com/b"
+    assert not async_base_parser._in_flight
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_single_flight_defer_retries(async_base_parser: Any) -> None:
+    async_base_parser.single_flight = True
+    requested_urls: list[str] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        response = _make_mock_response(url)
+        # Первая попытка отвечает 500, повтор откладывается в планировщик
+        if not requested_urls:
+            response.status = 500
+        requested_urls.append(url)
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    url = "http://example.com"
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        # Одинаковый запрос ждёт ответ вне пула, поэтому единственное место в пуле
+        # достаётся отложенному повтору
+        result = await asyncio.wait_for(
+            async_base_parser._make_backoff_request(
+                urls=[url, url], max_concurrency=1, defer_retries=True, increase_by_seconds=1
+            ),
+            timeout=10,
+        )
+
+    assert requested_urls == [url, url]
+    assert result[0] is result[1]
+    assert result[0].text == url
+
+
+@pytest.mark.asyncio
+async def test_download_resume(async_base_parser: Any, tmp_path: Path) -> None:
+    async_base_parser.check_exceptions = False
+    body = b"0123456789"
+    sent_ranges: list[str | None] = []
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        sent_ranges.append(kwargs["headers"].get("Range"))
+        response = MagicMock(spec=ClientResponse)
+        response.__aenter__.return_value = response
+        response.__aexit__.return_value = None
+
+        async def iter_chunked(chunk_size: int) -> AsyncIterator[bytes]:
+            if len(sent_ranges) == 1:
+                yield body[:4]
+                raise ClientPayloadError("connection lost")
+            yield body[4:]
+
+        if len(sent_ranges) == 1:
+            response.status = 200
+            response.headers = {"Content-Length": "10"}
+        else:
+            response.status = 206
+            response.headers = {"Content-Range": "bytes 4-9/10", "Content-Length": "6"}
+        response.content.iter_chunked = iter_chunked
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    path = tmp_path / "feed.bin"
+    with patch("aiohttp.ClientSession", return_value=mock_session), patch("asyncio.sleep"):
+        result = await async_base_parser._download("http://example.com/feed.bin", path=str(path))
+
+    assert sent_ranges == [None, "bytes=4-"]
+    assert path.read_bytes() == body
+    assert result.size == result.total == 10
+
+
+@pytest.mark.asyncio
+async def test_download_hooks_inside_host_slot(async_base_parser: Any) -> None:
+    events: list[tuple[str, str]] = []
+
+    class Hooks(RequestHooks):
+        def on_request_start(self, url: str, attempt: int) -> None:
+            events.append(("start", url))
+
+        def on_request_end(
+            self, url: str, status_code: int | None, *args: Any, **kwargs: Any
+        ) -> None:
+            events.append(("end", url))
+
+    async_base_parser.hooks = Hooks()
+    async_base_parser.rate_limiter = HostRateLimiter(initial_concurrency=1, max_concurrency=1)
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        response = MagicMock(spec=ClientResponse)
+        response.__aenter__.return_value = response
+        response.__aexit__.return_value = None
+        response.status = 200
+        response.headers = {}
+
+        async def iter_chunked(chunk_size: int) -> AsyncIterator[bytes]:
+            await asyncio.sleep(0.01)
+            yield b"data"
+
+        response.content.iter_chunked = iter_chunked
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    urls = ["http://example.com/1", "http://example.com/2"]
+    with patch("aiohttp.ClientSession", return_value=mock_session):
+        await asyncio.gather(
+            *(async_base_parser._download(url, sink=lambda chunk: None) for url in urls)
+        )
+
+    # Вторая загрузка начинается только после того, как первая освободила место хоста
+    assert events == [("start", urls[0]), ("end", urls[0]), ("start", urls[1]), ("end", urls[1])]
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_proxy_auth(async_base_parser: Any) -> None:
+    challenges = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal challenges
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        if 'Proxy-Authorization: Digest username="user"' in head and 'nonce="abc"' in head:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        else:
+            challenges += 1
+            writer.write(
+                b"HTTP/1.1 407 Proxy Authentication Required\r\n"
+                b'Proxy-Authenticate: Digest realm="proxy", nonce="abc", qop="auth"\r\n'
+                b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    proxy = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    async_base_parser.proxy_auth = AsyncProxyAuth("user", "pass")
+
+    async with server:
+        responses = await async_base_parser._make_backoff_request(
+            [f"http://example.com/{i}" for i in range(5)], proxies=proxy, iter_count=1
+        )
+
+    assert [response.text for response in responses] == ["ok"] * 5
+    # Вызов 407 получил только первый запрос, остальные ждали его
+    assert challenges == 1
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_proxy_without_auth(async_base_parser: Any) -> None:
+    active = 0
+    max_active = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal active, max_active
+        await reader.readuntil(b"\r\n\r\n")
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    proxy = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+    async_base_parser.proxy_auth = AsyncProxyAuth("user", "pass")
+
+    async with server:
+        responses = await async_base_parser._make_backoff_request(
+            [f"http://example.com/{i}" for i in range(5)], proxies=proxy, iter_count=1
+        )
+
+    assert [response.text for response in responses] == ["ok"] * 5
+    # Прокси не требует авторизации: после первого ответа запросы идут одновременно
+    assert async_base_parser.proxy_auth.get_scheme(proxy) == "none"
+    assert max_active == 4
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_metrics(async_base_parser: Any) -> None:
+    async_base_parser.hooks = RequestMetrics()
+    statuses = iter([500, 200])
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        response = _make_mock_response(url)
+        response.status = next(statuses)
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session), patch("asyncio.sleep"):
+        await async_base_parser._make_backoff_request(
+            urls=["http://example.com"], proxies=["http://proxy.com"]
+        )
+
+    host = async_base_parser.hooks.hosts()["example.com"]
+    assert (host.requests, host.retries) == (2, 1)
+    assert host.responses == {500: 1, 200: 1}
+    assert host.bytes_received == 2 * len(b"http://example.com")
+    assert host.backoff_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_make_backoff_request_metrics_cache_hit_retry(async_base_parser: Any) -> None:
+    async_base_parser.hooks = RequestMetrics()
+    async_base_parser.response_cache = ResponseCache(ttl=60)
+    url = "http://example.com"
+
+    def request(url: str, **kwargs: Any) -> MagicMock:
+        # Пока первая попытка ждёт повтора, ответ попадает в кэш (например, из другого вызова)
+        async_base_parser.response_cache.set(
+            async_base_parser._get_request_key(url, {"method": "GET"}),
+            url=url,
+            status_code=200,
+            content=b"cached",
+            headers={},
+        )
+        response = _make_mock_response(url)
+        response.status = 500
+        return response
+
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.request.side_effect = request
+    mock_session.__aenter__.return_value = mock_session
+    mock_session.__aexit__.return_value = None
+
+    with patch("aiohttp.ClientSession", return_value=mock_session), patch("asyncio.sleep"):
+        result = await async_base_parser._make_backoff_request(urls=[url])
+
+    # Повтор, который взял ответ из кэша, не считается отправленным повтором
+    host = async_base_parser.hooks.hosts()["example.com"]
+    assert (host.requests, host.retries) == (1, 0)
+    assert host.retry_amplification == 1.0
+    assert result[0].text == "cached"
+
+
+@pytest.mark.asyncio
+async def test_persistent_session(async_base_parser: Any) -> None:
+    mock_session = MagicMock(spec=ClientSession)
+    mock_session.closed = False
+    mock_session.close = AsyncMock()
+    mock_session.request.side_effect = lambda url, **kwargs: _make_mock_response(url)
+
+    with (
+        patch("aiohttp.ClientSession", return_value=mock_session) as session_class,
+        patch("aiohttp.TCPConnector") as connector_class,
+    ):
+        async with async_base_parser as parser:
+            await parser._make_backoff_request(urls=["http://example.com"])
+            await parser._make_backoff_request(urls=["http://example.org"], timeout=5)
+
+        # Сессия и коннектор создаются один раз на все вызовы
+        session_class.assert_called_once()
+        connector_class.assert_called_once_with(**async_base_parser.connector_params)
+        assert mock_session.request.call_count == 2
+        assert mock_session.request.call_args.kwargs["timeout"].total == 5
+
+    mock_session.close.assert_awaited_once()
+    assert async_base_parser.aiohttp_session is None
+
+
 @pytest.mark.asyncio
 async def test_prepare_request_data(async_base_parser: Any) -> None:
     urls = ["url1", "url2"]
@@ -1,10 +1,16 @@
+import threading
+import time
 from typing import Any, Dict, List
-from unittest.mock import Mock, call
+from unittest.mock import Mock, call, patch
 
 import pytest
+import requests
 from requests.models import Response
 
+from base_pars_lib import ProxyPool, RequestMetrics, ResponseCache, SessionAffinity
 from base_pars_lib.base_parser import BaseParser
+from base_pars_lib.core._requests_digest_proxy import HTTPProxyDigestAdapter
+from base_pars_lib.utils import rotating_proxy_auth
 
 
 @pytest.mark.parametrize(
@@ -89,9 +95,11 @@ def test_get_request_params(base_parser: BaseParser) -> None:
     )
 
     assert params["url"] == url
-    assert params["headers"] == headers
     assert params["cookies"] == cookies
     assert "User-Agent" in params["headers"]
+    # Случайный User-Agent записывается в копию заголовков, а не в словарь вызывающего кода
+    assert params["headers"] is not headers
+    assert headers == {"User-Agent": "test-agent"}
 
 
 def test_threading_method(base_parser: BaseParser) -> None:
@@ -107,6 +115,186 @@ def test_threading_method(base_parser: BaseParser) -> None:
     assert mock_method.call_count == len(chunked_array)
 
 
+def test_threading_pool_method(base_parser: BaseParser) -> None:
+    active_threads: list[int] = []
+    lock = threading.Lock()
+    max_active = 0
+
+    def method(chunk: int) -> int:
+        nonlocal max_active
+        with lock:
+            active_threads.append(chunk)
+            max_active = max(max_active, len(active_threads))
+        time.sleep(0.01)
+        with lock:
+            active_threads.remove(chunk)
+        return chunk * 2
+
+    results = base_parser._threading_pool_method(list(range(20)), method, max_workers=3)
+
+    assert results == [chunk * 2 for chunk in range(20)]
+    assert max_active <= 3
+
+
+def test_threading_pool_method_exceptions(base_parser: BaseParser) -> None:
+    def method(chunk: int) -> int:
+        if chunk == 1:
+            raise RuntimeError("chunk error")
+        return chunk
+
+    with pytest.raises(RuntimeError, match="chunk error"):
+        base_parser._threading_pool_method([0, 1, 2], method, max_workers=1)
+
+    results = base_parser._threading_pool_method(
+        [0, 1, 2], method, max_workers=1, return_exceptions=True
+    )
+    assert results[0] == 0
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == 2
+
+
+def test_threading_pool_method_cancel(base_parser: BaseParser) -> None:
+    cancel_event = threading.Event()
+    called: list[int] = []
+
+    def method(chunk: int) -> int:
+        called.append(chunk)
+        if chunk == 2:
+            cancel_event.set()
+        time.sleep(0.01)
+        return chunk
+
+    results = base_parser._threading_pool_method(
+        list(range(100)), method, max_workers=1, cancel_event=cancel_event
+    )
+
+    assert results[:3] == [0, 1, 2]
+    assert len(called) < 100
+    assert results[-1] is None
+
+
+def test_thread_local_sessions() -> None:
+    shared_session = requests.Session()
+    shared_session.headers["X-Test"] = "1"
+    parser = BaseParser(requests_session=shared_session, thread_local_sessions=True, pool_maxsize=4)
+
+    def get_session(_: int) -> requests.Session:
+        session = parser._get_thread_session()
+        assert parser._get_thread_session() is session
+        return session
+
+    sessions = parser._threading_pool_method([0, 1], get_session, max_workers=2)
+    main_session = parser._get_thread_session()
+
+    assert main_session is not shared_session
+    assert main_session.headers["X-Test"] == "1"
+    assert main_session.get_adapter("https://example.com")._pool_maxsize == 4  # type: ignore
+    assert main_session not in sessions
+
+    with patch.object(main_session, "request") as mock_request:
+        parser._make_request({"method": "GET", "url": "https://example.com"})
+    mock_request.assert_called_once_with(method="GET", url="https://example.com")
+
+    parser._close_thread_sessions()
+    assert parser._get_thread_session() is not main_session
+
+
+def test_thread_local_sessions_pool_size() -> None:
+    parser = BaseParser(thread_local_sessions=True)
+
+    def get_pool_maxsize(_: int) -> int:
+        return parser._get_thread_session().get_adapter("https://example.com")._pool_maxsize  # type: ignore
+
+    assert parser._threading_pool_method([0, 1], get_pool_maxsize, max_workers=3) == [3, 3]
+    parser._close_thread_sessions()
+
+
+def test_thread_local_sessions_proxy_digest_adapter() -> None:
+    shared_session = rotating_proxy_auth("http://proxy:8080", "http://proxy:8080", "user", "pass")
+    parser = BaseParser(requests_session=shared_session, thread_local_sessions=True)
+
+    session = parser._get_thread_session()
+
+    assert isinstance(session.get_adapter("https://example.com"), HTTPProxyDigestAdapter)
+    plain_session = BaseParser(thread_local_sessions=True)._get_thread_session()
+    assert not isinstance(plain_session.get_adapter("https://example.com"), HTTPProxyDigestAdapter)
+
+
+def test_make_backoff_request_proxy_pool(base_parser: BaseParser) -> None:
+    pool = ProxyPool([{"https": "http://dead"}, {"https": "http://alive"}])
+    pool.report_failure({"https": "http://dead"})
+
+    def request(**params: Any) -> Mock:
+        if params["proxies"] == {"https": "http://dead"}:
+            raise requests.exceptions.ProxyError
+        return Mock(status_code=200)
+
+    base_parser.requests_session.request.side_effect = request  # type: ignore[attr-defined]
+
+    with patch("time.sleep"):
+        for _ in range(5):
+            response = base_parser._make_backoff_request("https://example.com", proxies=pool)
+            assert response.status_code == 200
+
+    stats = {stats.proxy["https"]: stats for stats in pool.stats()}
+    assert stats["http://alive"].successes == 5
+    assert stats["http://alive"].latency_ewma is not None
+
+
+def test_make_backoff_request_session_affinity(base_parser: BaseParser) -> None:
+    base_parser.session_affinity = SessionAffinity()
+    proxies = [{"https": f"http://{i}.example.com"} for i in range(10)]
+    used_proxies: list[dict] = []
+
+    def request(**params: Any) -> Mock:
+        used_proxies.append(params["proxies"])
+        return Mock(status_code=200)
+
+    base_parser.requests_session.request.side_effect = request  # type: ignore[attr-defined]
+
+    for i in range(5):
+        base_parser._make_backoff_request(f"https://example.com/{i}", proxies=proxies)
+
+    # После первого успешного запроса прокси закреплён за хостом
+    assert all(proxy == used_proxies[0] for proxy in used_proxies)
+
+
+def test_make_backoff_request_response_cache(base_parser: BaseParser) -> None:
+    base_parser.response_cache = ResponseCache(ttl=60)
+    response = Response()
+    response.status_code = 200
+    response.url = "https://example.com"
+    response._content = b"content"
+    base_parser.requests_session.request.return_value = response  # type: ignore[attr-defined]
+
+    base_parser._make_backoff_request("https://example.com")
+    cached = base_parser._make_backoff_request("https://example.com")
+
+    # Второй ответ взят из кэша без запроса
+    assert base_parser.requests_session.request.call_count == 1  # type: ignore[attr-defined]
+    assert cached.content == b"content"
+    assert cached is not response
+
+
+def test_make_backoff_request_metrics(base_parser: BaseParser) -> None:
+    base_parser.hooks = RequestMetrics()
+    responses = []
+    for status_code in (503, 200):
+        response = Response()
+        response.status_code = status_code
+        response._content = b"content"
+        responses.append(response)
+    base_parser.requests_session.request.side_effect = responses  # type: ignore[attr-defined]
+
+    with patch("time.sleep"):
+        base_parser._make_backoff_request("https://example.com", increase_by_seconds=1)
+
+    host = base_parser.hooks.hosts()["example.com"]
+    assert (host.requests, host.retries, host.backoff_seconds) == (2, 1, 1)
+    assert host.responses == {503: 1, 200: 1}
+    assert host.bytes_received == 14
+
+
 def test_get_by_random_index_with_list(base_parser: BaseParser) -> None:
     item: List[Dict[str, str]] = [{"key1": "value1"}, {"key2": "value2"}, {"key3": "value3"}]
     result = base_parser._get_by_random_index(item, None, "TestItem")
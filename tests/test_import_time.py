@@ -0,0 +1,52 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_PACKAGES = {"aiohttp", "camoufox", "curl_cffi", "playwright", "selenium", "zendriver"}
+
+
+def get_imported_packages(code: str) -> set[str]:
+    """
+    Запускает code в новом интерпретаторе с -X importtime
+
+    :return: set[str]
+        Пакеты верхнего уровня всех импортированных модулей
+    """
+
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    # Строки вида "import time: self [us] | cumulative | imported package"
+    return {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in stderr.splitlines()
+        if line.startswith("import time:") and "imported package" not in line
+    }
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import base_pars_lib",
+        "from base_pars_lib import utils; utils.split_on_chunks_by_chunk_len",
+        "from base_pars_lib import BaseParser, BadUrls, ProxyPool",
+    ],
+)
+def test_no_heavy_imports(code: str) -> None:
+    assert not HEAVY_PACKAGES & get_imported_packages(code)
+
+
+def test_lazy_attributes() -> None:
+    import base_pars_lib
+    from base_pars_lib.async_base_parser import AsyncBaseParser
+
+    assert base_pars_lib.AsyncBaseParser is AsyncBaseParser
+    assert "AsyncBaseParser" in dir(base_pars_lib)
+    assert set(base_pars_lib.__all__) <= set(dir(base_pars_lib))
+    with pytest.raises(AttributeError):
+        base_pars_lib.NotExists  # noqa: B018
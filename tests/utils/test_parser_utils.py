@@ -1,4 +1,7 @@
-from base_pars_lib.utils import get_data_from_text
+import re
+
+from base_pars_lib.utils import TextExtractor, get_data_from_text
+from base_pars_lib.utils._parser_utils import Marker
 
 
 def test_get_data_from_text() -> None:
@@ -45,4 +48,82 @@ def test_get_data_from_text() -> None:
     assert result == "", "Ошибка при вырезании подстроки из пустого текста"
 
 
+def test_text_extractor() -> None:
+    text = '<h1>Title</h1><span class="price">10</span><h1>Second</h1><span class="price">20</span>'
+    fields: dict[str, tuple[Marker, Marker]] = {
+        "title": ("<h1>", "</h1>"),
+        "price": (re.compile(r'class="\w+">'), "</span>"),
+        "missing": ("<h2>", "</h2>"),
+        "not_closed": ("<h1>", "</h2>"),
+    }
+
+    assert TextExtractor(fields).extract(text) == {
+        "title": "Title",
+        "price": "10",
+        "missing": None,
+        "not_closed": None,
+    }
+    assert TextExtractor(fields).extract_all(text) == {
+        "title": ["Title", "Second"],
+        "price": ["10", "20"],
+        "missing": [],
+        "not_closed": [],
+    }
+
+    # Значения совпадают с get_data_from_text
+    extractor = TextExtractor(fields, cut_start_row=False, cut_end_row=False)
+    assert extractor.extract(text)["title"] == get_data_from_text(
+        text, "<h1>", "</h1>", cut_start_row=False, cut_end_row=False
+    )
+    assert extractor.extract(text)["price"] == 'class="price">10</span>'
+
+    # Поля по порядку: каждое ищется после предыдущего
+    ordered = TextExtractor(
+        {"second": ("<h1>Second", "</span>"), "price": ('"price">', "<")}, ordered=True
+    )
+    assert ordered.extract(text) == {"second": '</h1><span class="price">20', "price": None}
+    ordered = TextExtractor(
+        {"first": ("<h1>", "</h1>"), "missing": ("<h2>", "</h2>"), "title": ("<h1>", "</h1>")},
+        ordered=True,
+    )
+    assert ordered.extract(text) == {"first": "Title", "missing": None, "title": "Second"}
+
+    # Пустые границы не зацикливают extract_all
+    assert TextExtractor({"empty": ("", "")}).extract_all(text) == {"empty": [""]}
+
+
+def test_text_extractor_single_scan() -> None:
+    text = "<b>1</b><i>a<b>2</b></i><B>3</B><i>b</i><!-- x -->"
+    fields: dict[str, tuple[Marker, Marker]] = {
+        # Поля объявлены не в порядке следования на странице
+        "comment": ("<!--", "-->"),
+        "italic": ("<i>", "</i>"),
+        "bold": ("<b>", "</b>"),
+        "bold_any_case": (re.compile("<b>", re.IGNORECASE), re.compile("</b>", re.I)),
+        "verbose": (re.compile(r"<I> # комментарий", re.IGNORECASE | re.VERBOSE), "<"),
+    }
+
+    assert TextExtractor(fields).extract(text) == {
+        "comment": " x ",
+        "italic": "a<b>2</b>",
+        "bold": "1",
+        "bold_any_case": "1",
+        "verbose": "a",
+    }
+    # Левая граница внутри значения другого поля тоже засчитывается
+    assert TextExtractor(fields).extract_all(text) == {
+        "comment": [" x "],
+        "italic": ["a<b>2</b>", "b"],
+        "bold": ["1", "2"],
+        "bold_any_case": ["1", "2", "3"],
+        "verbose": ["a", "b"],
+    }
+
+    # Границы, которые начинаются в одной позиции: одна - начало другой
+    meta = '<meta name="description" content="text">'
+    assert TextExtractor(
+        {"name": ('name="', '"'), "description": ('name="description" content="', '"')}
+    ).extract(meta) == {"name": "description", "description": "text"}
+
+
 # pytest tests/utils/test_parser_utils.py
@@ -1,4 +1,4 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 from requests.auth import HTTPProxyAuth
 
@@ -23,6 +23,9 @@ def test_rotating_proxy_auth(mock_session: MagicMock) -> None:
     mock_session.assert_called_once()
     assert session == mock_session_instance
 
+    # Проверка, что транспорт авторизации в прокси смонтирован
+    mock_session_instance.mount.assert_any_call("https://", ANY)
+
     # Проверка, что прокси настроены правильно
     assert session.proxies["http"] == http_url
     assert session.proxies["https"] == https_url